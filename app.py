@@ -2,10 +2,17 @@
 Main Gradio application for Medical MCQ Generator.
 Run with: python app.py
 """
+import asyncio
 import os
 import gradio as gr
 from dotenv import load_dotenv
 
+try:  # libuv-based event loop; Gradio's server thread and agent runs pick it up
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:  # optional dependency; stdlib asyncio loop otherwise
+    pass
+
 from app.ui.gradio_app import create_interface
 from app.db.database import init_db
 
@@ -1,18 +1,32 @@
 """SequentialAgent pipeline for MCQ generation."""
-from google.adk.agents import Agent, SequentialAgent
+import hashlib
+import json
+import logging
+import re
+from typing import AsyncGenerator, Final
+
+from google.adk.agents import Agent, BaseAgent, ParallelAgent, SequentialAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
 from google.adk.models.google_llm import Gemini
 from app.tools.pubmed_tools import pubmed_search_tool, pubmed_fetch_tool
 from app.tools.schema_validator import schema_validator_tool
-from app.tools.kb_tools import kb_query_tool
+from app.tools.kb_tools import kb_distractor_tool, kb_query_tool
 from app.tools.tavily_search import tavily_search_tool
 from google.adk.tools import google_search
 
+try:  # orjson ships with gradio; parse errors still subclass json.JSONDecodeError
+    from orjson import loads as _json_loads
+except ImportError:  # pragma: no cover - depends on the installed extras
+    _json_loads = json.loads
+
+
+logger = logging.getLogger(__name__)
+
 
 # Source Ingestion Agent
-source_ingestion_agent = Agent(
-    name="SourceIngestionAgent",
-    model=Gemini(model="gemini-2.5-flash-lite"),
-    instruction="""
+SOURCE_INGESTION_INSTRUCTION: Final[str] = """
     You are a source ingestion agent. Your task is to:
     1. If given PubMed keywords, search and return article metadata
     2. If given a PubMed ID, fetch the article details
@@ -24,17 +38,11 @@ source_ingestion_agent = Agent(
        - content (abstract or PDF text)
     
     Always use the pubmed_search or pubmed_fetch tools when dealing with PubMed.
-    """,
-    tools=[pubmed_search_tool, pubmed_fetch_tool],
-    output_key="source_payload"
-)
+    """
 
 
 # Fact Extraction Agent (CRITICAL - Context Sentences)
-fact_extraction_agent = Agent(
-    name="FactExtractionAgent",
-    model=Gemini(model="gemini-2.5-flash-lite"),
-    instruction="""
+FACT_EXTRACTION_INSTRUCTION: Final[str] = """
     You are a fact extraction agent. Extract Subject-Action-Object triplets from medical source text.
     
     CRITICAL REQUIREMENTS:
@@ -66,17 +74,11 @@ fact_extraction_agent = Agent(
         "source_title": "Metformin in Type 2 Diabetes..."
       }
     ]
-    """,
-    tools=[schema_validator_tool],
-    output_key="extracted_triplets"
-)
+    """
 
 
 # KB Management Agent
-kb_management_agent = Agent(
-    name="KBManagementAgent",
-    model=Gemini(model="gemini-2.5-flash-lite"),
-    instruction="""
+KB_MANAGEMENT_INSTRUCTION: Final[str] = """
     You are a KB management agent. Your task is to:
     1. Check extracted triplets for duplicates against existing KB using kb_query_tool
     2. Validate triplets against schema using schema_validator_tool
@@ -85,17 +87,11 @@ kb_management_agent = Agent(
     
     Note: Do NOT automatically store triplets. They must be reviewed by human first.
     Mark triplets as ready_for_review with validation status.
-    """,
-    tools=[kb_query_tool, schema_validator_tool],
-    output_key="triplets_for_review"
-)
+    """
 
 
 # MCQ Generation Agent (with Google Search)
-mcq_generation_agent = Agent(
-    name="MCQGenerationAgent",
-    model=Gemini(model="gemini-2.5-flash-lite"),
-    instruction="""
+MCQ_GENERATION_INSTRUCTION: Final[str] = """
     You are an MCQ generation agent. Generate clinical-style MCQs from approved triplets.
     
     Requirements:
@@ -103,7 +99,7 @@ mcq_generation_agent = Agent(
     2. Generate one question
     3. Create 5 options: 1 correct (from triplet) + 4 distractors
     4. Distractors must be medically plausible and factually true in isolation but incorrect for this question
-    5. First, query KB using kb_query_tool to find plausible swap triplets for distractors
+    5. First, query KB using find_distractor_candidates to find plausible swap triplets for distractors
     6. If KB doesn't have enough plausible swap triplets, use google_search to find medically plausible alternatives
     7. Generate Visual Kernel Draft (VKD) - simple descriptive prompt for image generation
     
@@ -117,17 +113,11 @@ mcq_generation_agent = Agent(
       "triplet_id": 123,
       "source_id": 456
     }
-    """,
-    tools=[kb_query_tool, google_search],
-    output_key="mcq_draft"
-)
+    """
 
 
 # Visual Refiner Agent
-visual_refiner_agent = Agent(
-    name="VisualRefinerAgent",
-    model=Gemini(model="gemini-2.5-flash-lite"),
-    instruction="""
+VISUAL_REFINER_INSTRUCTION: Final[str] = """
     You are a visual refiner agent. Refine Visual Kernel Draft into Optimized Visual Prompt.
     
     Tasks:
@@ -141,17 +131,11 @@ visual_refiner_agent = Agent(
       "visual_triplet": "Metformin → demonstrates → Mechanism",
       "schema_valid": true
     }
-    """,
-    tools=[schema_validator_tool],
-    output_key="visual_payload"
-)
+    """
 
 
 # Zero-Triplet Fallback Agent
-zero_triplet_fallback_agent = Agent(
-    name="ZeroTripletFallbackAgent",
-    model=Gemini(model="gemini-2.5-flash-lite"),
-    instruction="""
+ZERO_TRIPLET_FALLBACK_INSTRUCTION: Final[str] = """
     You provide a safety net when FactExtractionAgent returns zero triplets.
 
     1. Inspect prior outputs:
@@ -181,47 +165,187 @@ zero_triplet_fallback_agent = Agent(
       },
       "notes": "brief rationale"
     }
-    """,
-    output_key="fallback_payload"
-)
+    """
 
 
-# SequentialAgent Pipeline
-mcq_pipeline = SequentialAgent(
-    name="MCQPipeline",
-    sub_agents=[
-        source_ingestion_agent,
-        fact_extraction_agent,
-        kb_management_agent,
-        mcq_generation_agent,
-        visual_refiner_agent,
-        zero_triplet_fallback_agent,
-    ]
-)
+# Markdown code fence around a JSON state value, e.g. ```json ... ```
+_FENCE_RE = re.compile(r"\A\s*```(?:json)?\s*|\s*```\s*\Z")
 
+# Shared default model; every agent in a pipeline uses the same instance
+_gemini_default = Gemini(model="gemini-2.5-flash-lite")
 
-def set_pipeline_model(model) -> None:
-    """Apply the provided LLM model to every agent in the pipeline."""
-    agents = [
-        source_ingestion_agent,
-        fact_extraction_agent,
-        kb_management_agent,
-        mcq_generation_agent,
-        visual_refiner_agent,
-        zero_triplet_fallback_agent,
-    ]
-    for agent in agents:
-        agent.model = model
+# Ingestion and extraction restate the source, so they run deterministically;
+# at this temperature OpenAILlm also serves repeated prompts from its cache
+_DETERMINISTIC_CONFIG = types.GenerateContentConfig(temperature=0.0)
+
+
+def _has_extracted_triplets(value) -> bool | None:
+    """Return whether extracted_triplets state holds any triplets (None if unparseable)."""
+    if isinstance(value, (list, dict)):
+        return bool(value)
+    if not isinstance(value, str):
+        return None
+    text = _FENCE_RE.sub("", value)
+    try:
+        return bool(_json_loads(text))
+    except json.JSONDecodeError:
+        return None
+
+
+class ZeroTripletFallbackGate(BaseAgent):
+    """Runs the fallback agent only when fact extraction returned zero triplets."""
 
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        if _has_extracted_triplets(ctx.session.state.get("extracted_triplets")):
+            # Common path: answer in code instead of spending an LLM call on a null
+            yield Event(
+                author=self.name,
+                invocation_id=ctx.invocation_id,
+                branch=ctx.branch,
+                content=types.Content(
+                    role="model",
+                    parts=[types.Part.from_text(text='{"fallback_payload": null}')],
+                ),
+                actions=EventActions(state_delta={"fallback_payload": None}),
+            )
+            return
 
-def set_distractor_tool(provider: str) -> None:
-    """Configure distractor search tool based on provider."""
-    tools = [kb_query_tool]
+        async for event in self.sub_agents[0].run_async(ctx):
+            yield event
+
+
+def _distractor_tools(provider: str) -> list:
+    """Distractor search tools for the given provider."""
+    tools = [kb_distractor_tool]
     if provider == "gemini":
         tools.append(google_search)
     elif provider == "openai":
         tools.append(tavily_search_tool)
-    mcq_generation_agent.tools = tools
+    return tools
+
+
+def build_pipeline(model=None, provider: str = "gemini") -> SequentialAgent:
+    """
+    Build a fresh agent pipeline bound to the given model.
+    
+    Agents are created per call rather than mutated in place, so concurrent
+    runs on different models never overwrite each other's configuration.
+    
+    Args:
+        model: LLM instance (or model name) used by every agent
+        provider: "gemini" or "openai"; selects the distractor search tool
+    
+    Returns:
+        SequentialAgent pipeline
+    """
+    if model is None:
+        model = _gemini_default
+
+    # Source Ingestion Agent
+    source_ingestion_agent = Agent(
+        name="SourceIngestionAgent",
+        model=model,
+        instruction=SOURCE_INGESTION_INSTRUCTION,
+        tools=[pubmed_search_tool, pubmed_fetch_tool],
+        generate_content_config=_DETERMINISTIC_CONFIG,
+        output_key="source_payload"
+    )
+
+    # Fact Extraction Agent (CRITICAL - Context Sentences)
+    fact_extraction_agent = Agent(
+        name="FactExtractionAgent",
+        model=model,
+        instruction=FACT_EXTRACTION_INSTRUCTION,
+        tools=[schema_validator_tool],
+        generate_content_config=_DETERMINISTIC_CONFIG,
+        output_key="extracted_triplets"
+    )
+
+    # KB Management Agent
+    kb_management_agent = Agent(
+        name="KBManagementAgent",
+        model=model,
+        instruction=KB_MANAGEMENT_INSTRUCTION,
+        tools=[kb_query_tool, schema_validator_tool],
+        output_key="triplets_for_review"
+    )
+
+    # MCQ Generation Agent (with Google Search)
+    mcq_generation_agent = Agent(
+        name="MCQGenerationAgent",
+        model=model,
+        instruction=MCQ_GENERATION_INSTRUCTION,
+        tools=_distractor_tools(provider),
+        output_key="mcq_draft"
+    )
+
+    # Visual Refiner Agent
+    visual_refiner_agent = Agent(
+        name="VisualRefinerAgent",
+        model=model,
+        instruction=VISUAL_REFINER_INSTRUCTION,
+        tools=[schema_validator_tool],
+        output_key="visual_payload"
+    )
+
+    # Zero-Triplet Fallback Agent
+    zero_triplet_fallback_agent = Agent(
+        name="ZeroTripletFallbackAgent",
+        model=model,
+        instruction=ZERO_TRIPLET_FALLBACK_INSTRUCTION,
+        output_key="fallback_payload"
+    )
+
+    # MCQ draft -> visual refinement must stay ordered (visual refiner reads mcq_draft)
+    mcq_branch = SequentialAgent(
+        name="MCQBranch",
+        sub_agents=[
+            mcq_generation_agent,
+            visual_refiner_agent,
+        ]
+    )
+
+    # KB review only depends on extracted_triplets, so it overlaps the MCQ branch.
+    # Each branch writes a distinct output_key, so there are no state write races.
+    review_and_generate = ParallelAgent(
+        name="ReviewAndGenerate",
+        sub_agents=[
+            kb_management_agent,
+            mcq_branch,
+        ]
+    )
+
+    # Instructions are static (no per-request formatting), so providers can
+    # prefix-cache them. Log their hashes to make cache-hit auditing easy.
+    for agent in (
+        source_ingestion_agent,
+        fact_extraction_agent,
+        kb_management_agent,
+        mcq_generation_agent,
+        visual_refiner_agent,
+        zero_triplet_fallback_agent,
+    ):
+        logger.debug(
+            "Instruction prefix %s sha256=%s",
+            agent.name,
+            hashlib.sha256(agent.instruction.encode("utf-8")).hexdigest()[:16],
+        )
 
+    return SequentialAgent(
+        name="MCQPipeline",
+        sub_agents=[
+            source_ingestion_agent,
+            fact_extraction_agent,
+            review_and_generate,
+            ZeroTripletFallbackGate(
+                name="ZeroTripletFallbackGate",
+                sub_agents=[zero_triplet_fallback_agent],
+            ),
+        ]
+    )
 
 
+# Default pipeline (Gemini); runner.py builds one per selected model
+mcq_pipeline = build_pipeline()
@@ -3,12 +3,17 @@ from google.adk.apps.app import App, EventsCompactionConfig
 from app.agents.pipeline import mcq_pipeline
 from app.core.session import session_service
 
-app = App(
-    name="MedicalMCQGenerator",
-    root_agent=mcq_pipeline,
-    events_compaction_config=EventsCompactionConfig(
-        compaction_interval=5,  # Compact every 5 turns
-        overlap_size=2  # Keep 2 previous turns
+
+def build_app(root_agent) -> App:
+    """Wrap a pipeline in an App with the shared compaction settings."""
+    return App(
+        name="MedicalMCQGenerator",
+        root_agent=root_agent,
+        events_compaction_config=EventsCompactionConfig(
+            compaction_interval=5,  # Compact every 5 turns
+            overlap_size=2  # Keep 2 previous turns
+        )
     )
-)
 
+
+app = build_app(mcq_pipeline)
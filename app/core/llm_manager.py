@@ -4,6 +4,8 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Dict, List, Optional
 import logging
+import threading
+import weakref
 
 from google.adk.models.google_llm import Gemini
 
@@ -13,7 +15,7 @@ from app.core.openai_llm import OpenAILlm
 logger = logging.getLogger(__name__)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class LLMConfig:
     """Configuration metadata for selectable LLMs."""
 
@@ -30,8 +32,11 @@ class LLMManager:
 
     def __init__(self) -> None:
         self._configs: Dict[str, LLMConfig] = {}
-        self._model_cache: Dict[str, object] = {}
+        # Weak cache: backends (and their HTTP clients) are freed once no pipeline uses them
+        self._model_cache: "weakref.WeakValueDictionary[str, object]" = weakref.WeakValueDictionary()
         self._default_id: Optional[str] = None
+        # One lock per identifier so concurrent callers share a single construction
+        self._build_locks: Dict[str, threading.Lock] = {}
 
         self._register_default_configs()
 
@@ -58,6 +63,7 @@ class LLMManager:
 
     def register_config(self, config: LLMConfig) -> None:
         self._configs[config.identifier] = config
+        self._build_locks.setdefault(config.identifier, threading.Lock())
         if config.default or self._default_id is None:
             self._default_id = config.identifier
 
@@ -84,32 +90,45 @@ class LLMManager:
     def get_model(self, model_id: Optional[str]) -> object:
         """Return (and cache) the LLM instance for the given model id."""
         config = self.get_config(model_id)
-        if config.identifier in self._model_cache:
-            return self._model_cache[config.identifier]
-
-        model_instance = self._create_model(config)
-        self._model_cache[config.identifier] = model_instance
+        model_instance = self._model_cache.get(config.identifier)
+        if model_instance is not None:
+            return model_instance
+
+        with self._build_locks[config.identifier]:
+            model_instance = self._model_cache.get(config.identifier)
+            if model_instance is None:
+                model_instance = self._create_model(config)
+                self._model_cache[config.identifier] = model_instance
         return model_instance
 
     def _create_model(self, config: LLMConfig):
-        """Instantiate the correct LLM backend, defaulting to ChatGPT on errors."""
-        try:
-            if config.provider == "openai":
-                return OpenAILlm(model=config.model_name)
-            if config.provider == "gemini":
-                return Gemini(model=config.model_name)
-
-            raise ValueError(f"Unsupported provider '{config.provider}'")
-        except Exception as exc:
-            logger.warning(
-                "Failed to initialize model '%s': %s",
-                config.identifier,
-                exc,
-                exc_info=True,
-            )
-            if config.identifier != self.default_id:
-                return self._create_model(self.get_config(self.default_id))
-            raise
+        """Instantiate the correct LLM backend, falling back to the default on errors."""
+        candidates = [config]
+        if config.identifier != self.default_id:
+            candidates.append(self.get_config(self.default_id))
+
+        last_exc: Optional[Exception] = None
+        for candidate in candidates:
+            try:
+                return self._build_backend(candidate)
+            except Exception as exc:
+                logger.warning(
+                    "Failed to initialize model '%s': %s",
+                    candidate.identifier,
+                    exc,
+                    exc_info=True,
+                )
+                last_exc = exc
+        raise last_exc
+
+    @staticmethod
+    def _build_backend(config: LLMConfig):
+        if config.provider == "openai":
+            return OpenAILlm(model=config.model_name)
+        if config.provider == "gemini":
+            return Gemini(model=config.model_name)
+
+        raise ValueError(f"Unsupported provider '{config.provider}'")
 
 
 llm_manager = LLMManager()
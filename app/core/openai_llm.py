@@ -1,7 +1,10 @@
 """Custom LLM wrapper for ChatGPT 4o mini via OpenAI."""
 from __future__ import annotations
 
+import functools
+import hashlib
 import os
+from collections import OrderedDict
 from typing import AsyncGenerator
 
 from google.adk.models.base_llm import BaseLlm
@@ -9,6 +12,46 @@ from google.adk.models.llm_response import LlmResponse
 from google.genai import types
 from openai import AsyncOpenAI
 
+# Responses above this temperature are meant to vary, so they are never cached.
+# The pipeline's extraction-style agents run at 0.0 (see build_pipeline).
+_CACHE_MAX_TEMPERATURE = 0.3
+_CACHE_MAX_ENTRIES = int(os.getenv("OPENAI_RESPONSE_CACHE_SIZE", "256"))
+
+_OPENAI_ROLES = frozenset({"system", "user", "assistant", "function", "tool", "developer"})
+
+# One client per API key so the underlying httpx pool and TLS sessions are reused.
+_client_cache: dict[str, AsyncOpenAI] = {}
+
+# LRU of (model, system prompt hash, conversation hash) -> response text
+_response_cache: "OrderedDict[tuple[str, str, str], str]" = OrderedDict()
+
+
+def _get_client(api_key: str) -> AsyncOpenAI:
+    """Return the shared AsyncOpenAI client for this API key."""
+    client = _client_cache.get(api_key)
+    if client is None:
+        client = AsyncOpenAI(api_key=api_key)
+        _client_cache[api_key] = client
+    return client
+
+
+@functools.lru_cache(maxsize=64)
+def _join_system(instructions: tuple[str, ...]) -> str:
+    """Join list-form system instructions once per distinct instruction set."""
+    return "\n\n".join(instructions)
+
+
+def _prefix_hash(text: str) -> str:
+    """SHA256 of a static prompt prefix (system instruction)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _cache_key(model: str, messages: list[dict]) -> tuple[str, str, str]:
+    """Build a cache key from the exact prompt text (case matters in drug and gene names)."""
+    system_text = "\n".join(m["content"] for m in messages if m["role"] == "system")
+    conversation = "\n".join(f"{m['role']}: {m['content']}" for m in messages if m["role"] != "system")
+    return model, _prefix_hash(system_text), _prefix_hash(conversation)
+
 
 class OpenAILlm(BaseLlm):
     """Minimal BaseLlm implementation that proxies to OpenAI Chat Completions."""
@@ -25,28 +68,54 @@ class OpenAILlm(BaseLlm):
                 "OPENAI_API_KEY is not set. Please configure it in the environment."
             )
 
-        client = AsyncOpenAI(api_key=api_key)
-
         messages = self._convert_contents_to_messages(llm_request)
-
+        temperature = llm_request.config.temperature
+        if temperature is None:  # an explicit 0.0 must stay deterministic
+            temperature = 0.7
+
+        cache_key = None
+        if temperature <= _CACHE_MAX_TEMPERATURE:
+            cache_key = _cache_key(self.model, messages)
+            cached_text = _response_cache.get(cache_key)
+            if cached_text is not None:
+                _response_cache.move_to_end(cache_key)
+                yield self._build_response(cached_text)
+                return
+
+        # Static system instructions come first in messages, so OpenAI's automatic
+        # prefix cache can reuse them; route requests sharing a prefix together.
+        extra_args = {}
+        if messages[0]["role"] == "system":
+            extra_args["prompt_cache_key"] = _prefix_hash(messages[0]["content"])[:32]
+
+        client = _get_client(api_key)
         response = await client.chat.completions.create(
             model=self.model,
             messages=messages,
-            temperature=llm_request.config.temperature or 0.7,
+            temperature=temperature,
+            **extra_args,
         )
 
         content_text = ""
         if response.choices:
             content_text = response.choices[0].message.content or ""
 
-        llm_response = LlmResponse(
+        if cache_key is not None and content_text:
+            _response_cache[cache_key] = content_text
+            if len(_response_cache) > _CACHE_MAX_ENTRIES:
+                _response_cache.popitem(last=False)
+
+        yield self._build_response(content_text)
+
+    def _build_response(self, content_text: str) -> LlmResponse:
+        """Wrap response text in an ADK LlmResponse."""
+        return LlmResponse(
             content=types.Content(
                 role="model",
                 parts=[types.Part.from_text(text=content_text)],
             ),
             model_version=self.model,
         )
-        yield llm_response
 
     def _convert_contents_to_messages(self, llm_request) -> list[dict]:
         """Convert ADK contents + system instruction into OpenAI messages."""
@@ -55,27 +124,24 @@ class OpenAILlm(BaseLlm):
         system_instruction = llm_request.config.system_instruction
         if system_instruction:
             if isinstance(system_instruction, list):
-                system_text = "\n\n".join(system_instruction)
+                system_text = _join_system(tuple(system_instruction))
             else:
                 system_text = str(system_instruction)
             messages.append({"role": "system", "content": system_text})
 
         for content in llm_request.contents:
-            text_parts = []
-            for part in content.parts or []:
-                if part.text:
-                    text_parts.append(part.text)
-            if text_parts:
+            text = "\n".join(part.text for part in content.parts or () if part.text)
+            if text:
                 role = content.role or "user"
                 if role == "model":
                     role = "assistant"
-                elif role not in {"system", "user", "assistant", "function", "tool", "developer"}:
+                elif role not in _OPENAI_ROLES:
                     # fall back to user for any unsupported roles
                     role = "user"
                 messages.append(
                     {
                         "role": role,
-                        "content": "\n".join(text_parts),
+                        "content": text,
                     }
                 )
 
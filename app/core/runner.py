@@ -1,17 +1,28 @@
 """Runner with session restore functionality."""
 from google.adk.runners import Runner
 from google.genai import types
-from app.core.app import app
+from app.core.app import app, build_app
 from app.core.session import session_service
-from typing import Optional, Any
-import time
+from typing import Optional, Any, Dict
+import asyncio
+import os
+import uuid
 
 from app.core.llm_manager import llm_manager
-from app.agents.pipeline import set_pipeline_model, set_distractor_tool
+from app.agents.pipeline import build_pipeline
 
 
 runner = Runner(app=app, session_service=session_service)
 
+# One runner (and pipeline) per LLM identifier; agents are never mutated per request
+_runners: Dict[str, Runner] = {}
+
+# Upper bound on concurrent pipeline runs across the whole process. Every
+# run_agent call takes a slot, so concurrent callers queue here in arrival
+# order instead of all hitting the model at once.
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))
+_llm_slots = asyncio.Semaphore(LLM_CONCURRENCY)
+
 
 async def run_agent(
     new_message: str,
@@ -31,27 +42,47 @@ async def run_agent(
     Returns:
         Final result from agent pipeline
     """
+    return await _run_pipeline(_get_runner(model_id), new_message, user_id, session_id)
+
+
+def _get_runner(model_id: Optional[str]) -> Runner:
+    """Return (and cache) a runner whose pipeline is bound to the selected model."""
+    config = llm_manager.get_config(model_id)
+    model_runner = _runners.get(config.identifier)
+    if model_runner is None:
+        model = llm_manager.get_model(config.identifier)
+        pipeline = build_pipeline(model, config.provider)
+        model_runner = Runner(app=build_app(pipeline), session_service=session_service)
+        _runners[config.identifier] = model_runner
+    return model_runner
+
+
+async def _run_pipeline(
+    model_runner: Runner,
+    new_message: str,
+    user_id: str,
+    session_id: Optional[str],
+) -> Any:
+    """Send one message through the pipeline and return the final event."""
     if session_id is None:
         session_id = await create_new_session(user_id)
     
-    # Apply the selected model across the pipeline.
-    config = llm_manager.get_config(model_id)
-    model = llm_manager.get_model(config.identifier)
-    set_pipeline_model(model)
-    set_distractor_tool(config.provider)
-    
     query_content = types.Content(
         role="user",
         parts=[types.Part.from_text(text=new_message)],
     )
     
+    # Only final responses are kept; partial (streamed) and tool-call events are
+    # skipped. The generator is still drained so every sub-agent runs.
     result = None
-    async for event in runner.run_async(
-        user_id=user_id,
-        session_id=session_id,
-        new_message=query_content
-    ):
-        result = event
+    async with _llm_slots:
+        async for event in model_runner.run_async(
+            user_id=user_id,
+            session_id=session_id,
+            new_message=query_content
+        ):
+            if event.is_final_response():
+                result = event
     
     return result
 
@@ -86,7 +117,7 @@ async def create_new_session(user_id: str = "default") -> str:
     Returns:
         New session ID
     """
-    session_id = f"session_{int(time.time())}"
+    session_id = f"session_{uuid.uuid4().hex}"
     try:
         await session_service.create_session(
             app_name="MedicalMCQGenerator",
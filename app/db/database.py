@@ -1,22 +1,164 @@
 """Database setup and configuration."""
-from sqlalchemy import create_engine
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, TypeVar
+
+from sqlalchemy import and_, bindparam, create_engine, exists, func, inspect, make_url, select, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import sessionmaker, Session, declarative_base
+import json
+import logging
 import os
 
+try:  # C-accelerated (de)serializer for JSON columns
+    import orjson
+
+    def _json_serializer(value) -> str:
+        return orjson.dumps(value).decode()
+
+    _json_deserializer = orjson.loads
+except ImportError:  # pragma: no cover - orjson normally comes with gradio
+    _json_serializer = json.dumps
+    _json_deserializer = json.loads
+
+logger = logging.getLogger(__name__)
+
 # Create Base here to avoid circular import
 Base = declarative_base()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./medical_mcq.db")
 SESSION_DB_URL = os.getenv("SESSION_DB_URL", "sqlite:///./agent_sessions.db")
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Bounded pool with pre-ping so concurrent handlers reuse healthy connections.
+# In-memory SQLite (sqlite://, :memory: or mode=memory) uses a per-thread
+# singleton pool that takes no sizing options.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+_url = make_url(DATABASE_URL)
+_is_sqlite = _url.get_backend_name() == "sqlite"
+_is_memory_db = _is_sqlite and (
+    _url.database in (None, "", ":memory:") or _url.query.get("mode") == "memory"
+)
+_pool_args = {"pool_pre_ping": True, "pool_recycle": 1800}
+if not _is_memory_db:
+    _pool_args.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        pool_use_lifo=True,
+    )
+
+engine = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False} if _is_sqlite else {},
+    json_serializer=_json_serializer,
+    json_deserializer=_json_deserializer,
+    # Compiled-SQL cache; the UI issues a few dozen distinct statement shapes
+    query_cache_size=int(os.getenv("DB_QUERY_CACHE_SIZE", "1200")),
+    **_pool_args,
+)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+# Threads for database work started from async handlers, one per pooled
+# connection so a queued call waits here rather than on the pool
+db_executor = ThreadPoolExecutor(max_workers=DB_POOL_SIZE, thread_name_prefix="db")
+
+_T = TypeVar("_T")
+
+
+async def run_db(fn: Callable[..., _T], *args: Any) -> _T:
+    """Run a blocking database call on db_executor without blocking the event loop."""
+    return await asyncio.get_running_loop().run_in_executor(
+        db_executor, functools.partial(fn, *args)
+    )
+
 
 def init_db():
     """Initialize database tables"""
     # Import models here to ensure they're registered with Base
     from app.db import models  # noqa: F401
     Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        _dedupe_triplets(conn)
+    # create_all skips existing tables, so add any indexes declared after they were created
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(bind=engine, checkfirst=True)
+            except IntegrityError:
+                # Unique index over legacy duplicate rows; the table still works without it
+                logger.warning("Skipping index %s: existing rows violate it", index.name)
+    _migrate_jsonb_columns()
+
+
+def _dedupe_triplets(conn) -> int:
+    """Merge legacy duplicate triplets (keeping the lowest id) so ux_triplet_identity can be built.
+
+    MCQs pointing at a removed duplicate are moved to the kept row. Returns the
+    number of triplets removed.
+    """
+    from app.db.models import MCQRecord, Triplet
+
+    if any(index["name"] == "ux_triplet_identity" for index in inspect(conn).get_indexes("triplets")):
+        return 0
+    triplets = Triplet.__table__
+    identity = next(index for index in triplets.indexes if index.name == "ux_triplet_identity")
+    kept = triplets.alias("kept")
+    same_key = and_(*(kept.c[column.name] == column for column in identity.columns))
+    duplicate = exists().where(same_key, kept.c.id < triplets.c.id)
+
+    # Kept triplet for each duplicate, keyed by the duplicate's id
+    canonical = {
+        duplicate_id: kept_id
+        for duplicate_id, kept_id in conn.execute(
+            select(triplets.c.id, select(func.min(kept.c.id)).where(same_key).scalar_subquery())
+            .where(duplicate)
+        )
+    }
+    if not canonical:
+        return 0
+    mcqs = MCQRecord.__table__
+    conn.execute(
+        mcqs.update().where(mcqs.c.triplet_id == bindparam("duplicate_id")).values(triplet_id=bindparam("kept_id")),
+        [{"duplicate_id": duplicate_id, "kept_id": kept_id} for duplicate_id, kept_id in canonical.items()],
+    )
+    conn.execute(triplets.delete().where(triplets.c.id.in_(list(canonical))))
+    logger.warning("Removed %d duplicate triplets before creating ux_triplet_identity", len(canonical))
+    return len(canonical)
+
+
+def _migrate_jsonb_columns():
+    """On Postgres, convert legacy JSON/TEXT columns to the JSONB type the models declare."""
+    if engine.dialect.name != "postgresql":
+        return
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {col["name"]: col["type"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if not isinstance(column.type.dialect_impl(engine.dialect), JSONB):
+                    continue
+                if column.name not in existing or isinstance(existing[column.name], JSONB):
+                    continue
+                logger.info("Converting %s.%s to JSONB", table.name, column.name)
+                conn.execute(text(
+                    f'ALTER TABLE "{table.name}" ALTER COLUMN "{column.name}" '
+                    f'TYPE JSONB USING "{column.name}"::jsonb'
+                ))
+
+@contextmanager
+def session_scope() -> Iterator[Session]:
+    """Provide a session that commits on success, rolls back on error and always closes."""
+    db = SessionLocal()
+    try:
+        yield db
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    finally:
+        db.close()
 
 def get_db() -> Session:
     """Get database session"""
@@ -1,12 +1,20 @@
 """SQLAlchemy models for Medical MCQ Generator."""
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Boolean, Index, JSON
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from sqlalchemy.sql import func
 from app.db.database import Base  # Base is defined in database.py
 
+# Native binary JSON on Postgres; plain JSON (text) elsewhere
+JSONList = JSON().with_variant(JSONB(), "postgresql")
+
 
 class Source(Base):
     __tablename__ = "sources"
+    __table_args__ = (
+        Index("ix_source_parent_source_id", "parent_source_id"),  # PDF chunk lookups
+        Index("ix_source_created_at", "created_at"),  # Recent-articles listing
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
     source_id: Mapped[str] = mapped_column(String(256), unique=True)  # PubMed ID or filename
@@ -27,6 +35,15 @@ class Source(Base):
 
 class Triplet(Base):
     __tablename__ = "triplets"
+    __table_args__ = (
+        Index("ix_triplet_source_id", "source_id"),
+        Index("ix_triplet_status", "status"),
+        Index("ix_triplet_subject_object", "subject", "object"),
+        # Covers the auto-accept lookup of accepted keys by subject (index-only scan)
+        Index("ix_triplet_status_key", "status", "subject", "action", "object", "relation"),
+        # Conflict target for bulk upserts (kb_service.upsert_triplets_bulk)
+        Index("ux_triplet_identity", "source_id", "subject", "action", "object", unique=True),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
     subject: Mapped[str] = mapped_column(String(256))
@@ -34,7 +51,7 @@ class Triplet(Base):
     object: Mapped[str] = mapped_column(String(256))
     relation: Mapped[str] = mapped_column(String(128))  # From schema.yaml
     source_id: Mapped[int] = mapped_column(ForeignKey("sources.id"))
-    context_sentences: Mapped[str] = mapped_column(Text)  # JSON array of sentences (CRITICAL)
+    context_sentences: Mapped[list[str]] = mapped_column(JSONList, default=list)  # Array of sentences (CRITICAL)
     schema_valid: Mapped[bool] = mapped_column(Boolean, default=False)
     status: Mapped[str] = mapped_column(String(20), default="pending")  # pending, accepted, rejected
     created_at: Mapped[DateTime] = mapped_column(DateTime, server_default=func.now())
@@ -45,11 +62,18 @@ class Triplet(Base):
 
 class MCQRecord(Base):
     __tablename__ = "mcq_records"
+    __table_args__ = (
+        Index("ix_mcq_source_id", "source_id"),
+        Index("ix_mcq_triplet_id", "triplet_id"),
+        Index("ix_mcq_status", "status"),
+        # Stored-MCQ pages, newest first (id breaks created_at ties)
+        Index("ix_mcq_created_at_id", "created_at", "id"),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
     stem: Mapped[str] = mapped_column(Text)
     question: Mapped[str] = mapped_column(Text)
-    options: Mapped[str] = mapped_column(Text)  # JSON array of 5 options
+    options: Mapped[list[str]] = mapped_column(JSONList)  # Array of 5 options
     correct_option: Mapped[int] = mapped_column(Integer)  # 0-4 index
     source_id: Mapped[int] = mapped_column(ForeignKey("sources.id"))
     triplet_id: Mapped[int] = mapped_column(ForeignKey("triplets.id"))
@@ -65,6 +89,10 @@ class MCQRecord(Base):
 
 class PendingSource(Base):
     __tablename__ = "pending_sources"
+    __table_args__ = (
+        # Pending queue, newest first (id breaks created_at ties)
+        Index("ix_pending_created_at_id", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     source_id: Mapped[int] = mapped_column(ForeignKey("sources.id"), unique=True)
@@ -2,20 +2,50 @@
 from __future__ import annotations
 
 import base64
+import functools
+import importlib.util
 import os
+import shutil
 from dataclasses import dataclass
 from io import BytesIO
 from math import gcd
 from typing import Optional, Tuple
 
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
 from google import genai
 from google.genai import types
-from openai import OpenAI
+from openai import DefaultHttpxClient, OpenAI
 from PIL import Image
 
+try:  # SIMD base64 decoder; optional, the stdlib codec is used when absent
+    import pybase64 as _b64
+except ImportError:  # pragma: no cover - depends on the image environment
+    _b64 = base64
+
 DEFAULT_IMAGE_SIZE = os.getenv("GEMINI_IMAGE_DEFAULT_SIZE", "512x512")
 IMAGE_MODEL = os.getenv("GEMINI_IMAGE_MODEL", "gemini-2.5-flash-image")
+# SDK connection pool; httpx only speaks HTTP/2 when the optional h2 package is present
+_HTTP2 = importlib.util.find_spec("h2") is not None
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=8, max_connections=16)
+# BICUBIC is ~2x faster than LANCZOS with comparable quality; IMAGE_RESAMPLE=lanczos restores it
+_RESAMPLE = Image.LANCZOS if os.getenv("IMAGE_RESAMPLE", "bicubic").lower() == "lanczos" else Image.BICUBIC
+# Encoding used for locally resized images: PIL format, save kwargs, MIME type
+_OUTPUT_FORMATS = {
+    "webp": ("WEBP", {"quality": 90, "method": 4}, "image/webp"),
+    "jpeg": ("JPEG", {"quality": 90}, "image/jpeg"),
+    "png": ("PNG", {}, "image/png"),
+}
+IMAGE_OUTPUT_FORMAT = os.getenv("IMAGE_OUTPUT_FORMAT", "webp").lower()
+if IMAGE_OUTPUT_FORMAT not in _OUTPUT_FORMATS:
+    IMAGE_OUTPUT_FORMAT = "webp"
+# File extension for each MIME type the service can return
+_EXTENSIONS = {"image/webp": "webp", "image/jpeg": "jpg", "image/png": "png"}
+
+# Shared session keeps the TLS connection to the image CDN alive between downloads
+_HTTP = requests.Session()
+_HTTP.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
 
 
 @dataclass
@@ -24,22 +54,50 @@ class GeminiImageResult:
     message: str
     image_bytes: Optional[bytes] = None
     size_used: Optional[str] = None
+    mime_type: str = "image/png"
+
+    @property
+    def extension(self) -> str:
+        return _EXTENSIONS.get(self.mime_type, "png")
 
 
 def _get_gemini_client() -> genai.Client:
     api_key = os.getenv("GOOGLE_API_KEY")
     if not api_key:
         raise RuntimeError("GOOGLE_API_KEY is not set. Please update the .env file.")
-    return genai.Client(api_key=api_key)
+    return _gemini_client_for(api_key)
 
 
 def _get_openai_client() -> OpenAI:
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise RuntimeError("OPENAI_API_KEY is not set. Please update the .env file.")
-    return OpenAI(api_key=api_key)
+    return _openai_client_for(api_key)
+
+
+# Clients are cached per API key so connection pools and TLS sessions are reused
+@functools.lru_cache(maxsize=2)
+def _gemini_client_for(api_key: str) -> genai.Client:
+    http_client = httpx.Client(http2=_HTTP2, limits=_HTTP_LIMITS)
+    return genai.Client(api_key=api_key, http_options=types.HttpOptions(httpx_client=http_client))
+
+
+@functools.lru_cache(maxsize=2)
+def _openai_client_for(api_key: str) -> OpenAI:
+    return OpenAI(api_key=api_key, http_client=DefaultHttpxClient(http2=_HTTP2, limits=_HTTP_LIMITS))
+
 
+@functools.lru_cache(maxsize=32)
+def _is_openai(model_id: Optional[str]) -> bool:
+    """True when model_id selects the DALL-E backend instead of Gemini."""
+    return bool(model_id) and any(key in model_id.lower() for key in ("chatgpt", "openai"))
 
+
+# Shared default config; callers never mutate the returned ImageConfig
+_SQUARE_IMAGE_CONFIG = types.ImageConfig(aspect_ratio="1:1")
+
+
+@functools.lru_cache(maxsize=128)
 def _parse_size_to_image_config(size_value: str) -> Tuple[types.ImageConfig, Optional[Tuple[int, int]]]:
     """Coerce user-provided size into an aspect ratio; keep dims for local resizing."""
     normalized = (size_value or "").strip() or DEFAULT_IMAGE_SIZE or "512x512"
@@ -54,12 +112,54 @@ def _parse_size_to_image_config(size_value: str) -> Tuple[types.ImageConfig, Opt
             ratio = f"{width // divisor}:{height // divisor}"
             return types.ImageConfig(aspect_ratio=ratio), (width, height)
         except ValueError:
-            return types.ImageConfig(aspect_ratio="1:1"), None
+            return _SQUARE_IMAGE_CONFIG, None
 
     if ":" in normalized:
         return types.ImageConfig(aspect_ratio=normalized), None
 
-    return types.ImageConfig(aspect_ratio="1:1"), None
+    return _SQUARE_IMAGE_CONFIG, None
+
+
+def _resize_bytes(image_bytes: bytes, dims: Tuple[int, int]) -> Tuple[bytes, str]:
+    """Resize image bytes to dims and re-encode in IMAGE_OUTPUT_FORMAT; return (bytes, mime type).
+
+    Bytes already at dims are returned as-is with their own MIME type.
+    """
+    pil_format, save_kwargs, mime_type = _OUTPUT_FORMATS[IMAGE_OUTPUT_FORMAT]
+    with Image.open(BytesIO(image_bytes)) as probe:
+        # Opening only reads the header, so this check is cheap
+        if probe.size == dims:
+            return image_bytes, Image.MIME.get(probe.format, "image/png")
+        # JPEG sources decode straight to a reduced scale; no-op for other formats
+        probe.draft("RGB", dims)
+        # Model outputs are opaque, so lossy formats drop the alpha channel
+        mode = "RGBA" if pil_format == "PNG" else "RGB"
+        pil_image = probe if probe.mode == mode else probe.convert(mode)
+        pil_image = pil_image.resize(dims, _RESAMPLE)
+    # Closing the buffer frees its backing store as soon as the bytes are copied out
+    with BytesIO() as buffer:
+        pil_image.save(buffer, format=pil_format, **save_kwargs)
+        return buffer.getvalue(), mime_type
+
+
+def _iter_parts(response):
+    """Lazily yield response parts, top-level first, then each candidate's."""
+    yield from getattr(response, "parts", None) or ()
+    for candidate in getattr(response, "candidates", None) or ():
+        content = getattr(candidate, "content", None)
+        yield from getattr(content, "parts", None) or getattr(candidate, "parts", None) or ()
+
+
+def _decode_inline_data(data) -> Optional[bytes]:
+    """Return inline image data as bytes, decoding base64 strings."""
+    if isinstance(data, bytes):
+        return data
+    if isinstance(data, str):
+        try:
+            return _b64.b64decode(data, validate=False)
+        except Exception:
+            return data.encode("utf-8")
+    return None
 
 
 def _extract_image_bytes(response) -> Optional[bytes]:
@@ -67,31 +167,21 @@ def _extract_image_bytes(response) -> Optional[bytes]:
     if not response:
         return None
 
-    candidate_sequences = []
-    parts_attr = getattr(response, "parts", None)
-    if parts_attr:
-        candidate_sequences.append(parts_attr)
-
-    candidates = getattr(response, "candidates", None)
-    if candidates:
-        for candidate in candidates:
-            if getattr(candidate, "content", None) and getattr(candidate.content, "parts", None):
-                candidate_sequences.append(candidate.content.parts)
-            elif getattr(candidate, "parts", None):
-                candidate_sequences.append(candidate.parts)
-
-    for sequence in candidate_sequences:
-        for part in sequence:
-            inline_data = getattr(part, "inline_data", None)
-            if inline_data and getattr(inline_data, "data", None):
-                data = inline_data.data
-                if isinstance(data, bytes):
-                    return data
-                if isinstance(data, str):
-                    try:
-                        return base64.b64decode(data)
-                    except Exception:
-                        return data.encode("utf-8")
+    # Fast path: the usual single candidate whose first part is the image
+    try:
+        data = response.candidates[0].content.parts[0].inline_data.data
+    except (AttributeError, IndexError, TypeError):
+        data = None
+    if data and isinstance(data, (bytes, str)):
+        return _decode_inline_data(data)
+
+    for part in _iter_parts(response):
+        try:
+            data = part.inline_data.data
+        except AttributeError:
+            continue
+        if data and isinstance(data, (bytes, str)):
+            return _decode_inline_data(data)
     return None
 
 
@@ -112,17 +202,13 @@ def generate_image_from_prompt(prompt: str, size: Optional[str] = None, model_id
 
     try:
         # Route to OpenAI DALL-E if ChatGPT selected, otherwise use Gemini
-        if model_id and ("chatgpt" in model_id.lower() or "openai" in model_id.lower()):
+        if _is_openai(model_id):
             # OpenAI DALL-E API - use same approach as Gemini: parse size, use supported API size, resize locally
             client = _get_openai_client()
             
-            # Parse requested size to get target dimensions (like Gemini does)
-            width_str, height_str = resolved_size.split("x", 1) if "x" in resolved_size else ("512", "512")
-            try:
-                target_width = max(32, min(2048, int(width_str)))
-                target_height = max(32, min(2048, int(height_str)))
-            except ValueError:
-                target_width, target_height = 512, 512
+            # Parse requested size to get target dimensions (memoized, shared with Gemini)
+            _, target_dims = _parse_size_to_image_config(resolved_size)
+            target_width, target_height = target_dims or (512, 512)
             
             # Map to OpenAI supported sizes: "1024x1024", "1024x1536", "1536x1024", or "auto"
             # Use aspect ratio to determine best match, then resize locally
@@ -149,29 +235,27 @@ def generate_image_from_prompt(prompt: str, size: Optional[str] = None, model_id
             # Check if b64_json exists (base64), otherwise use url
             if hasattr(image_data, 'b64_json') and image_data.b64_json:
                 image_base64 = image_data.b64_json
-                image_bytes = base64.b64decode(image_base64)
+                image_bytes = _b64.b64decode(image_base64, validate=False)
             elif hasattr(image_data, 'url') and image_data.url:
                 # Fallback: download from URL if base64 not available
-                img_response = requests.get(image_data.url)
-                image_bytes = img_response.content
+                with _HTTP.get(image_data.url, stream=True, timeout=30) as img_response:
+                    img_response.raise_for_status()
+                    img_response.raw.decode_content = True
+                    buffer = BytesIO()
+                    shutil.copyfileobj(img_response.raw, buffer)
+                image_bytes = buffer.getvalue()
             else:
                 raise ValueError("No image data found in response")
             
             # Resize to requested dimensions (same as Gemini approach)
+            mime_type = "image/png"
             try:
-                pil_image = Image.open(BytesIO(image_bytes))
-                pil_image = pil_image.convert("RGBA")
-                # Always resize to target dimensions (like Gemini does)
-                if pil_image.size != (target_width, target_height):
-                    pil_image = pil_image.resize((target_width, target_height), Image.LANCZOS)
-                buffer = BytesIO()
-                pil_image.save(buffer, format="PNG")
-                image_bytes = buffer.getvalue()
+                image_bytes, mime_type = _resize_bytes(image_bytes, (target_width, target_height))
             except Exception:
                 # Fall back to original bytes if resizing fails
                 pass
             
-            return GeminiImageResult(True, "Image generated successfully (DALL-E).", image_bytes, resolved_size)
+            return GeminiImageResult(True, "Image generated successfully (DALL-E).", image_bytes, resolved_size, mime_type)
         else:
             # Gemini API (default)
             client = _get_gemini_client()
@@ -188,20 +272,15 @@ def generate_image_from_prompt(prompt: str, size: Optional[str] = None, model_id
             if not image_bytes:
                 return GeminiImageResult(False, "Gemini did not return image data.", None)
 
+            mime_type = "image/png"
             if resize_dims:
                 try:
-                    pil_image = Image.open(BytesIO(image_bytes))
-                    pil_image = pil_image.convert("RGBA")
-                    pil_image = pil_image.resize(resize_dims, Image.LANCZOS)
-                    buffer = BytesIO()
-                    # Default to PNG for consistency
-                    pil_image.save(buffer, format="PNG")
-                    image_bytes = buffer.getvalue()
+                    image_bytes, mime_type = _resize_bytes(image_bytes, resize_dims)
                 except Exception:
                     # Fall back to original bytes if resizing fails
                     pass
 
-            return GeminiImageResult(True, "Image generated successfully (Gemini).", image_bytes, resolved_size)
+            return GeminiImageResult(True, "Image generated successfully (Gemini).", image_bytes, resolved_size, mime_type)
     except Exception as exc:  # pragma: no cover - relies on external service
-        provider = "DALL-E" if (model_id and ("chatgpt" in model_id.lower() or "openai" in model_id.lower())) else "Gemini"
+        provider = "DALL-E" if _is_openai(model_id) else "Gemini"
         return GeminiImageResult(False, f"{provider} image generation failed: {exc}", None)
@@ -1,16 +1,43 @@
 """MCQ generation helpers supporting both Gemini and OpenAI (ChatGPT)."""
 from __future__ import annotations
 
+import functools
+import importlib.util
 import json
 import os
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Union
 
+import httpx
 from google import genai
-from openai import OpenAI
+from google.genai import types
+from openai import DefaultHttpxClient, OpenAI
+
+try:  # orjson ships with gradio; parse errors still subclass json.JSONDecodeError
+    import orjson
+    from orjson import loads as _json_loads
+
+    def _dumps_indented(value: Any) -> str:
+        return orjson.dumps(value, option=orjson.OPT_INDENT_2).decode()
+
+    def _dumps(value: Any) -> str:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+except ImportError:  # pragma: no cover - depends on the installed extras
+    _json_loads = json.loads
+
+    def _dumps_indented(value: Any) -> str:
+        return json.dumps(value, indent=2, ensure_ascii=False)
+
+    def _dumps(value: Any) -> str:
+        return json.dumps(value, ensure_ascii=False)
 
 
 _GEMINI_MODEL = os.getenv("GEMINI_MODEL", "models/gemini-2.0-flash")
+# Keep-alive connections per cached client, enough for the UI's concurrent
+# generations; HTTP/2 multiplexes them over one connection when h2 is installed
+_HTTP_POOL_SIZE = int(os.getenv("MCQ_HTTP_POOL_SIZE", "8"))
+_HTTP2 = importlib.util.find_spec("h2") is not None
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=_HTTP_POOL_SIZE, max_connections=2 * _HTTP_POOL_SIZE)
 
 
 @dataclass
@@ -24,14 +51,32 @@ def _get_gemini_client() -> genai.Client:
     api_key = os.getenv("GOOGLE_API_KEY")
     if not api_key:
         raise RuntimeError("GOOGLE_API_KEY is not set. Please update the .env file.")
-    return genai.Client(api_key=api_key)
+    return _gemini_client_for(api_key)
 
 
 def _get_openai_client() -> OpenAI:
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise RuntimeError("OPENAI_API_KEY is not set. Please update the .env file.")
-    return OpenAI(api_key=api_key)
+    return _openai_client_for(api_key)
+
+
+# Clients are cached per API key so connection pools and TLS sessions are reused
+@functools.lru_cache(maxsize=2)
+def _gemini_client_for(api_key: str) -> genai.Client:
+    http_client = httpx.Client(http2=_HTTP2, limits=_HTTP_LIMITS)
+    return genai.Client(api_key=api_key, http_options=types.HttpOptions(httpx_client=http_client))
+
+
+@functools.lru_cache(maxsize=2)
+def _openai_client_for(api_key: str) -> OpenAI:
+    return OpenAI(api_key=api_key, http_client=DefaultHttpxClient(http2=_HTTP2, limits=_HTTP_LIMITS))
+
+
+@functools.lru_cache(maxsize=32)
+def _is_openai(model_id: Optional[str]) -> bool:
+    """Route ChatGPT/OpenAI model ids to the OpenAI API; everything else goes to Gemini."""
+    return bool(model_id) and any(key in model_id.lower() for key in ("chatgpt", "openai"))
 
 
 def _extract_json_from_response(response: Any, provider: str) -> Dict[str, Any]:
@@ -42,15 +87,17 @@ def _extract_json_from_response(response: Any, provider: str) -> Dict[str, Any]:
     else:  # openai
         # OpenAI format: response.choices[0].message.content
         raw_text = response.choices[0].message.content or ""
-    
-    raw_text = raw_text.strip()
-    # Strip code fences if wrapped
-    if raw_text.startswith("```"):
-        raw_text = raw_text.strip("`")
-        # remove optional language hint
-        if raw_text.startswith("json"):
-            raw_text = raw_text[4:].strip()
-    return json.loads(raw_text)
+    return _parse_json_text(raw_text)
+
+
+def _parse_json_text(raw_text: str) -> Dict[str, Any]:
+    # Payloads are JSON objects: slicing to the outer braces drops code fences,
+    # language hints and any commentary around them
+    start = raw_text.find("{")
+    end = raw_text.rfind("}")
+    if start != -1 and end > start:
+        raw_text = raw_text[start:end + 1]
+    return _json_loads(raw_text)
 
 
 def _build_mcq_prompt(article_title: str, article_text: str) -> str:
@@ -104,7 +151,7 @@ def generate_mcq_with_triplets(article: Dict[str, Any], model_id: Optional[str]
         prompt = _build_mcq_prompt(article.get("title") or article.get("source_id", "Article"), article.get("content", ""))
         
         # Route to OpenAI if ChatGPT selected, otherwise use Gemini
-        if model_id and ("chatgpt" in model_id.lower() or "openai" in model_id.lower()):
+        if _is_openai(model_id):
             # OpenAI API with JSON mode
             client = _get_openai_client()
             response = client.chat.completions.create(
@@ -133,88 +180,95 @@ def generate_mcq_with_triplets(article: Dict[str, Any], model_id: Optional[str]
             payload = _extract_json_from_response(response, "gemini")
             return GeminiResult(True, "MCQ generated (Gemini)", payload)
     except Exception as exc:  # pragma: no cover - logging handled upstream
-        provider = "ChatGPT" if (model_id and ("chatgpt" in model_id.lower() or "openai" in model_id.lower())) else "Gemini"
+        provider = "ChatGPT" if _is_openai(model_id) else "Gemini"
         return GeminiResult(False, f"{provider} MCQ generation failed: {exc}", None)
 
 
-def _build_critique_prompt(mcq_json: Dict[str, Any], user_feedback: str) -> str:
-    """Build prompt for LoopAgent (Gemini) to critique MCQ."""
-    return f"""
-You are a medical MCQ critic. Review the MCQ and user feedback.
-
-Current MCQ:
-{json.dumps(mcq_json, indent=2, ensure_ascii=False)}
-
-User Feedback:
-{user_feedback}
-
-Provide specific, actionable critique:
-- What's good about the MCQ?
-- What needs improvement?
-- Are options medically plausible?
-- Is the question clear and unambiguous?
-- Does it align with the user's feedback?
-
-Return ONLY your critique as plain text (no JSON, no code blocks, no markdown formatting).
-""".strip()
-
-
-def _get_critique_from_loopagent(mcq_json: Dict[str, Any], user_feedback: str) -> str:
-    """Get critique from LoopAgent (Gemini) for MCQ refinement.
+def stream_mcq_with_triplets(
+    article: Dict[str, Any],
+    model_id: Optional[str] = None,
+) -> Iterator[Union[str, GeminiResult]]:
+    """Streaming variant of generate_mcq_with_triplets.
+    
+    Yields the raw response text in pieces as the model produces them, then
+    a final GeminiResult holding the parsed payload (or the error).
     
     Args:
-        mcq_json: Current MCQ JSON payload
-        user_feedback: User feedback text
+        article: Article data with title and content
+        model_id: Optional model identifier (see generate_mcq_with_triplets)
+    """
+    provider = "ChatGPT" if _is_openai(model_id) else "Gemini"
+    try:
+        prompt = _build_mcq_prompt(article.get("title") or article.get("source_id", "Article"), article.get("content", ""))
         
-    Returns:
-        Critique text from Gemini
+        if _is_openai(model_id):
+            stream = _get_openai_client().chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": "You are a medical MCQ author. Return only valid JSON, no commentary."},
+                    {"role": "user", "content": prompt}
+                ],
+                response_format={"type": "json_object"},
+                temperature=0.7,
+                stream=True,
+            )
+            pieces = (chunk.choices[0].delta.content for chunk in stream if chunk.choices)
+        else:
+            stream = _get_gemini_client().models.generate_content_stream(
+                model=_GEMINI_MODEL,
+                contents=[
+                    {
+                        "role": "user",
+                        "parts": [{"text": prompt}],
+                    }
+                ],
+            )
+            pieces = (chunk.text for chunk in stream)
         
-    Raises:
-        Exception: If Gemini API call fails
-    """
-    client = _get_gemini_client()
-    prompt = _build_critique_prompt(mcq_json, user_feedback)
-    
-    response = client.models.generate_content(
-        model=_GEMINI_MODEL,
-        contents=[{"role": "user", "parts": [{"text": prompt}]}],
-    )
-    
-    # Extract text from response
-    raw_text = response.text if hasattr(response, "text") else response.output_text
-    raw_text = raw_text.strip()
-    
-    # Clean up if wrapped in code fences or markdown
-    if raw_text.startswith("```"):
-        raw_text = raw_text.strip("`")
-        if raw_text.startswith("text") or raw_text.startswith("markdown"):
-            raw_text = raw_text.split("\n", 1)[-1].strip()
-    if raw_text.startswith("#"):
-        # Remove markdown headers if present
-        lines = raw_text.split("\n")
-        raw_text = "\n".join(line for line in lines if not line.strip().startswith("#"))
-    
-    return raw_text.strip()
+        received = []
+        for piece in pieces:
+            if piece:
+                received.append(piece)
+                yield piece
+        payload = _parse_json_text("".join(received))
+        yield GeminiResult(True, f"MCQ generated ({provider})", payload)
+    except Exception as exc:  # pragma: no cover - logging handled upstream
+        yield GeminiResult(False, f"{provider} MCQ generation failed: {exc}", None)
 
 
-def _build_refinement_prompt(critique: str, mcq_json: Dict[str, Any], article: Dict[str, Any]) -> str:
-    """Build prompt for Primary LLM to improve MCQ based on critique."""
-    return f"""
-The critic provided feedback. Improve the MCQ based on the critique.
+def _build_article_context(article: Dict[str, Any]) -> str:
+    """Render the article title and 6000-char snippet once for every review iteration."""
+    return f"""Title: {article.get("title", "Unknown")}
+Content:
+\"\"\"{(article.get("content") or "")[:6000]}\"\"\""""
 
-Critique:
-{critique}
+
+def _build_review_prompt(mcq_json: Dict[str, Any], user_feedback: str, article_context: str) -> str:
+    """Build a dual-role prompt: critique the MCQ, then revise it unless it is approved."""
+    return f"""
+You are a medical MCQ critic and author. Review the MCQ against the user feedback,
+then either approve it as-is or return an improved version.
 
 Current MCQ JSON:
-{json.dumps(mcq_json, indent=2, ensure_ascii=False)}
+{_dumps_indented(mcq_json)}
+
+User Feedback:
+{user_feedback}
 
 Article context:
-Title: {article.get("title", "Unknown")}
-Content:
-\"\"\"{article.get("content", "")[:6000]}\"\"\"
+{article_context}
+
+Critique checklist:
+- What's good about the MCQ?
+- What needs improvement?
+- Are options medically plausible?
+- Is the question clear and unambiguous?
+- Does it align with the user's feedback?
 
-Return updated JSON with the same schema:
+Return JSON with this schema:
 {{
+  "status": "APPROVED" or "REVISED",
+  "critique": "brief plain-text critique",
   "mcq": {{
     "stem": "...",
     "question": "...",
@@ -232,35 +286,36 @@ Return updated JSON with the same schema:
   "visual_prompt": "text describing the desired medical illustration"
 }}
 
+Use "APPROVED" only if the MCQ already satisfies the feedback and needs no changes.
 Return ONLY valid JSON, no commentary.
 """.strip()
 
 
-def _improve_mcq_with_critique(
-    article: Dict[str, Any],
+def _review_and_refine_mcq(
+    article_context: str,
     mcq_json: Dict[str, Any],
-    critique: str,
+    user_feedback: str,
     model_id: Optional[str] = None
 ) -> Dict[str, Any]:
-    """Improve MCQ using critique from LoopAgent.
+    """Critique and refine an MCQ in a single LLM call.
     
     Args:
-        article: Article data with title and content
+        article_context: Pre-rendered article title and snippet (see _build_article_context)
         mcq_json: Current MCQ JSON payload
-        critique: Critique text from LoopAgent
+        user_feedback: User feedback text
         model_id: Optional model identifier. If contains "chatgpt" or "openai", uses OpenAI API.
                   Otherwise uses Gemini (default).
         
     Returns:
-        Improved MCQ JSON payload
+        JSON payload with status, critique, and the (possibly revised) MCQ
         
     Raises:
         Exception: If LLM API call fails or JSON parsing fails
     """
-    prompt = _build_refinement_prompt(critique, mcq_json, article)
+    prompt = _build_review_prompt(mcq_json, user_feedback, article_context)
     
     # Route to OpenAI if ChatGPT selected, otherwise use Gemini
-    if model_id and ("chatgpt" in model_id.lower() or "openai" in model_id.lower()):
+    if _is_openai(model_id):
         # OpenAI API with JSON mode
         client = _get_openai_client()
         response = client.chat.completions.create(
@@ -285,6 +340,40 @@ def _improve_mcq_with_critique(
     return payload
 
 
+def _is_valid_mcq_payload(payload: Any) -> bool:
+    """Whether payload holds a usable MCQ: stem, question, 5 options and a correct index."""
+    if not isinstance(payload, dict):
+        return False
+    mcq = payload.get("mcq")
+    if not isinstance(mcq, dict):
+        return False
+    options = mcq.get("options")
+    correct = mcq.get("correct_option")
+    return (
+        bool(isinstance(mcq.get("stem"), str) and mcq["stem"].strip())
+        and bool(isinstance(mcq.get("question"), str) and mcq["question"].strip())
+        and isinstance(options, list)
+        and len(options) == 5
+        and all(isinstance(option, str) and option.strip() for option in options)
+        and isinstance(correct, int)
+        and not isinstance(correct, bool)
+        and 0 <= correct < 5
+    )
+
+
+def _strip_review_fields(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop review metadata so the payload matches the MCQ schema."""
+    return {key: value for key, value in payload.items() if key not in ("status", "critique")}
+
+
+def _refinement_status(revisions: int, note: Optional[str] = None) -> str:
+    """Status line for a refinement run that kept ``revisions`` revised drafts."""
+    if revisions == 0:
+        return f"MCQ unchanged ({note})" if note else "MCQ unchanged"
+    detail = f"{revisions} revision" if revisions == 1 else f"{revisions} revisions"
+    return f"MCQ updated ({detail}, {note})" if note else f"MCQ updated ({detail})"
+
+
 def regenerate_mcq_with_feedback(article: Dict[str, Any], previous_payload: Dict[str, Any], feedback: str, model_id: Optional[str] = None) -> GeminiResult:
     """Regenerate MCQ using reviewer feedback.
     
@@ -303,7 +392,7 @@ Feedback:
 {feedback}
 
 Previous response JSON:
-{json.dumps(previous_payload, ensure_ascii=False)}
+{_dumps(previous_payload)}
 
 Article title: {article.get("title")}
 Article snippet:
@@ -311,7 +400,7 @@ Article snippet:
 """
         
         # Route to OpenAI if ChatGPT selected, otherwise use Gemini
-        if model_id and ("chatgpt" in model_id.lower() or "openai" in model_id.lower()):
+        if _is_openai(model_id):
             # OpenAI API with JSON mode
             client = _get_openai_client()
             response = client.chat.completions.create(
@@ -335,7 +424,7 @@ Article snippet:
             payload = _extract_json_from_response(response, "gemini")
             return GeminiResult(True, "MCQ regenerated (Gemini)", payload)
     except Exception as exc:  # pragma: no cover
-        provider = "ChatGPT" if (model_id and ("chatgpt" in model_id.lower() or "openai" in model_id.lower())) else "Gemini"
+        provider = "ChatGPT" if _is_openai(model_id) else "Gemini"
         return GeminiResult(False, f"{provider} MCQ regeneration failed: {exc}", None)
 
 
@@ -346,57 +435,49 @@ def regenerate_mcq_with_loop_refinement(
     model_id: Optional[str] = None,
     max_iterations: int = 2
 ) -> GeminiResult:
-    """Regenerate MCQ with LoopAgent refinement (up to 2 iterations).
+    """Regenerate MCQ with critique-and-refine loop (up to 2 iterations).
     
-    Attempts LoopAgent (Gemini) critique + Primary LLM improvement loop.
-    Falls back to direct feedback method if LoopAgent fails early.
-    Returns last good MCQ on any failure.
+    Each iteration is a single dual-role LLM call that critiques the MCQ and
+    either approves it or returns a revision; the loop exits on approval.
+    Falls back to direct feedback method if the first call fails.
+    Returns last good MCQ on any later failure, or when a revision lacks a
+    complete MCQ (stem, question, 5 options, correct_option).
     
     Args:
         article: Article data with title and content
         previous_payload: Previous MCQ JSON payload
         feedback: Reviewer feedback text
-        model_id: Optional model identifier for Primary LLM (LoopAgent always uses Gemini).
-                  If contains "chatgpt" or "openai", uses OpenAI API. Otherwise uses Gemini (default).
+        model_id: Optional model identifier. If contains "chatgpt" or "openai", uses OpenAI API.
+                  Otherwise uses Gemini (default).
         max_iterations: Maximum number of refinement iterations (default: 2)
         
     Returns:
         GeminiResult with improved MCQ payload or fallback to direct feedback result
     """
     last_good_mcq = previous_payload  # Track last valid MCQ
+    article_context = _build_article_context(article)
     
-    # ITERATION 1
-    try:
-        # Step 1: Get critique from LoopAgent (Gemini)
-        critique = _get_critique_from_loopagent(previous_payload, feedback)
-    except Exception as exc:
-        # EARLY FAILURE: Fallback to old method (no critique)
-        return regenerate_mcq_with_feedback(article, previous_payload, feedback, model_id)
-    
-    try:
-        # Step 2: Primary LLM improves MCQ with critique
-        improved_mcq = _improve_mcq_with_critique(article, previous_payload, critique, model_id)
-        last_good_mcq = improved_mcq  # Update last good
-    except Exception:
-        # Return last good MCQ (original)
-        return GeminiResult(True, "MCQ update (fallback to original)", last_good_mcq)
-    
-    # ITERATION 2 (if max_iterations >= 2)
-    if max_iterations >= 2:
+    for iteration in range(1, max_iterations + 1):
         try:
-            # Step 3: Get second critique
-            critique2 = _get_critique_from_loopagent(last_good_mcq, feedback)
+            reviewed = _review_and_refine_mcq(article_context, last_good_mcq, feedback, model_id)
         except Exception:
-            # Return last good MCQ (from iteration 1)
-            return GeminiResult(True, "MCQ updated (1 iteration)", last_good_mcq)
+            if iteration == 1:
+                # EARLY FAILURE: Fallback to old method (no critique)
+                return regenerate_mcq_with_feedback(article, previous_payload, feedback, model_id)
+            return GeminiResult(True, _refinement_status(iteration - 1, "fallback"), last_good_mcq)
         
-        try:
-            # Step 4: Primary LLM improves again
-            final_mcq = _improve_mcq_with_critique(article, last_good_mcq, critique2, model_id)
-            return GeminiResult(True, "MCQ updated (2 iterations)", final_mcq)
-        except Exception:
-            # Return last good MCQ (from iteration 1)
-            return GeminiResult(True, "MCQ updated (1 iteration, fallback)", last_good_mcq)
+        if str(reviewed.get("status", "")).upper() == "APPROVED":
+            note = "approved on first review" if iteration == 1 else "approved"
+            return GeminiResult(True, _refinement_status(iteration - 1, note), last_good_mcq)
+        
+        revised = _strip_review_fields(reviewed)
+        if not _is_valid_mcq_payload(revised):
+            # A malformed revision never replaces a valid draft
+            return GeminiResult(
+                True,
+                _refinement_status(iteration - 1, "malformed revision discarded"),
+                last_good_mcq,
+            )
+        last_good_mcq = revised
     
-    return GeminiResult(True, "MCQ updated (1 iteration)", last_good_mcq)
-
+    return GeminiResult(True, _refinement_status(max_iterations), last_good_mcq)
@@ -1,26 +1,26 @@
 """PDF ingestion and text extraction service."""
-from typing import Dict
+from typing import Dict, List
 from sqlalchemy.orm import Session
 from app.db.models import Source
 import hashlib
 from app.services.pdf_section_parser import chunk_pdf_by_sections
 
 
-def register_pdf_source(filename: str, pdf_bytes: bytes, db: Session) -> Dict:
+def register_pdf_source(filename: str, db: Session) -> Dict:
     """
     Register PDF by creating parent source + chunk sources.
     Each chunk becomes a separate Source (like PubMed abstracts).
     
     Args:
-        filename: Original PDF filename
-        pdf_bytes: PDF file content as bytes
+        filename: Path of the PDF file; pages are read from it as they are parsed
         db: Database session
     
     Returns:
         Dict with parent source information and chunk count
     """
-    # Generate parent source_id from filename hash
-    parent_source_id = f"pdf_{hashlib.md5(filename.encode()).hexdigest()[:8]}"
+    # Generate parent source_id from filename hash (an ID, not a security digest;
+    # the algorithm stays fixed so existing PDFs keep their source_id)
+    parent_source_id = f"pdf_{hashlib.md5(filename.encode(), usedforsecurity=False).hexdigest()[:8]}"
     
     # Check if parent already exists
     existing_parent = db.query(Source).filter(
@@ -42,7 +42,7 @@ def register_pdf_source(filename: str, pdf_bytes: bytes, db: Session) -> Dict:
         }
     
     # Chunk PDF into sections
-    chunks = chunk_pdf_by_sections(pdf_bytes, filename)
+    chunks = chunk_pdf_by_sections(filename, filename)
     
     # Create parent source (for reference, doesn't store content)
     parent_source = Source(
@@ -54,21 +54,18 @@ def register_pdf_source(filename: str, pdf_bytes: bytes, db: Session) -> Dict:
         section_title=None
     )
     db.add(parent_source)
-    db.commit()
-    db.refresh(parent_source)
+    # Flush assigns parent_source.id; parent and chunks are committed together below
+    db.flush()
     
     # Create chunk sources (each like a PubMed abstract)
-    chunk_sources = []
-    for chunk in chunks:
-        chunk_source_id = f"{parent_source_id}_chunk_{chunk['order']}"
-        
-        # Check if chunk already exists
-        existing_chunk = db.query(Source).filter(Source.source_id == chunk_source_id).first()
-        if existing_chunk:
-            chunk_sources.append(existing_chunk)
-            continue
-        
-        chunk_source = Source(
+    # Prefetch existing chunks in one IN (...) query instead of one SELECT per chunk
+    chunk_ids = [f"{parent_source_id}_chunk_{chunk['order']}" for chunk in chunks]
+    existing_ids = {
+        source_id for (source_id,) in
+        db.query(Source.source_id).filter(Source.source_id.in_(chunk_ids)).all()
+    }
+    new_chunks = [
+        Source(
             source_id=chunk_source_id,
             source_type="pdf_chunk",
             title=f"{filename} - {chunk['section_title']}",
@@ -76,9 +73,10 @@ def register_pdf_source(filename: str, pdf_bytes: bytes, db: Session) -> Dict:
             parent_source_id=parent_source.id,
             section_title=chunk['section_title'],
         )
-        db.add(chunk_source)
-        chunk_sources.append(chunk_source)
-    
+        for chunk_source_id, chunk in zip(chunk_ids, chunks)
+        if chunk_source_id not in existing_ids
+    ]
+    db.bulk_save_objects(new_chunks)
     db.commit()
     
     return {
@@ -86,7 +84,7 @@ def register_pdf_source(filename: str, pdf_bytes: bytes, db: Session) -> Dict:
         "title": filename,
         "type": "pdf",
         "id": parent_source.id,
-        "chunks_created": len(chunk_sources)
+        "chunks_created": len(chunk_ids)
     }
 
 
@@ -101,37 +99,59 @@ def register_pubmed_source(article_data: Dict, db: Session) -> Dict:
     Returns:
         Dict with source information
     """
-    source_id = f"PMID:{article_data['pubmed_id']}"
+    return register_pubmed_sources([article_data], db)[0]
+
+
+def register_pubmed_sources(articles: List[Dict], db: Session, commit: bool = True) -> List[Dict]:
+    """
+    Register several PubMed articles as sources with one lookup and one commit.
     
-    # Check if source already exists
-    existing = db.query(Source).filter(Source.source_id == source_id).first()
-    if existing:
-        return {
-            "source_id": existing.source_id,
-            "title": existing.title,
-            "content": existing.content,
-            "type": "pubmed",
-            "id": existing.id
-        }
+    Args:
+        articles: Dicts with pubmed_id, title, authors, year, abstract
+        db: Database session
+        commit: Commit new sources; if False they are only flushed (ids are
+            assigned) and the caller owns the transaction
     
-    # Create source record
-    source = Source(
-        source_id=source_id,
-        source_type="pubmed",
-        title=article_data.get("title", ""),
-        authors=article_data.get("authors"),
-        publication_year=int(article_data["year"]) if article_data.get("year", "Unknown").isdigit() else None,
-        content=article_data.get("abstract", "")
-    )
-    db.add(source)
-    db.commit()
-    db.refresh(source)
+    Returns:
+        Dicts with source information, in the order of articles
+    """
+    source_ids = [f"PMID:{article_data['pubmed_id']}" for article_data in articles]
     
-    return {
-        "source_id": source_id,
-        "title": source.title,
-        "content": source.content,
-        "type": "pubmed",
-        "id": source.id
+    # Check which sources already exist
+    sources = {
+        source.source_id: source
+        for source in db.query(Source).filter(Source.source_id.in_(set(source_ids)))
     }
+    
+    # Create source records for the rest
+    created = False
+    for source_id, article_data in zip(source_ids, articles):
+        if source_id in sources:
+            continue
+        sources[source_id] = Source(
+            source_id=source_id,
+            source_type="pubmed",
+            title=article_data.get("title", ""),
+            authors=article_data.get("authors"),
+            publication_year=int(article_data["year"]) if article_data.get("year", "Unknown").isdigit() else None,
+            content=article_data.get("abstract", "")
+        )
+        db.add(sources[source_id])
+        created = True
+    if created:
+        if commit:
+            db.commit()
+        else:
+            db.flush()
+    
+    return [
+        {
+            "source_id": source_id,
+            "title": sources[source_id].title,
+            "content": sources[source_id].content,
+            "type": "pubmed",
+            "id": sources[source_id].id
+        }
+        for source_id in source_ids
+    ]
 
@@ -1,8 +1,69 @@
 """Knowledge Base service for triplet storage and retrieval."""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import and_, case, event, func, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import OperationalError, ProgrammingError
 from sqlalchemy.orm import Session
 from app.db.models import Triplet, Source
-from typing import List, Dict, Optional
-import json
+from typing import Any, Callable, List, Dict, Optional
+
+# Columns identifying a triplet; matches the ux_triplet_identity unique index
+_TRIPLET_KEY = ("source_id", "subject", "action", "object")
+_UPSERT_INSERTS = {"postgresql": pg_insert, "sqlite": sqlite_insert}
+# Length of a JSON array column, per dialect with a bulk upsert
+_JSON_ARRAY_LENGTH = {"postgresql": func.jsonb_array_length, "sqlite": func.json_array_length}
+
+_KB_CACHE_TTL = float(os.getenv("KB_CACHE_TTL", "60"))
+_KB_CACHE_MAX_ENTRIES = 1024
+# LRU of query key -> (expires_at, result); cleared when a transaction holding a
+# triplet write made here commits, while writes made elsewhere become visible
+# within _KB_CACHE_TTL seconds
+_kb_cache: "OrderedDict[tuple, tuple[float, Any]]" = OrderedDict()
+_kb_cache_lock = threading.Lock()
+
+
+def cached_kb_result(key: tuple, loader: Callable[[], Any]) -> Any:
+    """
+    Return loader()'s result for key, reusing it for KB_CACHE_TTL seconds.
+    
+    Cache plain data (dicts, ids), not ORM instances: those are bound to the
+    session that loaded them.
+    """
+    now = time.monotonic()
+    with _kb_cache_lock:
+        entry = _kb_cache.get(key)
+        if entry is not None and entry[0] > now:
+            _kb_cache.move_to_end(key)
+            return entry[1]
+    value = loader()
+    with _kb_cache_lock:
+        _kb_cache[key] = (now + _KB_CACHE_TTL, value)
+        _kb_cache.move_to_end(key)
+        if len(_kb_cache) > _KB_CACHE_MAX_ENTRIES:
+            _kb_cache.popitem(last=False)
+    return value
+
+
+def invalidate_kb_cache() -> None:
+    """Drop all cached KB query results."""
+    with _kb_cache_lock:
+        _kb_cache.clear()
+
+
+def _invalidate_kb_cache_on_commit(db: Session) -> None:
+    # Clearing before the commit would let a concurrent reader cache the old rows
+    db.info["kb_cache_stale"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _clear_stale_kb_cache(session: Session) -> None:
+    if session.info.pop("kb_cache_stale", False):
+        invalidate_kb_cache()
 
 
 def upsert_triplet(
@@ -15,6 +76,7 @@ def upsert_triplet(
     context_sentences: List[str],  # CRITICAL
     schema_valid: bool = False,
     status: str = "pending",
+    commit: bool = False,
 ) -> Triplet:
     """
     Store or update triplet in KB.
@@ -29,6 +91,8 @@ def upsert_triplet(
         context_sentences: List of 2-4 verbatim context sentences (CRITICAL)
         schema_valid: Whether triplet passes schema validation
         status: Workflow status (pending, accepted, rejected)
+        commit: Commit immediately. By default the row is only flushed (id
+            assigned) and the caller commits its unit of work once
     
     Returns:
         Triplet model instance
@@ -44,12 +108,16 @@ def upsert_triplet(
     if existing:
         # Update context sentences if provided
         if context_sentences:
-            existing.context_sentences = json.dumps(context_sentences)
+            existing.context_sentences = list(context_sentences)
         existing.schema_valid = schema_valid
         if status:
             existing.status = status
+        _invalidate_kb_cache_on_commit(db)
+        if not commit:
+            db.flush()
+            return existing
         db.commit()
-        db.refresh(existing)
+        # No refresh: the values just written are already on the instance
         return existing
     
     # Create new triplet
@@ -59,16 +127,88 @@ def upsert_triplet(
         object=object,
         relation=relation,
         source_id=source_id,
-        context_sentences=json.dumps(context_sentences),
+        context_sentences=list(context_sentences or []),
         schema_valid=schema_valid,
         status=status or "pending",
     )
     db.add(triplet)
+    _invalidate_kb_cache_on_commit(db)
+    if not commit:
+        db.flush()
+        return triplet
     db.commit()
     db.refresh(triplet)
     return triplet
 
 
+def upsert_triplets_bulk(db: Session, rows: List[Dict[str, Any]], commit: bool = True) -> List[Triplet]:
+    """
+    Store or update many triplets with a single INSERT ... ON CONFLICT DO UPDATE.
+    
+    Args:
+        db: Database session
+        rows: Dicts with the upsert_triplet fields (subject, action, object,
+            relation, source_id, context_sentences, schema_valid, status)
+        commit: Commit immediately. Pass False to keep the upsert in the
+            caller's transaction (the caller commits)
+    
+    Returns:
+        Triplet instances in the order of rows (duplicate keys share an instance)
+    """
+    if not rows:
+        return []
+    
+    # One row per key (last wins); Postgres rejects a statement touching a row twice
+    values: Dict[tuple, Dict[str, Any]] = {}
+    for row in rows:
+        values[tuple(row[column] for column in _TRIPLET_KEY)] = {
+            "subject": row["subject"],
+            "action": row["action"],
+            "object": row["object"],
+            "relation": row["relation"],
+            "source_id": row["source_id"],
+            "context_sentences": list(row.get("context_sentences") or []),
+            "schema_valid": bool(row.get("schema_valid", False)),
+            "status": row.get("status") or "pending",
+        }
+    
+    stored = None
+    dialect = db.get_bind().dialect.name
+    insert = _UPSERT_INSERTS.get(dialect)
+    if insert is not None:
+        stmt = insert(Triplet).values(list(values.values()))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(_TRIPLET_KEY),
+            set_={
+                # An empty list keeps the stored sentences, as in upsert_triplet
+                "context_sentences": case(
+                    (
+                        _JSON_ARRAY_LENGTH[dialect](stmt.excluded.context_sentences) > 0,
+                        stmt.excluded.context_sentences,
+                    ),
+                    else_=Triplet.context_sentences,
+                ),
+                "schema_valid": stmt.excluded.schema_valid,
+                "status": stmt.excluded.status,
+            },
+        ).returning(Triplet)
+        try:
+            # Savepoint: a failure undoes only this statement, not the caller's work
+            with db.begin_nested():
+                triplets = db.scalars(stmt, execution_options={"populate_existing": True}).all()
+            stored = {tuple(getattr(t, column) for column in _TRIPLET_KEY): t for t in triplets}
+        except (OperationalError, ProgrammingError):
+            # Legacy database without the ux_triplet_identity index to conflict on
+            pass
+    if stored is None:
+        stored = {key: upsert_triplet(db, **value) for key, value in values.items()}
+    _invalidate_kb_cache_on_commit(db)
+    if commit:
+        db.commit()
+    
+    return [stored[tuple(row[column] for column in _TRIPLET_KEY)] for row in rows]
+
+
 def get_approved_triplets(db: Session, source_id: Optional[int] = None) -> List[Triplet]:
     """
     Get all approved triplets, optionally filtered by source.
@@ -86,6 +226,33 @@ def get_approved_triplets(db: Session, source_id: Optional[int] = None) -> List[
     return query.all()
 
 
+def get_approved_triplet_rows(db: Session, source_id: Optional[int] = None) -> List[Any]:
+    """
+    Get id, subject, action, object, relation and source_id of approved triplets.
+    
+    Lighter than get_approved_triplets for listings: plain rows, without
+    hydrating Triplet instances or decoding their context sentences.
+    
+    Args:
+        db: Database session
+        source_id: Optional source ID to filter by
+    
+    Returns:
+        List of Row tuples (attribute access by column name)
+    """
+    query = db.query(
+        Triplet.id,
+        Triplet.subject,
+        Triplet.action,
+        Triplet.object,
+        Triplet.relation,
+        Triplet.source_id,
+    ).filter(Triplet.status == "accepted")
+    if source_id:
+        query = query.filter(Triplet.source_id == source_id)
+    return query.all()
+
+
 def query_triplets_for_distractors(
     db: Session,
     subject: Optional[str] = None,
@@ -117,3 +284,59 @@ def query_triplets_for_distractors(
     
     return query.limit(10).all()
 
+
+def query_distractor_candidates(
+    db: Session,
+    subject: Optional[str] = None,
+    action: Optional[str] = None,
+    object: Optional[str] = None,
+    limit: int = 10,
+) -> Dict[str, List[Triplet]]:
+    """
+    Run KB Query 1 and KB Query 2 for distractor generation in one round trip.
+    
+    Args:
+        db: Database session
+        subject: Subject of the correct triplet (KB Query 1: same subject)
+        action: Action of the correct triplet (KB Query 2: same action/object)
+        object: Object of the correct triplet (KB Query 2: same action/object)
+        limit: Maximum rows returned per group
+    
+    Returns:
+        Dict with 'same_subject' and 'same_action_object' Triplet lists, each
+        ordered by id; the correct triplet itself is excluded from both
+    """
+    groups: Dict[str, List[Triplet]] = {"same_subject": [], "same_action_object": []}
+    cases = []
+    if subject:
+        cases.append((Triplet.subject == subject, "same_subject"))
+    if action and object:
+        cases.append((and_(Triplet.action == action, Triplet.object == object), "same_action_object"))
+    if not cases:
+        return groups
+    
+    filters = [Triplet.status == "accepted", or_(*(condition for condition, _ in cases))]
+    if len(cases) == 2:
+        # The correct answer matches both queries; it is not a distractor
+        filters.append(~and_(*(condition for condition, _ in cases)))
+    # Number the rows of each group so one large group can't crowd out the other
+    group = case(*cases).label("grp")
+    ranked = (
+        select(
+            Triplet.id,
+            group,
+            func.row_number().over(partition_by=group, order_by=Triplet.id).label("rn"),
+        )
+        .where(*filters)
+        .subquery()
+    )
+    rows = db.execute(
+        select(Triplet, ranked.c.grp)
+        .join(ranked, Triplet.id == ranked.c.id)
+        .where(ranked.c.rn <= limit)
+        .order_by(ranked.c.grp, Triplet.id)
+    ).all()
+    
+    for triplet, name in rows:
+        groups[name].append(triplet)
+    return groups
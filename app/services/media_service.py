@@ -5,6 +5,8 @@ from typing import Optional
 
 MEDIA_DIR = Path("media")
 MEDIA_DIR.mkdir(exist_ok=True)
+# Extensions image generation may produce, probed in order when none is given
+IMAGE_EXTENSIONS = ("png", "webp", "jpg")
 
 
 def save_image(mcq_id: int, image_bytes: bytes, extension: str = "png") -> str:
@@ -16,14 +18,16 @@ def save_image(mcq_id: int, image_bytes: bytes, extension: str = "png") -> str:
     return str(filepath)
 
 
-def get_image_path(mcq_id: int, extension: str = "png") -> Optional[Path]:
-    """Get image path if it exists."""
-    filename = f"mcq_{mcq_id}.{extension}"
-    filepath = MEDIA_DIR / filename
-    return filepath if filepath.exists() else None
+def get_image_path(mcq_id: int, extension: Optional[str] = None) -> Optional[Path]:
+    """Get image path if it exists; without an extension, any known image extension matches."""
+    for ext in (extension,) if extension else IMAGE_EXTENSIONS:
+        filepath = MEDIA_DIR / f"mcq_{mcq_id}.{ext}"
+        if filepath.exists():
+            return filepath
+    return None
 
 
-def load_image_bytes(mcq_id: int, extension: str = "png") -> Optional[bytes]:
+def load_image_bytes(mcq_id: int, extension: Optional[str] = None) -> Optional[bytes]:
     """Load image bytes if file exists."""
     filepath = get_image_path(mcq_id, extension)
     if not filepath:
@@ -32,7 +36,7 @@ def load_image_bytes(mcq_id: int, extension: str = "png") -> Optional[bytes]:
         return f.read()
 
 
-def delete_image(mcq_id: int, extension: str = "png") -> bool:
+def delete_image(mcq_id: int, extension: Optional[str] = None) -> bool:
     """Delete image file if it exists."""
     filepath = get_image_path(mcq_id, extension)
     if filepath:
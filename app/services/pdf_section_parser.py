@@ -1,10 +1,26 @@
 """PDF section detection and chunking for medical papers.
 Section configuration is easily modifiable for future changes."""
+import hashlib
+import multiprocessing
+import os
 import re
-from typing import List, Dict, Tuple
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 from pypdf import PdfReader
 from io import BytesIO
 
+try:  # PyMuPDF extracts text in native code; pypdf (pure Python) is the fallback
+    import fitz
+    # Text-only extraction (no image blocks, vector collection, or off-page text)
+    # with hyphenated line breaks rejoined
+    _FITZ_TEXT_FLAGS = fitz.TEXTFLAGS_TEXT | fitz.TEXT_DEHYPHENATE
+except ImportError:  # pragma: no cover - optional dependency
+    fitz = None
+
 
 # ============================================================================
 # SECTION CONFIGURATION - Easy to modify for future changes
@@ -27,6 +43,10 @@ FILTER_SECTIONS = [
     "References",    # Only citations, no MCQ value
 ]
 
+# Set views for O(1) membership checks while parsing
+_KEEP = frozenset(KEEP_SECTIONS)
+_FILTER = frozenset(FILTER_SECTIONS)
+
 # Section detection patterns
 # Format: (regex_pattern, canonical_section_name)
 # Add new patterns here to detect additional sections
@@ -43,6 +63,55 @@ SECTION_PATTERNS: List[Tuple[str, str]] = [
     # (r'^\s*(APPENDIX)\s*$', "Appendix"),
 ]
 
+# First word (uppercase) of every header SECTION_PATTERNS can match.
+# Lines starting with anything else skip the regex entirely, so add the
+# first word here whenever a new pattern is added above.
+HEADER_FIRST_WORDS = frozenset({
+    "ABSTRACT", "SUMMARY",
+    "INTRODUCTION", "BACKGROUND",
+    "METHOD", "METHODS", "METHODOLOGY", "MATERIALS",
+    "RESULT", "RESULTS", "FINDINGS",
+    "DISCUSSION",
+    "CONCLUSION", "CONCLUSIONS",
+    "REFERENCE", "REFERENCES", "BIBLIOGRAPHY",
+})
+
+# All patterns fused into one alternation, compiled once at import; edit
+# SECTION_PATTERNS above, not this. Group _s<i> maps back to SECTION_PATTERNS[i].
+_SECTION_HEADER_RE = re.compile(
+    "|".join(f"(?P<_s{i}>{pattern})" for i, (pattern, _) in enumerate(SECTION_PATTERNS)),
+    re.IGNORECASE,
+)
+_SECTION_BY_GROUP: Dict[str, str] = {
+    f"_s{i}": section_name for i, (_, section_name) in enumerate(SECTION_PATTERNS)
+}
+
+# Once this header is reached after a kept section, the remaining pages are
+# not read (references come last and are discarded anyway). None reads all pages.
+STOP_AT_SECTION = "References"
+
+# PDFs with at least this many pages are extracted by a pool of worker
+# processes, PAGES_PER_TASK pages per task (text extraction holds the GIL)
+PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "64"))
+PAGES_PER_TASK = 16
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(os.cpu_count() or 1)))
+
+# One pool for the process lifetime, started on first use. Its workers come
+# from a forkserver (spawn where unavailable), never a fork of the threaded
+# server, whose copied locks could deadlock them.
+_page_pool: Optional[ProcessPoolExecutor] = None
+_page_pool_lock = threading.Lock()
+
+# A PDF is given either as a file path (read page by page, never loaded whole)
+# or as its content in memory
+PdfInput = Union[str, os.PathLike, bytes]
+
+# Parsed chunks of recently seen PDFs keyed by content digest, so re-uploading
+# the same file (under a new temp path) skips extraction
+CHUNK_CACHE_SIZE = int(os.getenv("PDF_CHUNK_CACHE_SIZE", "8"))
+_chunk_cache: "OrderedDict[str, List[Dict[str, any]]]" = OrderedDict()
+_chunk_cache_lock = threading.Lock()
+
 # Paragraph grouping for unknown sections
 # Number of paragraphs to group together (like PubMed abstract length)
 PARAGRAPHS_PER_CHUNK = 2
@@ -52,26 +121,116 @@ PARAGRAPHS_PER_CHUNK = 2
 # PDF TEXT EXTRACTION
 # ============================================================================
 
-def extract_pdf_text(pdf_bytes: bytes) -> str:
+def _open_pdf(pdf: PdfInput):
+    """Open a PDF path or bytes with PyMuPDF when available, else pypdf (both are context managers)."""
+    if isinstance(pdf, bytes):
+        if fitz is not None:
+            return fitz.open(stream=pdf, filetype="pdf")
+        return PdfReader(BytesIO(pdf))
+    if fitz is not None:
+        return fitz.open(pdf, filetype="pdf")
+    return PdfReader(pdf)
+
+
+def _page_count(doc) -> int:
+    return doc.page_count if fitz is not None else len(doc.pages)
+
+
+def _page_text(doc, index: int) -> str:
+    if fitz is not None:
+        return doc[index].get_text("text", flags=_FITZ_TEXT_FLAGS)
+    return doc.pages[index].extract_text()
+
+
+def _get_page_pool() -> ProcessPoolExecutor:
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is None:
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _page_pool = ProcessPoolExecutor(
+                max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context(method)
+            )
+        return _page_pool
+
+
+def _reset_page_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool so the next large PDF starts a fresh one."""
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is pool:
+            _page_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _extract_page_range(path: str, start: int, stop: int) -> List[str]:
+    # Runs in a pool worker; every task opens its own document
+    with _open_pdf(path) as doc:
+        return [_page_text(doc, index) for index in range(start, stop)]
+
+
+def _iter_page_texts_parallel(path: str, page_count: int) -> Iterator[str]:
+    starts = range(0, page_count, PAGES_PER_TASK)
+    stops = [min(start + PAGES_PER_TASK, page_count) for start in starts]
+    pool = _get_page_pool()
+    futures = [pool.submit(_extract_page_range, path, start, stop) for start, stop in zip(starts, stops)]
+    try:
+        for future in futures:
+            yield from future.result()
+    except BrokenProcessPool:
+        _reset_page_pool(pool)
+        raise
+    finally:
+        # Caller stopped early (or failed): drop the ranges not yet started
+        for future in futures:
+            future.cancel()
+
+
+def iter_pdf_page_texts(pdf: PdfInput) -> Iterator[str]:
     """
-    Extract text from PDF bytes.
+    Yield the extracted text of each PDF page in order.
+    Large PDFs are extracted by the shared worker-process pool; pages are
+    still yielded in order, and ranges not yet started are cancelled if the
+    caller stops iterating early.
     
     Args:
-        pdf_bytes: PDF file content as bytes
+        pdf: PDF file path, or its content as bytes
     
-    Returns:
-        Extracted text string
+    Yields:
+        Text of one page
     """
     try:
-        reader = PdfReader(BytesIO(pdf_bytes))
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-        return text.strip()
+        with _open_pdf(pdf) as doc:
+            page_count = _page_count(doc)
+            if page_count < PARALLEL_MIN_PAGES or PDF_WORKERS < 2:
+                for index in range(page_count):
+                    yield _page_text(doc, index)
+                return
+        
+        if not isinstance(pdf, bytes):
+            yield from _iter_page_texts_parallel(os.fspath(pdf), page_count)
+            return
+        # Workers get a path rather than a copy of the content per task
+        with tempfile.NamedTemporaryFile(suffix=".pdf") as spill:
+            spill.write(pdf)
+            spill.flush()
+            yield from _iter_page_texts_parallel(spill.name, page_count)
     except Exception as e:
         raise ValueError(f"Failed to extract PDF text: {e}")
 
 
+def extract_pdf_text(pdf: PdfInput) -> str:
+    """
+    Extract text from a PDF.
+    
+    Args:
+        pdf: PDF file path, or its content as bytes
+    
+    Returns:
+        Extracted text string
+    """
+    return "\n".join(iter_pdf_page_texts(pdf)).strip()
+
+
 # ============================================================================
 # SECTION PARSING FUNCTIONS
 # ============================================================================
@@ -86,41 +245,78 @@ def detect_section_header(line: str) -> tuple[bool, str | None]:
     Returns:
         (is_header, section_name) tuple
     """
-    for pattern, section_name in SECTION_PATTERNS:
-        if re.match(pattern, line, re.IGNORECASE):
-            return True, section_name
+    stripped = line.strip()
+    if not stripped or stripped.split(None, 1)[0].upper() not in HEADER_FIRST_WORDS:
+        return False, None
+    match = _SECTION_HEADER_RE.match(line)
+    if match:
+        return True, _SECTION_BY_GROUP[match.lastgroup]
     return False, None
 
 
-def chunk_pdf_by_sections(pdf_bytes: bytes, pdf_filename: str) -> List[Dict[str, any]]:
+def _iter_lines(page_texts: Iterator[str], seen_pages: List[str]) -> Iterator[str]:
+    """Yield lines across pages, recording each page read into seen_pages."""
+    for page_text in page_texts:
+        seen_pages.append(page_text)
+        yield from page_text.split('\n')
+
+
+def _pdf_digest(pdf: PdfInput) -> str:
+    if isinstance(pdf, bytes):
+        return hashlib.sha256(pdf).hexdigest()
+    digest = hashlib.sha256()
+    with open(pdf, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_pdf_by_sections(pdf: PdfInput, pdf_filename: str) -> List[Dict[str, any]]:
     """
     Split PDF into sections, filter out unwanted sections.
     For unknown sections, split by paragraphs (2 paragraphs = 1 chunk).
     
     Args:
-        pdf_bytes: PDF file content as bytes
+        pdf: PDF file path, or its content as bytes
         pdf_filename: Original PDF filename (for logging)
         
     Returns:
         List of chunks ready to be stored as Source records.
         Each chunk has: section_title, content, order, is_known_section
     """
-    # Extract text from PDF
-    full_text = extract_pdf_text(pdf_bytes)
-    lines = full_text.split('\n')
-    
+    digest = _pdf_digest(pdf)
+    with _chunk_cache_lock:
+        cached = _chunk_cache.get(digest)
+        if cached is not None:
+            _chunk_cache.move_to_end(digest)
+    if cached is None:
+        cached = _parse_pdf_sections(pdf)
+        with _chunk_cache_lock:
+            _chunk_cache[digest] = cached
+            if len(_chunk_cache) > CHUNK_CACHE_SIZE:
+                _chunk_cache.popitem(last=False)
+    # Fresh dicts so callers can't alter the cached chunks
+    return [dict(chunk) for chunk in cached]
+
+
+def _parse_pdf_sections(pdf: PdfInput) -> List[Dict[str, any]]:
+    # Extract text page by page so parsing can stop before trailing sections
+    page_texts = []
     chunks = []
     current_section = None
     current_content = []
     section_order = 0
-    unknown_content = []  # Text before first section or between unknown sections
+    kept_sections = set()  # KEEP sections already stored as chunks
+    # Text before the first section header, split into paragraphs as it is read
+    unknown_paragraphs = []
+    current_paragraph = []
     
-    for line in lines:
+    for line in _iter_lines(iter_pdf_page_texts(pdf), page_texts):
         is_header, detected_section = detect_section_header(line)
         
         if is_header:
             # Save previous section if it should be kept
-            if current_section and current_section in KEEP_SECTIONS and current_content:
+            if current_section and current_section in _KEEP and current_content:
                 section_text = '\n'.join(current_content).strip()
                 if section_text:
                     chunks.append({
@@ -130,25 +326,39 @@ def chunk_pdf_by_sections(pdf_bytes: bytes, pdf_filename: str) -> List[Dict[str,
                         "is_known_section": True
                     })
                     section_order += 1
+                    kept_sections.add(current_section)
             
             # If previous section was filtered, discard its content
-            if current_section and current_section in FILTER_SECTIONS:
+            if current_section and current_section in _FILTER:
                 # Discard content (Introduction, References, etc.)
                 pass
             
             # Start new section
             current_section = detected_section
             current_content = []
+            
+            # Kept sections are already stored; skip reading the remaining pages
+            if current_section == STOP_AT_SECTION and chunks:
+                break
+            # Every KEEP section is stored and the new one would be discarded
+            if current_section not in _KEEP and kept_sections >= _KEEP:
+                break
         else:
             if current_section:
                 # Add to current section
                 current_content.append(line)
-            else:
+            elif line:
                 # Text before any section header detected - treat as unknown
-                unknown_content.append(line)
+                current_paragraph.append(line)
+            elif current_paragraph:
+                # Empty line ends a paragraph
+                unknown_paragraphs.append('\n'.join(current_paragraph))
+                current_paragraph = []
+    if current_paragraph:
+        unknown_paragraphs.append('\n'.join(current_paragraph))
     
     # Save final section if it should be kept
-    if current_section and current_section in KEEP_SECTIONS and current_content:
+    if current_section and current_section in _KEEP and current_content:
         section_text = '\n'.join(current_content).strip()
         if section_text:
             chunks.append({
@@ -159,33 +369,24 @@ def chunk_pdf_by_sections(pdf_bytes: bytes, pdf_filename: str) -> List[Dict[str,
             })
             section_order += 1
     
-    # Handle unknown sections (text before first header or between unknown sections)
-    # Split by paragraphs, group N paragraphs per chunk
-    if unknown_content:
-        unknown_text = '\n'.join(unknown_content).strip()
-        if unknown_text:
-            # Split by paragraphs (double newline)
-            paragraphs = [p.strip() for p in unknown_text.split('\n\n') if p.strip()]
-            
-            # Group paragraphs per chunk
-            for i in range(0, len(paragraphs), PARAGRAPHS_PER_CHUNK):
-                chunk_paragraphs = paragraphs[i:i+PARAGRAPHS_PER_CHUNK]
-                chunk_content = '\n\n'.join(chunk_paragraphs)
-                
-                if chunk_content.strip():
-                    chunks.append({
-                        "section_title": "Unknown Section",
-                        "content": chunk_content,
-                        "order": section_order,
-                        "is_known_section": False
-                    })
-                    section_order += 1
+    # Handle unknown sections (text before first header)
+    # Group N paragraphs per chunk
+    paragraphs = [p.strip() for p in unknown_paragraphs if p.strip()]
+    for i in range(0, len(paragraphs), PARAGRAPHS_PER_CHUNK):
+        chunk_paragraphs = paragraphs[i:i+PARAGRAPHS_PER_CHUNK]
+        chunks.append({
+            "section_title": "Unknown Section",
+            "content": '\n\n'.join(chunk_paragraphs),
+            "order": section_order,
+            "is_known_section": False
+        })
+        section_order += 1
     
     # If no chunks found at all, treat entire document as one chunk
     if not chunks:
         chunks.append({
             "section_title": "Full Document",
-            "content": full_text.strip(),
+            "content": '\n'.join(page_texts).strip(),
             "order": 0,
             "is_known_section": False
         })
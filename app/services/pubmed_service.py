@@ -1,10 +1,78 @@
 """PubMed service for searching and fetching articles."""
 from Bio import Entrez
-from typing import List, Dict
+from collections import OrderedDict
+from typing import List, Dict, Optional, Tuple, Union
+import asyncio
 import os
+import time
 
 # Set email for NCBI (required)
 Entrez.email = os.getenv("NCBI_EMAIL", "your-email@example.com")
+# Optional API key raises NCBI's rate limit from 3 to 10 requests/second
+Entrez.api_key = os.getenv("NCBI_API_KEY") or None
+
+# Concurrent UI searches arriving within PUBMED_BATCH_WINDOW seconds share one EFetch
+PUBMED_BATCH_SIZE = 8
+PUBMED_BATCH_WINDOW = float(os.getenv("PUBMED_BATCH_WINDOW", "0.15"))
+
+# Repeated UI searches are answered from memory for PUBMED_CACHE_TTL seconds
+PUBMED_CACHE_TTL = float(os.getenv("PUBMED_CACHE_TTL", "900"))
+PUBMED_CACHE_MAX_ENTRIES = 256
+
+
+def _parse_article(article) -> Dict:
+    """Convert one Entrez PubmedArticle record into an article metadata dict."""
+    medline = article["MedlineCitation"]
+    
+    # Extract title
+    title = medline["Article"]["ArticleTitle"]
+    
+    # Extract authors
+    author_list = medline["Article"].get("AuthorList", [])
+    authors = ", ".join([
+        f"{a.get('LastName', '')} {a.get('ForeName', '')}"
+        for a in author_list[:3]
+    ])
+    if len(author_list) > 3:
+        authors += " et al."
+    
+    # Extract year
+    pub_date = medline["Article"].get("Journal", {}).get("JournalIssue", {}).get("PubDate", {})
+    year = pub_date.get("Year") or pub_date.get("MedlineDate", "Unknown")
+    if isinstance(year, str) and year != "Unknown":
+        # Extract year from MedlineDate if needed
+        year = year[:4] if year[:4].isdigit() else "Unknown"
+    
+    # Extract abstract
+    abstract_parts = medline["Article"].get("Abstract", {}).get("AbstractText", [])
+    abstract = " ".join([str(part) for part in abstract_parts])
+    
+    # Get PubMed ID
+    pubmed_id = str(medline["PMID"])
+    
+    return {
+        "pubmed_id": pubmed_id,
+        "title": title,
+        "authors": authors,
+        "year": str(year),
+        "abstract": abstract
+    }
+
+
+def _esearch_ids(keywords: str, max_results: int) -> List[str]:
+    handle = Entrez.esearch(db="pubmed", term=keywords, retmax=max_results)
+    record = Entrez.read(handle)
+    handle.close()
+    return list(record["IdList"])
+
+
+def _efetch_articles(pubmed_ids: List[str]) -> Dict[str, Dict]:
+    """Fetch article details for all IDs in one EFetch call, keyed by PubMed ID."""
+    handle = Entrez.efetch(db="pubmed", id=",".join(pubmed_ids), retmode="xml")
+    articles = Entrez.read(handle)
+    handle.close()
+    parsed = (_parse_article(article) for article in articles["PubmedArticle"])
+    return {article["pubmed_id"]: article for article in parsed}
 
 
 def search_pubmed(keywords: str, max_results: int = 10) -> List[Dict]:
@@ -18,61 +86,153 @@ def search_pubmed(keywords: str, max_results: int = 10) -> List[Dict]:
     Returns:
         List of dicts with: pubmed_id, title, authors, year, abstract
     """
-    try:
-        # Search for IDs
-        handle = Entrez.esearch(db="pubmed", term=keywords, retmax=max_results)
-        record = Entrez.read(handle)
-        handle.close()
-        
-        if not record["IdList"]:
-            return []
+    return search_pubmed_batch([keywords], max_results)[0]
+
+
+def _search_pubmed_outcomes(queries: List[str], max_results: int) -> List[Union[List[Dict], Exception]]:
+    """
+    Search each query on its own and fetch the union of their hits in one EFetch.
+    
+    A failed esearch only fails its own query, and a failed EFetch only fails
+    the queries whose IDs it was fetching; queries with no hits still succeed.
+    
+    Returns:
+        Per query, in the order of queries, its article list or the error it hit
+    """
+    outcomes_by_query: Dict[str, Union[List[str], Exception]] = {}
+    for keywords in dict.fromkeys(queries):
+        try:
+            outcomes_by_query[keywords] = _esearch_ids(keywords, max_results)
+        except Exception as e:
+            outcomes_by_query[keywords] = ValueError(f"PubMed search failed: {e}")
+    
+    all_ids = list(dict.fromkeys(
+        pmid
+        for ids in outcomes_by_query.values()
+        if not isinstance(ids, Exception)
+        for pmid in ids
+    ))
+    articles: Dict[str, Dict] = {}
+    fetch_error: Optional[Exception] = None
+    if all_ids:
+        try:
+            articles = _efetch_articles(all_ids)
+        except Exception as e:
+            fetch_error = ValueError(f"PubMed search failed: {e}")
+    
+    results: List[Union[List[Dict], Exception]] = []
+    for keywords in queries:
+        ids = outcomes_by_query[keywords]
+        if isinstance(ids, Exception):
+            results.append(ids)
+        elif ids and fetch_error is not None:
+            results.append(fetch_error)
+        else:
+            results.append([articles[pmid] for pmid in ids if pmid in articles])
+    return results
+
+
+def search_pubmed_batch(queries: List[str], max_results: int = 10) -> List[List[Dict]]:
+    """
+    Search PubMed for several keyword queries, fetching all hits in one EFetch.
+    
+    Args:
+        queries: Search query strings (duplicates are searched once)
+        max_results: Maximum number of results per query
+    
+    Returns:
+        One article list per query, in the order of queries
+    
+    Raises:
+        ValueError: If any query's search or fetch failed
+    """
+    results = _search_pubmed_outcomes(queries, max_results)
+    for outcome in results:
+        if isinstance(outcome, Exception):
+            raise outcome
+    return results
+
+
+class PubmedBatcher:
+    """
+    Coalesces concurrent PubMed searches into batched NCBI round-trips.
+    
+    Queries submitted within max_queue_time of the first queued one (up to
+    max_batch_size) are searched together in a worker thread: esearch runs per
+    query and only the EFetch of the union of their hits is shared, so each
+    caller gets back its own article list or its own error. Results are
+    reused for PUBMED_CACHE_TTL seconds.
+    """
+    
+    def __init__(
+        self,
+        max_batch_size: int = PUBMED_BATCH_SIZE,
+        max_queue_time: float = PUBMED_BATCH_WINDOW,
+        max_results: int = 10,
+    ):
+        self.max_batch_size = max_batch_size
+        self.max_queue_time = max_queue_time
+        self.max_results = max_results
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        # LRU of normalized keywords -> (expires_at, articles); only touched
+        # from the event loop, so it needs no lock
+        self._cache: "OrderedDict[str, Tuple[float, List[Dict]]]" = OrderedDict()
+    
+    async def process(self, keywords: str) -> List[Dict]:
+        """Search PubMed for keywords, batched with concurrent callers."""
+        # Collapse whitespace only: PubMed's Boolean operators are case-sensitive
+        keywords = " ".join(keywords.split())
+        now = time.monotonic()
+        entry = self._cache.get(keywords)
+        if entry is not None and entry[0] > now:
+            self._cache.move_to_end(keywords)
+            return entry[1]
         
-        # Fetch article details
-        handle = Entrez.efetch(db="pubmed", id=",".join(record["IdList"]), retmode="xml")
-        articles = Entrez.read(handle)
-        handle.close()
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._worker.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+        future = loop.create_future()
+        await self._queue.put((keywords, future))
+        articles = await future
         
-        results = []
-        for article in articles["PubmedArticle"]:
-            medline = article["MedlineCitation"]
-            
-            # Extract title
-            title = medline["Article"]["ArticleTitle"]
-            
-            # Extract authors
-            author_list = medline["Article"].get("AuthorList", [])
-            authors = ", ".join([
-                f"{a.get('LastName', '')} {a.get('ForeName', '')}"
-                for a in author_list[:3]
-            ])
-            if len(author_list) > 3:
-                authors += " et al."
-            
-            # Extract year
-            pub_date = medline["Article"].get("Journal", {}).get("JournalIssue", {}).get("PubDate", {})
-            year = pub_date.get("Year") or pub_date.get("MedlineDate", "Unknown")
-            if isinstance(year, str) and year != "Unknown":
-                # Extract year from MedlineDate if needed
-                year = year[:4] if year[:4].isdigit() else "Unknown"
-            
-            # Extract abstract
-            abstract_parts = medline["Article"].get("Abstract", {}).get("AbstractText", [])
-            abstract = " ".join([str(part) for part in abstract_parts])
-            
-            # Get PubMed ID
-            pubmed_id = str(medline["PMID"])
+        self._cache[keywords] = (time.monotonic() + PUBMED_CACHE_TTL, articles)
+        self._cache.move_to_end(keywords)
+        if len(self._cache) > PUBMED_CACHE_MAX_ENTRIES:
+            self._cache.popitem(last=False)
+        return articles
+    
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch: List[Tuple[str, asyncio.Future]] = [await self._queue.get()]
+            deadline = loop.time() + self.max_queue_time
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
             
-            results.append({
-                "pubmed_id": pubmed_id,
-                "title": title,
-                "authors": authors,
-                "year": str(year),
-                "abstract": abstract
-            })
-        
-        return results
-    except Exception as e:
-        raise ValueError(f"PubMed search failed: {e}")
+            queries = [keywords for keywords, _ in batch]
+            try:
+                results = await asyncio.to_thread(_search_pubmed_outcomes, queries, self.max_results)
+            except Exception as e:
+                results = [e] * len(batch)
+            # Each caller only sees the failures of its own query
+            for (_, future), outcome in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(outcome, Exception):
+                    future.set_exception(outcome)
+                else:
+                    future.set_result(outcome)
+
+
+pubmed_batcher = PubmedBatcher()
 
 
 def fetch_pubmed_article(pubmed_id: str) -> Dict:
@@ -1,10 +1,12 @@
 """Knowledge Base tools for agents."""
 from google.adk.tools import FunctionTool
 from app.services.kb_service import (
+    cached_kb_result,
+    query_distractor_candidates,
     query_triplets_for_distractors,
-    get_approved_triplets
+    get_approved_triplet_rows
 )
-from app.db.database import SessionLocal
+from app.db.database import session_scope
 from typing import Dict, List, Optional
 
 
@@ -25,8 +27,14 @@ def query_kb_for_distractors(
     Returns:
         Dict with 'triplets' list
     """
-    db = SessionLocal()
-    try:
+    return cached_kb_result(
+        ("distractors", subject, action, object),
+        lambda: _load_distractors(subject, action, object),
+    )
+
+
+def _load_distractors(subject: Optional[str], action: Optional[str], object: Optional[str]) -> Dict:
+    with session_scope() as db:
         triplets = query_triplets_for_distractors(db, subject, action, object)
         return {
             "triplets": [
@@ -40,41 +48,73 @@ def query_kb_for_distractors(
             ],
             "count": len(triplets)
         }
-    finally:
-        db.close()
 
 
-def get_approved_triplets_for_mcq(source_id: Optional[int] = None) -> Dict:
+def find_distractor_candidates(
+    subject: Optional[str] = None,
+    action: Optional[str] = None,
+    object: Optional[str] = None
+) -> Dict:
     """
-    Get approved triplets for MCQ generation.
+    Find swap triplets for distractors with both KB queries in a single call.
+    Pass the subject, action and object of the triplet the MCQ is built on.
     
     Args:
-        source_id: Optional source ID to filter by
+        subject: Subject of the correct triplet (KB Query 1: same subject, different action/object)
+        action: Action of the correct triplet (KB Query 2: same action/object, different subject)
+        object: Object of the correct triplet (KB Query 2: same action/object, different subject)
     
     Returns:
-        Dict with 'triplets' list
+        Dict with 'same_subject' and 'same_action_object' triplet lists
     """
-    db = SessionLocal()
-    try:
-        triplets = get_approved_triplets(db, source_id)
-        return {
-            "triplets": [
+    return cached_kb_result(
+        ("distractor_candidates", subject, action, object),
+        lambda: _load_distractor_candidates(subject, action, object),
+    )
+
+
+def _load_distractor_candidates(subject: Optional[str], action: Optional[str], object: Optional[str]) -> Dict:
+    with session_scope() as db:
+        groups = query_distractor_candidates(db, subject, action, object)
+        result = {
+            name: [
                 {
-                    "id": t.id,
                     "subject": t.subject,
                     "action": t.action,
                     "object": t.object,
-                    "relation": t.relation,
-                    "source_id": t.source_id
+                    "relation": t.relation
                 }
                 for t in triplets
-            ],
-            "count": len(triplets)
+            ]
+            for name, triplets in groups.items()
+        }
+        result["count"] = sum(len(triplets) for triplets in groups.values())
+        return result
+
+
+def get_approved_triplets_for_mcq(source_id: Optional[int] = None) -> Dict:
+    """
+    Get approved triplets for MCQ generation.
+    
+    Args:
+        source_id: Optional source ID to filter by
+    
+    Returns:
+        Dict with 'triplets' list
+    """
+    return cached_kb_result(("approved", source_id), lambda: _load_approved(source_id))
+
+
+def _load_approved(source_id: Optional[int]) -> Dict:
+    with session_scope() as db:
+        rows = get_approved_triplet_rows(db, source_id)
+        return {
+            "triplets": [row._asdict() for row in rows],
+            "count": len(rows)
         }
-    finally:
-        db.close()
 
 
 kb_query_tool = FunctionTool(query_kb_for_distractors)
+kb_distractor_tool = FunctionTool(find_distractor_candidates)
 kb_get_approved_tool = FunctionTool(get_approved_triplets_for_mcq)
 
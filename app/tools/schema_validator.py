@@ -4,6 +4,11 @@ from typing import Dict
 import yaml
 import os
 
+try:  # libyaml-backed loader; same safe semantics as yaml.safe_load
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # pragma: no cover - PyYAML built without libyaml
+    from yaml import SafeLoader
+
 # Load schema
 SCHEMA_PATH = os.path.join(
     os.path.dirname(__file__), 
@@ -11,7 +16,12 @@ SCHEMA_PATH = os.path.join(
 )
 
 with open(SCHEMA_PATH, 'r') as f:
-    SCHEMA = yaml.safe_load(f)
+    SCHEMA = yaml.load(f, Loader=SafeLoader)
+
+# Relation definitions keyed by id (O(1) lookup per validated triplet)
+RELATIONS_BY_ID = {r["id"]: r for r in SCHEMA.get("relations", [])}
+# Only the relations triplets may use
+_ENABLED_RELATIONS = {rid: r for rid, r in RELATIONS_BY_ID.items() if r.get("enabled", True)}
 
 
 def validate_triplet_schema(subject: str, action: str, object: str, relation: str) -> Dict:
@@ -27,28 +37,11 @@ def validate_triplet_schema(subject: str, action: str, object: str, relation: st
     Returns:
         Dict with 'valid' (bool) and 'errors' (list)
     """
-    errors = []
-    
-    # Check if relation exists in schema
-    valid_relations = [r["id"] for r in SCHEMA.get("relations", []) if r.get("enabled", True)]
-    if relation not in valid_relations:
-        errors.append(f"Relation '{relation}' not in schema or not enabled")
-        return {
-            "valid": False,
-            "errors": errors
-        }
-    
-    # Find relation definition
-    relation_def = next(
-        (r for r in SCHEMA.get("relations", []) if r["id"] == relation),
-        None
-    )
-    
-    if not relation_def:
-        errors.append(f"Relation '{relation}' definition not found")
+    relation_def = _ENABLED_RELATIONS.get(relation)
+    if relation_def is None:
         return {
             "valid": False,
-            "errors": errors
+            "errors": [f"Relation '{relation}' not in schema or not enabled"]
         }
     
     # Check domain/range constraints if schema defines entity types
@@ -56,10 +49,10 @@ def validate_triplet_schema(subject: str, action: str, object: str, relation: st
     # For now, we validate that the relation is valid and enabled
     
     return {
-        "valid": len(errors) == 0,
-        "errors": errors,
+        "valid": True,
+        "errors": [],
         "relation": relation,
-        "relation_enabled": relation_def.get("enabled", True)
+        "relation_enabled": True
     }
 
 
@@ -1,38 +1,47 @@
 """Gradio UI for Medical MCQ Generator.
 Backend-integrated version."""
 
+import asyncio
+import functools
 import gradio as gr
+import hashlib
 import logging
-from typing import Optional, Tuple, List, Dict, Union, Any
+from typing import Optional, Tuple, List, Dict, Iterable, Iterator, Union, Any
 from dataclasses import dataclass, field
 import json
-import asyncio
 import os
 import math
+import re
 import time
 import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from io import BytesIO
 from pathlib import Path
 
 from PIL import Image
 
-from app.services.pubmed_service import search_pubmed as pubmed_search_service
-from app.services.ingestion_service import register_pdf_source, register_pubmed_source
-from app.services.kb_service import (
-    get_approved_triplets,
-    upsert_triplet,
-)
-from app.db.database import SessionLocal, init_db
+try:  # orjson ships with gradio; parse errors still subclass json.JSONDecodeError
+    from orjson import loads as _json_loads
+except ImportError:  # pragma: no cover - depends on the installed extras
+    _json_loads = json.loads
+
+from app.services.pubmed_service import pubmed_batcher
+from app.services.ingestion_service import register_pdf_source, register_pubmed_sources
+from app.services.kb_service import upsert_triplets_bulk
+from app.db.database import init_db, run_db, session_scope
 from app.db.models import Source, Triplet, MCQRecord, PendingSource
-from app.core.runner import runner, create_new_session, get_last_session, run_agent
+from app.core.runner import create_new_session, get_last_session, run_agent
 from app.core.llm_manager import llm_manager
 from app.services.gemini_image_service import (
     generate_image_from_prompt,
     DEFAULT_IMAGE_SIZE as DEFAULT_IMAGE_DIMENSION,
 )
 from app.services.gemini_mcq_service import (
-    generate_mcq_with_triplets,
+    GeminiResult,
     regenerate_mcq_with_loop_refinement,
+    stream_mcq_with_triplets,
 )
 from app.services.media_service import (
     save_image,
@@ -40,66 +49,90 @@ from app.services.media_service import (
     load_image_bytes,
     delete_image,
 )
-from sqlalchemy.orm import Session
-from sqlalchemy import String
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import String, func, insert, lambda_stmt, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 
-def handle_pending_navigation(direction: int, current_page: int) -> Tuple[str, int, str]:
-    new_page = max(1, current_page + direction)
-    return render_pending_sources(new_page)
+def handle_pending_navigation(direction: int, cursor: "PendingPageCursor") -> Tuple[str, "PendingPageCursor", str]:
+    new_page = max(1, cursor.page + direction)
+    return render_pending_sources(new_page, cursor=cursor)
 
 
-def handle_pending_clear() -> Tuple[str, int, str]:
+def handle_pending_clear() -> Tuple[str, "PendingPageCursor", str]:
     _clear_pending_sources()
     return render_pending_sources(1)
 
 
-def refresh_pending_default() -> Tuple[str, int, str]:
+def refresh_pending_default() -> Tuple[str, "PendingPageCursor", str]:
     return render_pending_sources(1)
 
 
-def load_pending_articles_dropdown() -> Tuple[gr.Dropdown, str]:
-    """Load dropdown choices for pending articles."""
-    db = SessionLocal()
-    try:
+def _pending_article_choices() -> List[Tuple[str, int]]:
+    """(label, source id) dropdown choices for pending articles, newest first."""
+    with session_scope() as db:
+        version = _pending_queue_version(db)
+        now = time.monotonic()
+        cached = _pending_choices_cache.get(version)
+        if cached is not None and cached[0] > now:
+            return list(cached[1])
+        
+        # Only the columns the labels need (no chunk content), parent title joined in
+        parent_source = aliased(Source)
         entries = (
-            db.query(Source, PendingSource)
+            db.query(
+                Source.id,
+                Source.source_id,
+                Source.title,
+                Source.publication_year,
+                Source.source_type,
+                Source.section_title,
+                parent_source.id.label("parent_id"),
+                parent_source.title.label("parent_title"),
+            )
             .join(PendingSource, PendingSource.source_id == Source.id)
-            .order_by(PendingSource.created_at.desc())
+            .outerjoin(parent_source, parent_source.id == Source.parent_source_id)
+            .order_by(PendingSource.created_at.desc(), PendingSource.id.desc())
             .all()
         )
-        if not entries:
-            return (
-                gr.update(choices=[], value=None, visible=True, interactive=False),
-                "*No pending articles available.*",
-            )
 
         choices = []
-        for source, _ in entries:
+        for source in entries:
             year = source.publication_year or "Year N/A"
             title = source.title or "Untitled"
             identifier = source.source_id
             
             # For PDF chunks, show parent PDF name and section
-            if source.source_type == "pdf_chunk" and source.parent_source_id:
-                parent = db.query(Source).filter(Source.id == source.parent_source_id).first()
-                if parent:
-                    section_info = f" [{source.section_title}]" if source.section_title else ""
-                    title = f"{parent.title}{section_info}"
+            if source.source_type == "pdf_chunk" and source.parent_id is not None:
+                section_info = f" [{source.section_title}]" if source.section_title else ""
+                title = f"{source.parent_title}{section_info}"
             
-            choices.append(f"{source.id} | {identifier} | {title} ({year})")
+            # The dropdown's value is the source id; handlers never parse the label
+            choices.append((f"{source.id} | {identifier} | {title} ({year})", source.id))
+    _pending_choices_cache.clear()
+    _pending_choices_cache[version] = (now + PENDING_RENDER_TTL, choices)
+    return list(choices)
+
 
+def load_pending_articles_dropdown() -> Tuple[gr.Dropdown, str]:
+    """Load dropdown choices for pending articles."""
+    choices = _pending_article_choices()
+    if not choices:
         return (
-            gr.update(
-                choices=choices,
-                value=choices[0] if choices else None,
-                visible=True,
-                interactive=True,
-            ),
-            f"{len(choices)} pending article(s) loaded.",
+            gr.update(choices=[], value=None, visible=True, interactive=False),
+            "*No pending articles available.*",
         )
-    finally:
-        db.close()
+
+    return (
+        gr.update(
+            choices=choices,
+            value=choices[0][1],
+            visible=True,
+            interactive=True,
+        ),
+        f"{len(choices)} pending article(s) loaded.",
+    )
 
 
 def _format_triplets_markdown(triplets: List[Dict[str, Any]]) -> str:
@@ -115,15 +148,21 @@ def _format_triplets_markdown(triplets: List[Dict[str, Any]]) -> str:
     return "\n".join(lines)
 
 
+def _format_options_md(options: List[str], correct_option: Optional[int]) -> str:
+    """Lettered option lines ("A) ...") with the correct one marked, shared by draft and stored views."""
+    return "".join(
+        f"{'(Correct) ' if idx - 1 == correct_option else ''}{chr(64+idx)}) {option}\n"
+        for idx, option in enumerate(options, 1)
+    )
+
+
 def _format_mcq_preview_from_dict(mcq_draft: Dict[str, Any], source: Source) -> str:
     if not mcq_draft:
         return "*No MCQ draft available.*"
 
-    options = mcq_draft.get("options", [])
-    options_text = ""
-    for idx, option in enumerate(options, 1):
-        marker = "(Correct) " if idx - 1 == mcq_draft.get("correct_option", 0) else ""
-        options_text += f"{marker}{chr(64+idx)}) {option}\n"
+    options_text = _format_options_md(
+        mcq_draft.get("options", []), mcq_draft.get("correct_option", 0)
+    )
 
     year = source.publication_year or "Year N/A"
     html = f"""
@@ -156,23 +195,165 @@ logger = logging.getLogger(__name__)
 # Session management
 DEFAULT_USER_ID = "default"
 current_session_id = None
+# Serializes the first lookup so concurrent requests don't each create a session
+_session_lock = asyncio.Lock()
+
+class _DraftCache:
+    """
+    Bounded, thread-safe LRU of MCQ drafts with an idle TTL.
+    
+    Reads renew an entry, so drafts under active review are kept while
+    abandoned ones expire or are evicted oldest-first.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._entries: "OrderedDict[int, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: int, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            if entry[0] <= now:
+                del self._entries[key]
+                return default
+            self._entries[key] = (now + self._ttl, entry[1])
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def __setitem__(self, key: int, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self._ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: int, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return default if entry is None else entry[1]
+
 
 # In-memory cache for MCQ drafts keyed by source_id
-pending_mcq_cache: Dict[int, Dict[str, Any]] = {}
+pending_mcq_cache = _DraftCache(
+    max_entries=int(os.getenv("MCQ_DRAFT_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("MCQ_DRAFT_TTL", "3600")),
+)
+
+# Background image generation started when a visual prompt is accepted, so
+# "Show Image" usually finds the file already on disk. MCQ id -> (prompt, job).
+image_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("IMAGE_PREFETCH_WORKERS", "2")), thread_name_prefix="image"
+)
+_image_jobs: Dict[int, Tuple[str, Future]] = {}
+_image_jobs_lock = threading.Lock()
+
+# Per-MCQ export files, named by a digest of their content
+EXPORT_DIR = Path(os.getenv("MCQ_EXPORT_DIR", os.path.join(tempfile.gettempdir(), "mcq_exports")))
+
+# Gradio queue: events run GRADIO_CONCURRENCY at a time by default, while the
+# slow LLM, PDF and image handlers each get their own smaller concurrency group.
+# GRADIO_LLM_CONCURRENCY limits UI events in the "llm" group, which make direct
+# draft/feedback calls. Agent pipeline runs (app.core.runner.run_agent) are
+# capped separately, process-wide, by app.core.runner.LLM_CONCURRENCY.
+GRADIO_CONCURRENCY = int(os.getenv("GRADIO_CONCURRENCY", "8"))
+GRADIO_QUEUE_SIZE = int(os.getenv("GRADIO_QUEUE_SIZE", "64"))
+GRADIO_LLM_CONCURRENCY = int(os.getenv("GRADIO_LLM_CONCURRENCY", "2"))
+PDF_CONCURRENCY = int(os.getenv("PDF_CONCURRENCY", "2"))
+IMAGE_CONCURRENCY = int(os.getenv("IMAGE_CONCURRENCY", "2"))
+
+# Rendered pending-review pages keyed by (page, page_size), all for one queue
+# version (row count, max id); repeated refreshes within the TTL skip the listing
+PENDING_RENDER_TTL = 2.0
+_pending_render_cache: Dict[Tuple[int, int], Tuple[float, Tuple[int, Any], Tuple[str, Any, str]]] = {}
+# Dialects with INSERT ... ON CONFLICT, used to queue sources in one statement
+_PENDING_INSERTS = {"postgresql": pg_insert, "sqlite": sqlite_insert}
+
+# Pending-article dropdown choices for the current queue version (single entry)
+_pending_choices_cache: Dict[Tuple[int, Any], Tuple[float, List[Tuple[str, int]]]] = {}
+
+# Rendered KB list pages keyed by (page, search query), all for one stored-MCQ
+# version (row count, max id). In-place edits (regeneration) don't change the
+# version, so the TTL bounds how long a page can lag behind them.
+KB_RENDER_TTL = 2.0
+KB_RENDER_MAX_ENTRIES = 128
+_kb_render_cache: Dict[Tuple[int, Optional[str]], Tuple[float, Tuple[int, Any], Tuple[List[List[Any]], int, str]]] = {}
+# Columns of the KB table; rows are [MCQ id, source, question preview]
+KB_LIST_HEADERS = ["MCQ ID", "Source", "Question"]
+
+
+# Statements run on every pending-panel refresh, built and compiled once (lambda
+# statements are cached by code location; only offset/limit vary as parameters)
+_PENDING_VERSION_STMT = lambda_stmt(
+    lambda: select(func.count(PendingSource.id), func.max(PendingSource.id))
+)
+_pending_parent = aliased(Source)
+_PENDING_PAGE_COLUMNS = (
+    Source.title,
+    Source.source_id,
+    Source.publication_year,
+    Source.source_type,
+    Source.section_title,
+    PendingSource.created_at,
+    PendingSource.id.label("pending_id"),
+    _pending_parent.id.label("parent_id"),
+    _pending_parent.title.label("parent_title"),
+)
+_PENDING_PAGE_STMT = lambda_stmt(
+    lambda: select(*_PENDING_PAGE_COLUMNS)
+    .join(PendingSource, PendingSource.source_id == Source.id)
+    .outerjoin(_pending_parent, _pending_parent.id == Source.parent_source_id)
+    .order_by(PendingSource.created_at.desc(), PendingSource.id.desc())
+)
+# Same page with the total on every row (COUNT(*) OVER ())
+_PENDING_PAGE_WITH_TOTAL_STMT = lambda_stmt(
+    lambda: select(*_PENDING_PAGE_COLUMNS, func.count().over().label("total"))
+    .join(PendingSource, PendingSource.source_id == Source.id)
+    .outerjoin(_pending_parent, _pending_parent.id == Source.parent_source_id)
+    .order_by(PendingSource.created_at.desc(), PendingSource.id.desc())
+)
+
+
+def _pending_queue_version(db: Session) -> Tuple[int, Any]:
+    """(row count, max id) of the pending queue; any add or remove changes it."""
+    return tuple(db.execute(_PENDING_VERSION_STMT).one())
 
 
 async def get_or_create_session() -> str:
     """Get or create a session for the current user"""
     global current_session_id
-    if not current_session_id:
-        session_id = await get_last_session(DEFAULT_USER_ID)
-        if not session_id:
-            current_session_id = await create_new_session(DEFAULT_USER_ID)
-        else:
-            current_session_id = session_id
+    if current_session_id:
+        return current_session_id
+    async with _session_lock:
+        if not current_session_id:
+            session_id = await get_last_session(DEFAULT_USER_ID)
+            if not session_id:
+                current_session_id = await create_new_session(DEFAULT_USER_ID)
+            else:
+                current_session_id = session_id
     return current_session_id
 
 
+@dataclass(frozen=True)
+class PendingPageCursor:
+    """
+    Pending-panel page held in UI state, with the sort keys at its edges.
+    
+    While the queue version is unchanged, the adjacent page is read by
+    seeking past these keys instead of with an OFFSET that rescans the
+    skipped rows.
+    """
+
+    page: int = 1
+    version: Tuple[int, Any] = (0, None)
+    first_id: Optional[int] = None  # pending id of the first row
+    last_id: Optional[int] = None   # same for the last row
+
+
 @dataclass
 class TripletAutoProcessResult:
     """Aggregator for auto triplet processing outcomes."""
@@ -205,13 +386,14 @@ def _normalize_context_sentences(value: Any) -> List[str]:
         return []
     if isinstance(value, str):
         try:
-            decoded = json.loads(value)
+            decoded = _json_loads(value)
             if isinstance(decoded, list):
-                return [str(item).strip() for item in decoded if str(item).strip()]
+                value = decoded
         except json.JSONDecodeError:
             return [value.strip()]
     if isinstance(value, list):
-        return [str(item).strip() for item in value if str(item).strip()]
+        # Each item converted and stripped once
+        return [text for text in (str(item).strip() for item in value) if text]
     return [str(value).strip()]
 
 
@@ -224,51 +406,146 @@ def _persist_fallback_payload(
     return None
 
 
-def _ensure_pending_source(db: Session, source: Source) -> None:
-    """Add source to pending review queue if not already present."""
-    existing = db.query(PendingSource).filter(PendingSource.source_id == source.id).first()
-    if not existing:
-        db.add(PendingSource(source_id=source.id))
-        db.commit()
+def _ensure_pending_sources(db: Session, source_ids: Iterable[int]) -> None:
+    """Add sources to pending review queue (one statement, one commit)."""
+    source_ids = sorted(set(source_ids))
+    if not source_ids:
+        return
+    insert = _PENDING_INSERTS.get(db.get_bind().dialect.name)
+    if insert is not None:
+        # Already-queued sources hit the unique source_id and are skipped
+        db.execute(
+            insert(PendingSource)
+            .values([{"source_id": source_id} for source_id in source_ids])
+            .on_conflict_do_nothing(index_elements=["source_id"])
+        )
+    else:
+        queued = {
+            source_id for (source_id,) in db.query(PendingSource.source_id).filter(
+                PendingSource.source_id.in_(source_ids)
+            )
+        }
+        db.add_all(
+            PendingSource(source_id=source_id) for source_id in source_ids if source_id not in queued
+        )
+    db.commit()
 
 
-def _list_pending_sources(page: int = 1, page_size: int = 6) -> Tuple[List[Tuple[Source, PendingSource]], int]:
-    """Return paginated pending sources and total pages."""
-    db = SessionLocal()
-    try:
-        total = db.query(PendingSource).count()
+def _list_pending_sources(
+    db: Session,
+    page: int = 1,
+    page_size: int = 6,
+    total: Optional[int] = None,
+    after: Optional[int] = None,
+    before: Optional[int] = None,
+) -> Tuple[List[Any], int]:
+    """
+    Return a page of pending-source rows and total pages (total is counted if not given).
+    
+    With total given, after or before seeks to the page following (or
+    preceding) that pending id instead of using page's offset.
+    """
+    page = max(1, page)
+    if total is not None and (after is not None or before is not None):
+        rows = _seek_pending_page(db, page_size, after, before)
+        if rows:
+            return rows, max(1, math.ceil(total / page_size)) if total else 1
+        # Nothing beyond the key: fall back to the (clamped) page offset
+    if total is not None:
         total_pages = max(1, math.ceil(total / page_size)) if total else 1
-        page = max(1, min(page, total_pages))
-        entries = (
-            db.query(Source, PendingSource)
-            .join(PendingSource, PendingSource.source_id == Source.id)
-            .order_by(PendingSource.created_at.desc())
-            .offset((page - 1) * page_size)
-            .limit(page_size)
-            .all()
-        )
-        return entries, total_pages
-    finally:
-        db.close()
+        return _query_pending_page(db, min(page, total_pages), page_size), total_pages
+    
+    # The total rides along on every row (COUNT(*) OVER ()), saving a COUNT round trip
+    rows = _query_pending_page(db, page, page_size, with_total=True)
+    if rows:
+        return rows, max(1, math.ceil(rows[0].total / page_size))
+    if page == 1:
+        return rows, 1
+    # Past the last page, so no row carried the total; count and show the last page
+    return _list_pending_sources(db, page, page_size, db.query(PendingSource).count())
+
+
+def _query_pending_page(db: Session, page: int, page_size: int, with_total: bool = False) -> List[Any]:
+    # Only the rendered columns; the parent PDF title comes from the same statement
+    stmt = _PENDING_PAGE_WITH_TOTAL_STMT if with_total else _PENDING_PAGE_STMT
+    offset = (page - 1) * page_size
+    return db.execute(stmt + (lambda s: s.offset(offset).limit(page_size))).all()
+
+
+def _seek_pending_page(
+    db: Session,
+    page_size: int,
+    after: Optional[int] = None,
+    before: Optional[int] = None,
+) -> List[Any]:
+    # Keyset paging: the page starts right at the key, so its cost doesn't grow
+    # with the page number. The key is the id alone; it grows with the
+    # created_at server default, so it splits the (created_at, id) order at the
+    # same row, while a bound datetime compares wrongly against the text SQLite
+    # stores and misplaces rows added within the same second.
+    if after is not None:
+        return db.execute(_PENDING_PAGE_STMT + (
+            lambda s: s.where(PendingSource.id < after).limit(page_size)
+        )).all()
+    rows = db.execute(_PENDING_PAGE_STMT + (
+        lambda s: s.where(PendingSource.id > before).order_by(None).order_by(
+            PendingSource.created_at.asc(), PendingSource.id.asc()
+        ).limit(page_size)
+    )).all()
+    rows.reverse()
+    return rows
 
 
 def _clear_pending_sources() -> None:
-    db = SessionLocal()
-    try:
+    with session_scope() as db:
         db.query(PendingSource).delete()
         db.commit()
-    finally:
-        db.close()
 
 
-def render_pending_sources(page: int = 1, page_size: int = 6) -> Tuple[str, int, str]:
-    """Render markdown for pending sources with pagination info."""
-    entries, total_pages = _list_pending_sources(page, page_size)
+def render_pending_sources(
+    page: int = 1,
+    page_size: int = 6,
+    cursor: Optional[PendingPageCursor] = None,
+) -> Tuple[str, PendingPageCursor, str]:
+    """Render markdown for pending sources with pagination info (cursor: the page shown before)."""
+    # One session (one pooled connection) serves the version check and the listing
+    with session_scope() as db:
+        version = _pending_queue_version(db)
+        now = time.monotonic()
+        cached = _pending_render_cache.get((page, page_size))
+        if cached is not None and cached[0] > now and cached[1] == version:
+            return cached[2]
+        
+        # Seek from an adjacent page's edge only while the queue is unchanged,
+        # so the result is exactly what the offset would return
+        after = before = None
+        if cursor is not None and cursor.version == version:
+            if page == cursor.page + 1:
+                after = cursor.last_id
+            elif page == cursor.page - 1:
+                before = cursor.first_id
+        rendered = _render_pending_sources(db, page, page_size, version, after, before)
+    if any(entry[1] != version for entry in list(_pending_render_cache.values())):
+        _pending_render_cache.clear()
+    _pending_render_cache[(page, page_size)] = (now + PENDING_RENDER_TTL, version, rendered)
+    return rendered
+
+
+def _render_pending_sources(
+    db: Session,
+    page: int,
+    page_size: int,
+    version: Tuple[int, Any],
+    after: Optional[int] = None,
+    before: Optional[int] = None,
+) -> Tuple[str, PendingPageCursor, str]:
+    entries, total_pages = _list_pending_sources(db, page, page_size, version[0], after, before)
     if not entries:
-        return "*No articles pending review.*", 1, "Page 1/1"
+        return "*No articles pending review.*", PendingPageCursor(1, version), "Page 1/1"
+    page = min(page, total_pages)
 
     html_lines = ["### Pending Review"]
-    for source, pending in entries:
+    for source in entries:
         year = source.publication_year or "Year N/A"
         label = source.source_id
         
@@ -276,24 +553,19 @@ def render_pending_sources(page: int = 1, page_size: int = 6) -> Tuple[str, int,
         section_info = ""
         if source.source_type == "pdf_chunk" and source.section_title:
             section_info = f"\n- Section: {source.section_title}"
-            # Get parent PDF name if available
-            if source.parent_source_id:
-                db = SessionLocal()
-                try:
-                    parent = db.query(Source).filter(Source.id == source.parent_source_id).first()
-                    if parent:
-                        label = f"{parent.title} - {source.section_title}"
-                finally:
-                    db.close()
+            # Parent PDF name, joined in by _list_pending_sources
+            if source.parent_id is not None:
+                label = f"{source.parent_title} - {source.section_title}"
         
         html_lines.append(
             f"**{source.title or 'Untitled'}**\n"
             f"- Year: {year}\n"
             f"- Identifier: {label}{section_info}\n"
-            f"- Added: {pending.created_at}\n"
+            f"- Added: {source.created_at}\n"
         )
     info = f"Page {page}/{total_pages}"
-    return "\n".join(html_lines), page, info
+    cursor = PendingPageCursor(page, version, entries[0].pending_id, entries[-1].pending_id)
+    return "\n".join(html_lines), cursor, info
 
 
 def _store_triplets_with_auto_accept(
@@ -304,6 +576,7 @@ def _store_triplets_with_auto_accept(
     """Persist extracted triplets with duplicate checks and auto-accept logic."""
     result = TripletAutoProcessResult()
 
+    candidates: List[Dict[str, Any]] = []
     for triplet_data in extracted_triplets or []:
         subject = (triplet_data.get("subject") or "").strip()
         action = (triplet_data.get("action") or "").strip()
@@ -314,41 +587,46 @@ def _store_triplets_with_auto_accept(
             result.errors.append("Incomplete triplet fields encountered.")
             continue
 
-        duplicate = db.query(Triplet).filter(
-            Triplet.subject == subject,
-            Triplet.action == action,
-            Triplet.object == obj,
-            Triplet.relation == relation,
-            Triplet.source_id == source.id,
-        ).first()
-        if duplicate:
-            result.skipped_duplicates += 1
-            continue
+        candidates.append({
+            "subject": subject,
+            "action": action,
+            "object": obj,
+            "relation": relation,
+            "source_id": source.id,
+            "context_sentences": _normalize_context_sentences(triplet_data.get("context_sentences")),
+            "schema_valid": bool(triplet_data.get("schema_valid")),
+        })
+
+    if not candidates:
+        return result
 
-        accepted_match = db.query(Triplet).filter(
-            Triplet.subject == subject,
-            Triplet.action == action,
-            Triplet.object == obj,
-            Triplet.relation == relation,
+    # Two lookups for the whole batch instead of two queries per triplet
+    seen = {
+        tuple(row) for row in db.query(
+            Triplet.subject, Triplet.action, Triplet.object, Triplet.relation,
+        ).filter(Triplet.source_id == source.id).all()
+    }
+    accepted_keys = {
+        tuple(row) for row in db.query(
+            Triplet.subject, Triplet.action, Triplet.object, Triplet.relation,
+        ).filter(
             Triplet.status == "accepted",
-        ).first()
-
-        schema_valid = bool(triplet_data.get("schema_valid"))
-        status = "accepted" if schema_valid or accepted_match else "pending"
+            Triplet.subject.in_({row["subject"] for row in candidates}),
+        ).all()
+    }
 
-        triplet = upsert_triplet(
-            db=db,
-            subject=subject,
-            action=action,
-            object=obj,
-            relation=relation,
-            source_id=source.id,
-            context_sentences=_normalize_context_sentences(triplet_data.get("context_sentences")),
-            schema_valid=schema_valid,
-            status=status,
-        )
+    rows: List[Dict[str, Any]] = []
+    for row in candidates:
+        key = (row["subject"], row["action"], row["object"], row["relation"])
+        if key in seen:
+            result.skipped_duplicates += 1
+            continue
+        seen.add(key)
+        row["status"] = "accepted" if row["schema_valid"] or key in accepted_keys else "pending"
+        rows.append(row)
 
-        if status == "accepted":
+    for row, triplet in zip(rows, upsert_triplets_bulk(db, rows)):
+        if row["status"] == "accepted":
             result.accepted.append(triplet)
         else:
             result.pending.append(triplet)
@@ -358,12 +636,7 @@ def _store_triplets_with_auto_accept(
 
 def _build_mcq_prompt(triplet: Triplet, source: Source) -> str:
     """Create a deterministic instruction payload for MCQ generation."""
-    context_sentences = []
-    if triplet.context_sentences:
-        try:
-            context_sentences = json.loads(triplet.context_sentences)
-        except json.JSONDecodeError:
-            context_sentences = [triplet.context_sentences]
+    context_sentences = _normalize_context_sentences(triplet.context_sentences)
     context_block = "\n".join(f"- {sentence}" for sentence in context_sentences)
 
     return (
@@ -392,9 +665,15 @@ async def _auto_generate_mcqs_for_triplets(
     generated = 0
     mcq_ids: List[int] = []
 
+    # Triplets that already have an MCQ, looked up once for the whole batch
+    triplets_with_mcq = {
+        triplet_id for (triplet_id,) in db.query(MCQRecord.triplet_id).filter(
+            MCQRecord.triplet_id.in_([triplet.id for triplet in triplets])
+        ).distinct()
+    } if triplets else set()
+
     for triplet in triplets:
-        existing_mcq = db.query(MCQRecord).filter(MCQRecord.triplet_id == triplet.id).first()
-        if existing_mcq:
+        if triplet.id in triplets_with_mcq:
             continue
 
         prompt = _build_mcq_prompt(triplet, source)
@@ -423,7 +702,7 @@ async def _auto_generate_mcqs_for_triplets(
         mcq = MCQRecord(
             stem=mcq_draft.get("stem", ""),
             question=mcq_draft.get("question", ""),
-            options=json.dumps(options),
+            options=list(options),
             correct_option=mcq_draft.get("correct_option", 0),
             source_id=source.id,
             triplet_id=triplet.id,
@@ -434,6 +713,7 @@ async def _auto_generate_mcqs_for_triplets(
         db.add(mcq)
         db.commit()
         db.refresh(mcq)
+        triplets_with_mcq.add(triplet.id)
 
         generated += 1
         mcq_ids.append(mcq.id)
@@ -492,13 +772,14 @@ async def _auto_process_source(
 
 # ========== Source Search/Upload Handlers ==========
 
-def handle_pubmed_search(keywords: str) -> Tuple[List[Dict], str]:
+async def handle_pubmed_search(keywords: str) -> Tuple[List[Dict], str]:
     """Search PubMed and return article list plus status message."""
     if not keywords.strip():
         return [], "Please enter search keywords."
     
     try:
-        articles = pubmed_search_service(keywords, max_results=10)
+        # Batched with concurrent users' searches into shared NCBI requests
+        articles = await pubmed_batcher.process(keywords)
         if not articles:
             return [], f"No articles found for '{keywords}'."
         return articles, f"Found {len(articles)} articles for '{keywords}'."
@@ -520,20 +801,35 @@ def format_articles_markdown(articles: List[Dict]) -> str:
     return "\n".join(lines)
 
 
-async def _process_article_selection(article: Dict, model_id: str) -> str:
-    """Shared ingestion logic for a PubMed article dict."""
-    db = SessionLocal()
-    try:
-        source_dict = register_pubmed_source(article, db)
-        source = db.query(Source).filter(Source.id == source_dict["id"]).first()
-        if not source:
-            return "Source registration failed."
-
-        _ensure_pending_source(db, source)
+def _process_article_selection(articles: List[Dict]) -> List[str]:
+    """
+    Register PubMed article dicts and queue them for review on one session.
+    
+    Each article is registered in its own savepoint, so a bad record only
+    fails its own entry; the registered ones are then queued with one
+    statement and everything is committed once.
+    """
+    messages = []
+    sources = []
+    with session_scope() as db:
+        for article in articles:
+            try:
+                with db.begin_nested():
+                    source_dict = register_pubmed_sources([article], db, commit=False)[0]
+            except Exception as e:
+                messages.append(f"Error selecting article: {e}")
+                continue
+            source = db.get(Source, source_dict["id"])
+            if not source:
+                messages.append("Source registration failed.")
+                continue
+            sources.append(source)
+            messages.append(f"Article queued for MCQ review: {source.title or source.source_id}")
+
+        _ensure_pending_sources(db, (source.id for source in sources))
+    for source in sources:
         pending_mcq_cache.pop(source.id, None)
-        return f"Article queued for MCQ review: {source.title or source.source_id}"
-    finally:
-        db.close()
+    return messages
 
 
 async def handle_article_selection_from_input(
@@ -566,14 +862,16 @@ async def handle_article_selection_from_input(
     if not indices:
         return "No valid article numbers provided." + (" " + " ".join(warnings) if warnings else "")
     
-    messages = []
-    for idx in sorted(set(indices)):
-        article = articles_state[idx]
-        try:
-            msg = await _process_article_selection(article, model_id)
-            messages.append(f"[{idx + 1}] {msg}")
-        except Exception as e:
-            messages.append(f"[{idx + 1}] Error selecting article: {e}")
+    selected = sorted(set(indices))
+    try:
+        # All selected articles share one session (each with its own savepoint),
+        # on the database thread pool so the calls don't stall other users' requests
+        results = await run_db(
+            _process_article_selection, [articles_state[idx] for idx in selected]
+        )
+    except Exception as e:
+        results = [f"Error selecting article: {e}"] * len(selected)
+    messages = [f"[{idx + 1}] {msg}" for idx, msg in zip(selected, results)]
     
     if warnings:
         messages.append("Warnings: " + " ".join(warnings))
@@ -591,10 +889,20 @@ def _coerce_result_to_dict(result: object) -> Dict:
             text_value = getattr(part, "text", None)
             if text_value:
                 texts.append(text_value)
+        if len(texts) > 1:
+            # Parts usually hold whole JSON documents: take the first object
+            # rather than joining them into text that no longer parses
+            for text_value in texts:
+                try:
+                    decoded = _json_loads(text_value)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(decoded, dict):
+                    return decoded
         if texts:
             joined = "\n".join(texts).strip()
             try:
-                return json.loads(joined)
+                return _json_loads(joined)
             except json.JSONDecodeError:
                 return {"raw_text": joined}
     return {}
@@ -606,44 +914,40 @@ def handle_pdf_upload(file, model_id: str) -> str:
         return "No file uploaded."
     
     try:
-        # Read PDF bytes
-        with open(file.name, 'rb') as f:
-            pdf_bytes = f.read()
-        
-        # Register PDF source (creates parent + chunks)
-        db = SessionLocal()
-        try:
-            source_dict = register_pdf_source(file.name, pdf_bytes, db)
-            parent_source = db.query(Source).filter(Source.id == source_dict["id"]).first()
+        # Register PDF source (creates parent + chunks), parsed straight from the upload's temp file
+        with session_scope() as db:
+            source_dict = register_pdf_source(file.name, db)
+            parent_source = db.get(Source, source_dict["id"])
             if not parent_source:
                 return "Failed to register PDF source."
 
-            # Add all chunk sources to pending queue (not the parent)
-            chunk_sources = db.query(Source).filter(
-                Source.parent_source_id == parent_source.id
-            ).all()
+            # Add all chunk sources to pending queue (not the parent); ids only
+            chunk_ids = [
+                chunk_id for (chunk_id,) in db.query(Source.id).filter(
+                    Source.parent_source_id == parent_source.id
+                )
+            ]
             
-            chunks_added = 0
-            for chunk_source in chunk_sources:
-                _ensure_pending_source(db, chunk_source)
-                pending_mcq_cache.pop(chunk_source.id, None)
-                chunks_added += 1
+            _ensure_pending_sources(db, chunk_ids)
+            for chunk_id in chunk_ids:
+                pending_mcq_cache.pop(chunk_id, None)
+            chunks_added = len(chunk_ids)
             
             if chunks_added > 0:
                 return f"PDF processed: {chunks_added} section(s) queued for MCQ review from '{parent_source.title or parent_source.source_id}'"
             else:
                 return f"PDF processed but no sections found: {parent_source.title or parent_source.source_id}"
-        finally:
-            db.close()
     except Exception as e:
         return f"Error processing PDF: {e}"
 
 
 # ========== MCQ Review Handlers ==========
 
-def _parse_source_choice(choice: str) -> Optional[int]:
+def _parse_source_choice(choice: Union[int, str, None]) -> Optional[int]:
     if not choice:
         return None
+    if isinstance(choice, int):
+        return choice
     return int(choice.split("|", 1)[0].strip())
 
 
@@ -655,9 +959,8 @@ def _parse_mcq_choice(choice: str) -> Optional[int]:
 
 def load_articles_for_mcq_dropdown() -> Tuple[gr.Dropdown, str]:
     """Load recent articles for MCQ review dropdown."""
-    db = SessionLocal()
-    try:
-        sources = db.query(Source).order_by(Source.created_at.desc()).limit(20).all()
+    with session_scope() as db:
+        sources = db.query(Source.id, Source.title).order_by(Source.created_at.desc()).limit(20).all()
         choices = [
             f"{source.id} | {source.title or 'Untitled Source'}"
             for source in sources
@@ -668,8 +971,6 @@ def load_articles_for_mcq_dropdown() -> Tuple[gr.Dropdown, str]:
             gr.update(choices=choices, value=choices[0], visible=True),
             f"Loaded {len(choices)} recent articles.",
         )
-    finally:
-        db.close()
 
 
 async def handle_regenerate_mcq(mcq_choice: str, model_id: str) -> Tuple[str, str, str, Optional[int]]:
@@ -678,13 +979,12 @@ async def handle_regenerate_mcq(mcq_choice: str, model_id: str) -> Tuple[str, st
     if not mcq_id:
         return "*Select an MCQ first*", "", "", None
 
-    db = SessionLocal()
-    try:
-        mcq = db.query(MCQRecord).filter(MCQRecord.id == mcq_id).first()
+    with session_scope() as db:
+        mcq = db.get(MCQRecord, mcq_id)
         if not mcq:
             return "MCQ not found.", "", "", None
-        triplet = db.query(Triplet).filter(Triplet.id == mcq.triplet_id).first()
-        source = db.query(Source).filter(Source.id == mcq.source_id).first()
+        triplet = db.get(Triplet, mcq.triplet_id)
+        source = db.get(Source, mcq.source_id)
         if not triplet or not source:
             return "Associated triplet/source not found.", "", "", None
 
@@ -705,7 +1005,7 @@ async def handle_regenerate_mcq(mcq_choice: str, model_id: str) -> Tuple[str, st
 
         options = mcq_draft.get("options", [])
         if len(options) == 5:
-            mcq.options = json.dumps(options)
+            mcq.options = list(options)
         mcq.stem = mcq_draft.get("stem", mcq.stem)
         mcq.question = mcq_draft.get("question", mcq.question)
         mcq.correct_option = mcq_draft.get("correct_option", mcq.correct_option)
@@ -716,49 +1016,95 @@ async def handle_regenerate_mcq(mcq_choice: str, model_id: str) -> Tuple[str, st
 
         html = format_original_mcq(mcq, source, triplet)
         return html, mcq.visual_prompt or "", mcq.visual_triplet or "", mcq.id
-    finally:
-        db.close()
-
-
-def generate_mcq_for_pending_article(source_choice: str, model_id: str) -> Tuple[str, str, str]:
-    """Generate MCQ draft for a pending article and cache it in memory."""
-    source_id = _parse_source_choice(source_choice)
-    if not source_id:
-        return "*Select a pending article first.*", "", ""
 
-    db = SessionLocal()
-    try:
-        source = db.query(Source).filter(Source.id == source_id).first()
-        if not source:
-            return "Article not found.", "", ""
 
-        article_payload = _source_to_article_payload(source)
-        result = generate_mcq_with_triplets(article_payload, model_id=model_id)
-        if not result.success or not result.payload:
-            return result.message or "MCQ generation failed. Please retry.", "", ""
+# Partial "stem"/"question" string values in a JSON response still being
+# streamed; the closing quote may not have arrived yet
+_PARTIAL_FIELD_RE = re.compile(r'"(stem|question)"\s*:\s*"((?:[^"\\]|\\.)*)')
+# Minimum seconds between streamed preview updates sent to the browser
+STREAM_PREVIEW_INTERVAL = 0.15
 
-        payload = result.payload
-        mcq_draft = payload.get("mcq") or payload.get("mcq_draft")
-        triplets = payload.get("triplets") or []
-        visual_prompt = payload.get("visual_prompt") or ""
 
-        if not mcq_draft or not triplets:
-            return "MCQ generation failed. Please retry.", "", ""
+def _partial_draft_preview(raw_text: str) -> Optional[str]:
+    """Markdown preview of the stem/question text received so far, if any."""
+    fields = {}
+    for name, value in _PARTIAL_FIELD_RE.findall(raw_text):
+        try:
+            # A trailing backslash is the first half of an escape not yet received
+            fields[name] = json.loads('"' + value.rstrip("\\") + '"')
+        except json.JSONDecodeError:
+            fields[name] = value
+    if not fields:
+        return None
+    lines = ["### Drafting MCQ…"]
+    if fields.get("stem"):
+        lines.append(f"**Clinical Stem:** {fields['stem']}")
+    if fields.get("question"):
+        lines.append(f"**Question:** {fields['question']}")
+    return "\n\n".join(lines)
 
-        visual_payload = {"optimized_visual_prompt": visual_prompt}
 
-        pending_mcq_cache[source_id] = {
-            "mcq": mcq_draft,
-            "visual": visual_payload,
-            "triplets": triplets,
-            "timestamp": time.time(),
-        }
+def generate_mcq_for_pending_article(source_choice: str, model_id: str) -> Iterator[Tuple[str, str, str]]:
+    """Generate MCQ draft for a pending article and cache it in memory.
+    
+    Yields a growing preview while the model streams its response, then the
+    final draft displays.
+    """
+    source_id = _parse_source_choice(source_choice)
+    if not source_id:
+        yield "*Select a pending article first.*", "", ""
+        return
+
+    with session_scope() as db:
+        source = db.get(Source, source_id)
+    if not source:
+        yield "Article not found.", "", ""
+        return
+
+    # The session is closed before the LLM call, so no pooled connection
+    # sits idle for the seconds a generation takes
+    article_payload = _source_to_article_payload(source)
+    yield "*Generating MCQ draft…*", "", ""
+    received: List[str] = []
+    result = None
+    last_preview = time.monotonic()
+    for item in stream_mcq_with_triplets(article_payload, model_id=model_id):
+        if isinstance(item, GeminiResult):
+            result = item
+            break
+        received.append(item)
+        now = time.monotonic()
+        if now - last_preview >= STREAM_PREVIEW_INTERVAL:
+            preview = _partial_draft_preview("".join(received))
+            if preview:
+                last_preview = now
+                yield preview, "", ""
+    if result is None or not result.success or not result.payload:
+        message = result.message if result is not None else ""
+        yield message or "MCQ generation failed. Please retry.", "", ""
+        return
+
+    payload = result.payload
+    mcq_draft = payload.get("mcq") or payload.get("mcq_draft")
+    triplets = payload.get("triplets") or []
+    visual_prompt = payload.get("visual_prompt") or ""
+
+    if not mcq_draft or not triplets:
+        yield "MCQ generation failed. Please retry.", "", ""
+        return
+
+    visual_payload = {"optimized_visual_prompt": visual_prompt}
+
+    pending_mcq_cache[source_id] = {
+        "mcq": mcq_draft,
+        "visual": visual_payload,
+        "triplets": triplets,
+        "timestamp": time.time(),
+    }
 
-        mcq_html = _format_mcq_preview_from_dict(mcq_draft, source)
-        triplet_md = _format_triplets_markdown(triplets)
-        return mcq_html, visual_prompt, triplet_md
-    finally:
-        db.close()
+    mcq_html = _format_mcq_preview_from_dict(mcq_draft, source)
+    triplet_md = _format_triplets_markdown(triplets)
+    yield mcq_html, visual_prompt, triplet_md
 
 
 def apply_mcq_feedback(source_choice: str, feedback: str, model_id: str) -> Tuple[str, str, str]:
@@ -769,54 +1115,51 @@ def apply_mcq_feedback(source_choice: str, feedback: str, model_id: str) -> Tupl
     if not feedback.strip():
         return "Provide feedback before requesting an update.", "", ""
 
-    db = SessionLocal()
-    try:
-        source = db.query(Source).filter(Source.id == source_id).first()
-        if not source:
-            return "Article not found.", "", ""
-
-        previous_mcq = pending_mcq_cache.get(source_id, {}).get("mcq", {})
-        article_payload = _source_to_article_payload(source)
-        regen_payload = {
-            "mcq": previous_mcq,
-            "triplets": pending_mcq_cache.get(source_id, {}).get("triplets", []),
-            "visual_prompt": pending_mcq_cache.get(source_id, {}).get("visual", {}).get("optimized_visual_prompt", ""),
-        }
-        
-        # Use LoopAgent refinement (falls back to direct feedback if LoopAgent fails early)
-        result = regenerate_mcq_with_loop_refinement(
-            article_payload, 
-            regen_payload, 
-            feedback, 
-            model_id=model_id,
-            max_iterations=2
-        )
-        
-        if not result.success or not result.payload:
-            return result.message or "MCQ regeneration failed. Please retry.", "", ""
+    with session_scope() as db:
+        source = db.get(Source, source_id)
+    if not source:
+        return "Article not found.", "", ""
+
+    cache_entry = pending_mcq_cache.get(source_id) or {}
+    article_payload = _source_to_article_payload(source)
+    regen_payload = {
+        "mcq": cache_entry.get("mcq", {}),
+        "triplets": cache_entry.get("triplets", []),
+        "visual_prompt": cache_entry.get("visual", {}).get("optimized_visual_prompt", ""),
+    }
+    
+    # Use LoopAgent refinement (falls back to direct feedback if LoopAgent fails early)
+    result = regenerate_mcq_with_loop_refinement(
+        article_payload, 
+        regen_payload, 
+        feedback, 
+        model_id=model_id,
+        max_iterations=2
+    )
+    
+    if not result.success or not result.payload:
+        return result.message or "MCQ regeneration failed. Please retry.", "", ""
 
-        payload = result.payload
-        mcq_draft = payload.get("mcq") or payload.get("mcq_draft")
-        triplets = payload.get("triplets") or []
-        visual_prompt = payload.get("visual_prompt") or ""
+    payload = result.payload
+    mcq_draft = payload.get("mcq") or payload.get("mcq_draft")
+    triplets = payload.get("triplets") or []
+    visual_prompt = payload.get("visual_prompt") or ""
 
-        if not mcq_draft or not triplets:
-            return "MCQ regeneration failed. Please retry.", "", ""
+    if not mcq_draft or not triplets:
+        return "MCQ regeneration failed. Please retry.", "", ""
 
-        visual_payload = {"optimized_visual_prompt": visual_prompt}
+    visual_payload = {"optimized_visual_prompt": visual_prompt}
 
-        pending_mcq_cache[source_id] = {
-            "mcq": mcq_draft,
-            "visual": visual_payload,
-            "triplets": triplets,
-            "timestamp": time.time(),
-        }
+    pending_mcq_cache[source_id] = {
+        "mcq": mcq_draft,
+        "visual": visual_payload,
+        "triplets": triplets,
+        "timestamp": time.time(),
+    }
 
-        mcq_html = _format_mcq_preview_from_dict(mcq_draft, source)
-        triplet_md = _format_triplets_markdown(triplets)
-        return mcq_html, visual_prompt, triplet_md
-    finally:
-        db.close()
+    mcq_html = _format_mcq_preview_from_dict(mcq_draft, source)
+    triplet_md = _format_triplets_markdown(triplets)
+    return mcq_html, visual_prompt, triplet_md
 
 
 def handle_accept_mcq(source_choice: str, visual_prompt: str) -> Tuple[str, Optional[int]]:
@@ -829,78 +1172,76 @@ def handle_accept_mcq(source_choice: str, visual_prompt: str) -> Tuple[str, Opti
     if not cache_entry:
         return "Generate an MCQ before accepting.", None
 
-    db = SessionLocal()
-    try:
-        source = db.query(Source).filter(Source.id == source_id).first()
-        if not source:
-            return "Article not found.", None
-
-        mcq_draft = cache_entry.get("mcq", {})
-        triplets = cache_entry.get("triplets", [])
-        options = mcq_draft.get("options", [])
-        if len(options) != 5:
-            return "MCQ draft must contain exactly 5 options before acceptance.", None
-
-        # Persist triplets
-        primary_triplet_id: Optional[int] = None
-        for triplet_data in triplets:
-            stored_triplet = upsert_triplet(
-                db=db,
-                subject=triplet_data.get("subject", "").strip(),
-                action=triplet_data.get("action", "").strip(),
-                object=triplet_data.get("object", "").strip(),
-                relation=triplet_data.get("relation", "INDICATES").strip(),
-                source_id=source.id,
-                context_sentences=_normalize_context_sentences(triplet_data.get("context_sentences")),
-                schema_valid=True,
-                status="accepted",
-            )
-            if primary_triplet_id is None:
-                primary_triplet_id = stored_triplet.id
-
-        visual_prompt_text = (visual_prompt or "").strip()
-        mcq = MCQRecord(
-            stem=mcq_draft.get("stem", ""),
-            question=mcq_draft.get("question", ""),
-            options=json.dumps(options),
-            correct_option=mcq_draft.get("correct_option", 0),
-            source_id=source.id,
-            triplet_id=primary_triplet_id,
-            visual_prompt=visual_prompt_text,
-            status="approved",  # Changed from "pending" to "approved" when user accepts
+    mcq_draft = cache_entry.get("mcq", {})
+    triplets = cache_entry.get("triplets", [])
+    options = mcq_draft.get("options", [])
+    if len(options) != 5:
+        return "MCQ draft must contain exactly 5 options before acceptance.", None
+
+    with session_scope() as db:
+        # Remove the pending source first; the row count makes a double-click (or
+        # a second reviewer) a no-op instead of a duplicate MCQ. A queued row also
+        # proves the source exists (foreign key), so the source is never loaded.
+        removed = db.query(PendingSource).filter(PendingSource.source_id == source_id).delete()
+        if not removed:
+            return "Article is no longer pending (already reviewed?).", None
+
+        # Persist triplets in the same transaction as the MCQ and the dequeue
+        stored_triplets = upsert_triplets_bulk(db, [
+            {
+                "subject": triplet_data.get("subject", "").strip(),
+                "action": triplet_data.get("action", "").strip(),
+                "object": triplet_data.get("object", "").strip(),
+                "relation": triplet_data.get("relation", "INDICATES").strip(),
+                "source_id": source_id,
+                "context_sentences": _normalize_context_sentences(triplet_data.get("context_sentences")),
+                "schema_valid": True,
+                "status": "accepted",
+            }
+            for triplet_data in triplets
+        ], commit=False)
+        primary_triplet_id: Optional[int] = stored_triplets[0].id if stored_triplets else None
+
+        # Core INSERT ... RETURNING: the id comes back without an ORM flush
+        mcq_id = db.scalar(
+            insert(MCQRecord).values(
+                stem=mcq_draft.get("stem", ""),
+                question=mcq_draft.get("question", ""),
+                options=list(options),
+                correct_option=mcq_draft.get("correct_option", 0),
+                source_id=source_id,
+                triplet_id=primary_triplet_id,
+                visual_prompt=(visual_prompt or "").strip(),
+                status="approved",  # Changed from "pending" to "approved" when user accepts
+            ).returning(MCQRecord.id)
         )
-        db.add(mcq)
-        
-        # Remove pending source in the same transaction
-        db.query(PendingSource).filter(PendingSource.source_id == source_id).delete()
-        
+        # One commit for triplets, dequeue and MCQ
         db.commit()
-        db.refresh(mcq)
 
-        pending_mcq_cache.pop(source_id, None)
+    pending_mcq_cache.pop(source_id, None)
+    return f"MCQ accepted and stored with ID {mcq_id}.", mcq_id
 
-        return f"MCQ accepted and stored with ID {mcq.id}.", mcq.id
-    finally:
-        db.close()
 
-
-def handle_accept_visual_prompt(mcq_id: Optional[int], visual_prompt: str) -> Tuple[str, str, bool]:
+def handle_accept_visual_prompt(
+    mcq_id: Optional[int],
+    visual_prompt: str,
+    model_id: Optional[str] = None,
+) -> Tuple[str, str, bool]:
     """Persist the latest visual prompt for the stored MCQ and auto-generate image."""
     if not mcq_id:
         return "Accept the MCQ first.", visual_prompt, False
 
     prompt_text = visual_prompt.strip()
-    db = SessionLocal()
-    try:
-        mcq = db.query(MCQRecord).filter(MCQRecord.id == mcq_id).first()
-        if not mcq:
+    with session_scope() as db:
+        # Single UPDATE; the row count tells whether the MCQ exists
+        result = db.execute(
+            update(MCQRecord).where(MCQRecord.id == mcq_id).values(visual_prompt=prompt_text)
+        )
+        if not result.rowcount:
             return "MCQ not found.", visual_prompt, False
-
-        mcq.visual_prompt = prompt_text
-        db.commit()
-        return "Visual prompt saved.", prompt_text, True
-    finally:
-        db.close()
+    if prompt_text and not get_image_path(mcq_id):
+        _start_image_job(mcq_id, prompt_text, model_id)
+    return "Visual prompt saved.", prompt_text, True
 
 
 def load_stored_mcq_view(mcq_id: Optional[int]) -> Tuple[str, str, str, bool]:
@@ -913,8 +1254,7 @@ def load_stored_mcq_view(mcq_id: Optional[int]) -> Tuple[str, str, str, bool]:
             False,
         )
 
-    db = SessionLocal()
-    try:
+    with session_scope() as db:
         record = (
             db.query(MCQRecord, Source, Triplet)
             .join(Source, MCQRecord.source_id == Source.id)
@@ -948,8 +1288,6 @@ def load_stored_mcq_view(mcq_id: Optional[int]) -> Tuple[str, str, str, bool]:
 
         saved_flag = bool(mcq.visual_prompt)
         return mcq_html, triplet_md, mcq.visual_prompt or "", saved_flag
-    finally:
-        db.close()
 
 
 def _visual_prompt_button_state(saved: bool) -> gr.Button:
@@ -959,65 +1297,90 @@ def _visual_prompt_button_state(saved: bool) -> gr.Button:
     return gr.update(value="Accept Visual Prompt", interactive=True, variant="primary")
 
 
-def _list_stored_mcqs(page: int = 1, page_size: int = 10, query: Optional[str] = None) -> Tuple[List[Tuple[MCQRecord, Source, Optional[Triplet]]], int]:
-    """Return paginated stored MCQs with optional search."""
-    db = SessionLocal()
-    try:
-        q = (
-            db.query(MCQRecord, Source, Triplet)
-            .join(Source, MCQRecord.source_id == Source.id)
-            .outerjoin(Triplet, MCQRecord.triplet_id == Triplet.id)
+def _list_stored_mcqs(
+    db: Session,
+    page: int = 1,
+    page_size: int = 10,
+    query: Optional[str] = None,
+) -> Tuple[List[Any], int]:
+    """Return paginated stored-MCQ rows (id, question, title, publication_year) with optional search."""
+    # Only the listed columns: no source text, options or triplet rows per page.
+    # The match count rides along on every row (COUNT(*) OVER ()), so the
+    # search filter is evaluated once instead of again by a separate COUNT.
+    q = (
+        db.query(
+            MCQRecord.id,
+            MCQRecord.question,
+            Source.title,
+            Source.publication_year,
+            func.count().over().label("total"),
         )
-        
-        if query:
-            like_term = f"%{query}%"
-            q = q.filter(
-                (Source.source_id.ilike(like_term))
-                | (Source.title.ilike(like_term))
-                | (Source.authors.ilike(like_term))
-                | (MCQRecord.question.ilike(like_term))
-                | (MCQRecord.stem.ilike(like_term))
-                | (Source.publication_year.cast(String).ilike(like_term))
-            )
-        
-        total = q.count()
-        total_pages = max(1, math.ceil(total / page_size)) if total else 1
-        page = max(1, min(page, total_pages))
-        
-        results = (
-            q.order_by(MCQRecord.created_at.desc())
-            .offset((page - 1) * page_size)
-            .limit(page_size)
-            .all()
+        .join(Source, MCQRecord.source_id == Source.id)
+        .order_by(MCQRecord.created_at.desc(), MCQRecord.id.desc())
+    )
+    
+    if query:
+        like_term = f"%{query}%"
+        q = q.filter(
+            (Source.source_id.ilike(like_term))
+            | (Source.title.ilike(like_term))
+            | (Source.authors.ilike(like_term))
+            | (MCQRecord.question.ilike(like_term))
+            | (MCQRecord.stem.ilike(like_term))
+            | (Source.publication_year.cast(String).ilike(like_term))
         )
-        return results, total_pages
-    finally:
-        db.close()
+    
+    page = max(1, page)
+    results = q.offset((page - 1) * page_size).limit(page_size).all()
+    if not results and page > 1:
+        # Past the last page, so no row carried the total; count and show the last page
+        total = q.order_by(None).count()
+        page = max(1, math.ceil(total / page_size))
+        results = q.offset((page - 1) * page_size).limit(page_size).all()
+    total_pages = max(1, math.ceil(results[0].total / page_size)) if results else 1
+    return results, total_pages
+
+
+def render_kb_list(page: int = 1, query: Optional[str] = None) -> Tuple[List[List[Any]], int, str]:
+    """Knowledge Base table rows with pagination (6 per page)."""
+    # One session (one pooled connection) serves the version check and the listing
+    with session_scope() as db:
+        # Any MCQ added or removed changes the count or the max id
+        version = tuple(db.query(func.count(MCQRecord.id), func.max(MCQRecord.id)).one())
+        now = time.monotonic()
+        cached = _kb_render_cache.get((page, query))
+        if cached is not None and cached[0] > now and cached[1] == version:
+            return cached[2]
+        
+        rendered = _render_kb_list(db, page, query)
+    if len(_kb_render_cache) >= KB_RENDER_MAX_ENTRIES or any(
+        entry[1] != version for entry in list(_kb_render_cache.values())
+    ):
+        _kb_render_cache.clear()
+    _kb_render_cache[(page, query)] = (now + KB_RENDER_TTL, version, rendered)
+    return rendered
 
 
-def render_kb_list(page: int = 1, query: Optional[str] = None) -> Tuple[str, int, str]:
-    """Render Knowledge Base list with pagination (6 per page)."""
-    results, total_pages = _list_stored_mcqs(page, 6, query)
+def _render_kb_list(db: Session, page: int, query: Optional[str]) -> Tuple[List[List[Any]], int, str]:
+    results, total_pages = _list_stored_mcqs(db, page, 6, query)
     
     if not results:
-        return "*No MCQs found.*", 1, "Page 1/1"
+        return [], 1, "No MCQs found."
     
-    lines = ["### Stored MCQs (6 per page)\n"]
-    for mcq, source, triplet in results:
-        year = source.publication_year or "Year N/A"
-        title = source.title or "Untitled"
+    # Plain rows for the KB table (KB_LIST_HEADERS); the browser renders them
+    rows = []
+    for mcq in results:
+        year = mcq.publication_year or "Year N/A"
+        title = mcq.title or "Untitled"
         question_preview = mcq.question[:80] + "..." if len(mcq.question) > 80 else mcq.question
-        lines.append(
-            f"**MCQ ID: {mcq.id}** | {title} ({year})\n"
-            f"Question: {question_preview}\n"
-            "---\n"
-        )
+        rows.append([mcq.id, f"{title} ({year})", question_preview])
     
+    page = min(page, total_pages)
     info = f"Page {page}/{total_pages} ({len(results)} shown)"
-    return "\n".join(lines), page, info
+    return rows, page, info
 
 
-def search_stored_mcqs(query: str) -> Tuple[str, int, str]:
+def search_stored_mcqs(query: str) -> Tuple[List[List[Any]], int, str]:
     """Search stored MCQs by various criteria."""
     query = (query or "").strip()
     return render_kb_list(1, query if query else None)
@@ -1025,8 +1388,7 @@ def search_stored_mcqs(query: str) -> Tuple[str, int, str]:
 
 def get_mcq_detail(mcq_id: int) -> Tuple[str, str, Optional[gr.Image], str]:
     """Get detailed view of an MCQ formatted like Tab 2, including triplets, visual prompt, and image."""
-    db = SessionLocal()
-    try:
+    with session_scope() as db:
         result = (
             db.query(MCQRecord, Source, Triplet)
             .join(Source, MCQRecord.source_id == Source.id)
@@ -1066,7 +1428,7 @@ def get_mcq_detail(mcq_id: int) -> Tuple[str, str, Optional[gr.Image], str]:
         image_status = ""
         if mcq.image_url:
             image_path = get_image_path(mcq_id)
-            if image_path and image_path.exists():
+            if image_path:
                 try:
                     image = Image.open(image_path)
                     image_display = gr.update(value=image, visible=True)
@@ -1079,27 +1441,40 @@ def get_mcq_detail(mcq_id: int) -> Tuple[str, str, Optional[gr.Image], str]:
             image_status = "No image stored for this MCQ."
         
         return mcq_html, triplet_md, image_display, image_status
-    finally:
-        db.close()
 
 
 def export_all_mcq(mcq_id: int) -> Optional[str]:
     """Export MCQ, visual prompt, and image info as a downloadable .txt file."""
-    db = SessionLocal()
     try:
-        result = (
-            db.query(MCQRecord, Source, Triplet)
-            .join(Source, MCQRecord.source_id == Source.id)
-            .outerjoin(Triplet, MCQRecord.triplet_id == Triplet.id)
-            .filter(MCQRecord.id == mcq_id)
-            .first()
-        )
-        
-        if not result:
+        with session_scope() as db:
+            # Only the exported columns, as one row (triplet columns are None without a triplet)
+            row = db.execute(
+                select(
+                    MCQRecord.id,
+                    MCQRecord.stem,
+                    MCQRecord.question,
+                    MCQRecord.options,
+                    MCQRecord.correct_option,
+                    MCQRecord.visual_prompt,
+                    MCQRecord.image_url,
+                    Source.title,
+                    Source.source_id,
+                    Source.authors,
+                    Source.publication_year,
+                    Triplet.subject,
+                    Triplet.action,
+                    Triplet.object,
+                    Triplet.relation,
+                )
+                .join(Source, MCQRecord.source_id == Source.id)
+                .outerjoin(Triplet, MCQRecord.triplet_id == Triplet.id)
+                .where(MCQRecord.id == mcq_id)
+            ).first()
+        if not row:
             return None
         
-        mcq, source, triplet = result
-        options = json.loads(mcq.options)
+        # The row is plain data: format and write the file after the session has closed
+        options = row.options or []
         
         # Build comprehensive export text
         lines = [
@@ -1107,59 +1482,59 @@ def export_all_mcq(mcq_id: int) -> Optional[str]:
             "MCQ EXPORT",
             "=" * 80,
             "",
-            f"MCQ ID: {mcq.id}",
-            f"Source: {source.title or 'Untitled'} ({source.source_id})",
-            f"Authors: {source.authors or 'N/A'}",
-            f"Year: {source.publication_year or 'N/A'}",
+            f"MCQ ID: {row.id}",
+            f"Source: {row.title or 'Untitled'} ({row.source_id})",
+            f"Authors: {row.authors or 'N/A'}",
+            f"Year: {row.publication_year or 'N/A'}",
             "",
             "-" * 80,
             "MCQ CONTENT",
             "-" * 80,
             "",
-            f"Stem: {mcq.stem}",
+            f"Stem: {row.stem}",
             "",
-            f"Question: {mcq.question}",
+            f"Question: {row.question}",
             "",
             "Options:",
         ]
         
         for idx, opt in enumerate(options):
-            marker = " [CORRECT]" if idx == mcq.correct_option else ""
+            marker = " [CORRECT]" if idx == row.correct_option else ""
             lines.append(f"  {chr(65+idx)}) {opt}{marker}")
         
-        if triplet:
+        if row.subject is not None:
             lines.extend([
                 "",
                 "-" * 80,
                 "TRIPLET INFORMATION",
                 "-" * 80,
                 "",
-                f"Subject: {triplet.subject}",
-                f"Action: {triplet.action}",
-                f"Object: {triplet.object}",
-                f"Relation: {triplet.relation}",
+                f"Subject: {row.subject}",
+                f"Action: {row.action}",
+                f"Object: {row.object}",
+                f"Relation: {row.relation}",
             ])
         
-        if mcq.visual_prompt:
+        if row.visual_prompt:
             lines.extend([
                 "",
                 "-" * 80,
                 "VISUAL PROMPT",
                 "-" * 80,
                 "",
-                mcq.visual_prompt,
+                row.visual_prompt,
             ])
         
-        if mcq.image_url:
+        if row.image_url:
             image_path = get_image_path(mcq_id)
-            if image_path and image_path.exists():
+            if image_path:
                 lines.extend([
                     "",
                     "-" * 80,
                     "IMAGE INFORMATION",
                     "-" * 80,
                     "",
-                    f"Image Path: {mcq.image_url}",
+                    f"Image Path: {row.image_url}",
                     f"Image File: {image_path}",
                     f"Image Status: Available",
                 ])
@@ -1170,7 +1545,7 @@ def export_all_mcq(mcq_id: int) -> Optional[str]:
                     "IMAGE INFORMATION",
                     "-" * 80,
                     "",
-                    f"Image Path: {mcq.image_url}",
+                    f"Image Path: {row.image_url}",
                     f"Image Status: File not found",
                 ])
         else:
@@ -1183,58 +1558,49 @@ def export_all_mcq(mcq_id: int) -> Optional[str]:
                 "Image Status: No image available",
             ])
         
-        # Create temporary file
-        content = "\n".join(lines)
-        temp_file = tempfile.NamedTemporaryFile(
-            mode='w',
-            suffix='.txt',
-            prefix=f'mcq_{mcq_id}_',
-            delete=False
-        )
-        temp_file.write(content)
-        temp_file.close()
+        # Content-addressed file: re-exporting an unchanged MCQ returns the
+        # existing file instead of writing a new temp file per click
+        content = "\n".join(lines).encode("utf-8")
+        EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+        export_path = EXPORT_DIR / f"mcq_{mcq_id}_{hashlib.sha256(content).hexdigest()[:16]}.txt"
+        if not export_path.exists():
+            # Written under a temporary name and renamed, so a concurrent
+            # export never sees a partial file
+            with tempfile.NamedTemporaryFile(dir=EXPORT_DIR, suffix=".tmp", delete=False) as temp_file:
+                temp_file.write(content)
+            os.replace(temp_file.name, export_path)
         
-        return temp_file.name
+        return str(export_path)
     except Exception as e:
         logger.error(f"Error exporting MCQ {mcq_id}: {e}")
         return None
-    finally:
-        db.close()
 
 
-def open_mcq_in_builder(mcq_id: int) -> Tuple[str, str, str]:
+def open_mcq_in_builder(mcq_id: int) -> Tuple[Optional[int], str, str]:
     """Prepare to open MCQ in Tab 2 (Builder) by selecting the source article."""
-    db = SessionLocal()
-    try:
-        mcq = db.query(MCQRecord).filter(MCQRecord.id == mcq_id).first()
-        if not mcq:
-            return "", "", "MCQ not found."
-        
-        source = db.query(Source).filter(Source.id == mcq.source_id).first()
+    with session_scope() as db:
+        # Just the two source columns used below, found through the MCQ in one SELECT
+        source = (
+            db.query(Source.id, Source.source_id)
+            .join(MCQRecord, MCQRecord.source_id == Source.id)
+            .filter(MCQRecord.id == mcq_id)
+            .first()
+        ) if mcq_id else None
         if not source:
-            return "", "", "Source not found."
-        
-        # Check if source is in pending
-        pending = db.query(PendingSource).filter(PendingSource.source_id == source.id).first()
-        if not pending:
-            # Add to pending if not already there
-            db.add(PendingSource(source_id=source.id))
-            db.commit()
+            return None, "", "MCQ not found."
         
-        # Format dropdown choice
-        year = source.publication_year or "Year N/A"
-        choice = f"{source.id} | {source.source_id} | {source.title or 'Untitled'} ({year})"
+        # Queue the source unless it already is (atomic, no prior lookup)
+        _ensure_pending_sources(db, [source.id])
         
-        return choice, f"Source {source.source_id} is now available in MCQ Builder. Switch to Tab 2 to continue.", ""
-    finally:
-        db.close()
+        # Pending-article dropdown value
+        return source.id, f"Source {source.source_id} is now available in MCQ Builder. Switch to Tab 2 to continue.", ""
 
 
 def format_original_mcq(mcq: MCQRecord, source: Source, triplet: Optional[Triplet]) -> str:
     """Format MCQ for display"""
-    options = json.loads(mcq.options)
+    options = mcq.options or []
     
-    html = f"""
+    parts = [f"""
 ## Original MCQ
 **Status:** {mcq.status.title()}
 
@@ -1245,20 +1611,55 @@ def format_original_mcq(mcq: MCQRecord, source: Source, triplet: Optional[Triple
 {mcq.question}
 
 ### Options:
-"""
-    for i, option in enumerate(options, start=1):
-        marker = "(Correct) " if i - 1 == mcq.correct_option else ""
-        html += f"{marker}{chr(64+i)}) {option}\n"
+""", _format_options_md(options, mcq.correct_option)]
     
-    html += f"""
+    parts.append(f"""
 ### Provenance:
 - **Title:** {source.title}
 - **Authors:** {source.authors or 'N/A'}
 - **Source ID:** {source.source_id}
-"""
+""")
     if triplet:
-        html += f"- **Triplet:** {triplet.subject} → {triplet.action} → {triplet.object}\n"
-    return html
+        parts.append(f"- **Triplet:** {triplet.subject} → {triplet.action} → {triplet.object}\n")
+    return "".join(parts)
+
+
+def _generate_image_file(mcq_id: int, visual_prompt: str, model_id: Optional[str]) -> str:
+    """Generate and save the MCQ image; return an error message, or "" on success."""
+    result = generate_image_from_prompt(visual_prompt, DEFAULT_IMAGE_DIMENSION, model_id=model_id)
+    if not result.success or not result.image_bytes:
+        return f"Error generating image: {result.message}"
+    
+    with session_scope() as db:
+        current = db.query(MCQRecord.visual_prompt).filter(MCQRecord.id == mcq_id).scalar()
+    if (current or "").strip() != visual_prompt:
+        # A newer prompt was accepted meanwhile; its own job saves the image
+        return "Visual prompt changed while generating. Click 'Show Image' again."
+    
+    # Save image and record its path with a single UPDATE
+    image_path = save_image(mcq_id, result.image_bytes, result.extension)
+    with session_scope() as db:
+        db.execute(update(MCQRecord).where(MCQRecord.id == mcq_id).values(image_url=image_path))
+    return ""
+
+
+def _start_image_job(mcq_id: int, visual_prompt: str, model_id: Optional[str]) -> Future:
+    """Generate the image in the background unless this prompt is already being generated."""
+    with _image_jobs_lock:
+        running = _image_jobs.get(mcq_id)
+        if running is not None and running[0] == visual_prompt:
+            return running[1]
+        job = image_executor.submit(_generate_image_file, mcq_id, visual_prompt, model_id)
+        _image_jobs[mcq_id] = (visual_prompt, job)
+    job.add_done_callback(lambda done: _forget_image_job(mcq_id, done))
+    return job
+
+
+def _forget_image_job(mcq_id: int, job: Future) -> None:
+    with _image_jobs_lock:
+        running = _image_jobs.get(mcq_id)
+        if running is not None and running[1] is job:
+            del _image_jobs[mcq_id]
 
 
 def handle_show_image(mcq_id: Optional[int], model_id: Optional[str] = None) -> Tuple[gr.Image, str]:
@@ -1266,76 +1667,76 @@ def handle_show_image(mcq_id: Optional[int], model_id: Optional[str] = None) ->
     if not mcq_id:
         return gr.update(visible=False, value=None), "No MCQ selected."
     
-    # Check if image already exists
+    # Check if image already exists (get_image_path only returns existing files)
     image_file = get_image_path(mcq_id)
     
-    # If image doesn't exist, generate it first
-    if not image_file or not image_file.exists():
-        db = SessionLocal()
+    # If image doesn't exist, wait for the prefetch job or generate it now
+    if not image_file:
         try:
-            mcq = db.query(MCQRecord).filter(MCQRecord.id == mcq_id).first()
-            if not mcq:
-                return gr.update(visible=False, value=None), "MCQ not found."
-            
-            visual_prompt = (mcq.visual_prompt or "").strip()
-            if not visual_prompt:
-                return gr.update(visible=False, value=None), "No visual prompt found. Accept a visual prompt first."
-            
-            # Generate image with model_id support
-            result = generate_image_from_prompt(visual_prompt, DEFAULT_IMAGE_DIMENSION, model_id=model_id)
-            if not result.success or not result.image_bytes:
-                return gr.update(visible=False, value=None), f"Error generating image: {result.message}"
-            
-            # Save image
-            image_path = save_image(mcq_id, result.image_bytes)
-            mcq.image_url = image_path
-            db.commit()
+            with _image_jobs_lock:
+                running = _image_jobs.get(mcq_id)
+            job = running[1] if running is not None else None
+            if job is None:
+                # Only the prompt column; the session is closed before the slow image call
+                with session_scope() as db:
+                    found = db.query(MCQRecord.visual_prompt).filter(MCQRecord.id == mcq_id).first()
+                if not found:
+                    return gr.update(visible=False, value=None), "MCQ not found."
+                
+                visual_prompt = (found.visual_prompt or "").strip()
+                if not visual_prompt:
+                    return gr.update(visible=False, value=None), "No visual prompt found. Accept a visual prompt first."
+                job = _start_image_job(mcq_id, visual_prompt, model_id)
             
-            # Return status - user needs to click again to see it
-            return gr.update(visible=False, value=None), f"Image generated and saved. Click 'Show Image' again to display."
+            error = job.result()
+            if error:
+                return gr.update(visible=False, value=None), error
+            image_file = get_image_path(mcq_id)
+            if not image_file:
+                return gr.update(visible=False, value=None), "Error generating image: file was not saved."
         except Exception as exc:
             return gr.update(visible=False, value=None), f"Error generating image: {exc}"
-        finally:
-            db.close()
     
     # Image exists, load and display it
     try:
-        with Image.open(image_file) as img:
-            # Convert to RGB if necessary (Gradio works better with RGB)
-            if img.mode in ('RGBA', 'LA', 'P'):
-                rgb_img = Image.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-                rgb_img.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
-                image_copy = rgb_img.copy()
-            else:
-                image_copy = img.convert('RGB').copy()
-        
+        image_copy = _load_display_image(str(image_file), image_file.stat().st_mtime_ns)
         return gr.update(value=image_copy, visible=True), f"Image loaded from {image_file.name}"
     except Exception as exc:
         return gr.update(visible=False, value=None), f"Error loading image: {exc}"
 
 
+# Decoded RGB images keyed by (path, mtime): a re-saved file has a new key, and
+# repeat "Show Image" clicks skip the decode. Callers never mutate the result.
+@functools.lru_cache(maxsize=16)
+def _load_display_image(path: str, mtime_ns: int) -> Image.Image:
+    with Image.open(path) as img:
+        # Convert to RGB if necessary (Gradio works better with RGB). Both
+        # branches build a new, fully loaded image that outlives the file.
+        if img.mode in ('RGBA', 'LA', 'P'):
+            rgb_img = Image.new('RGB', img.size, (255, 255, 255))
+            if img.mode == 'P':
+                img = img.convert('RGBA')
+            rgb_img.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
+            return rgb_img
+        return img.convert('RGB')
+
+
 def handle_delete_image(mcq_id: Optional[int]) -> Tuple[gr.Image, str]:
     """Delete image file and update database."""
     if not mcq_id:
         return gr.update(visible=False, value=None), "No MCQ selected."
     
-    db = SessionLocal()
-    try:
-        mcq = db.query(MCQRecord).filter(MCQRecord.id == mcq_id).first()
-        if not mcq:
+    with session_scope() as db:
+        # Single UPDATE; the row count tells whether the MCQ exists
+        result = db.execute(update(MCQRecord).where(MCQRecord.id == mcq_id).values(image_url=None))
+        if not result.rowcount:
             return gr.update(visible=False, value=None), "MCQ not found."
         
-        deleted = delete_image(mcq_id)
-        if deleted:
-            mcq.image_url = None
-            db.commit()
-            return gr.update(visible=False, value=None), "Image deleted successfully."
-        else:
+        if not delete_image(mcq_id):
+            # Nothing on disk: keep the stored image URL as it was
+            db.rollback()
             return gr.update(visible=False, value=None), "No image found to delete."
-    finally:
-        db.close()
+        return gr.update(visible=False, value=None), "Image deleted successfully."
 
 
 def update_llm_model(model_id: str) -> Tuple[str, str]:
@@ -1411,8 +1812,8 @@ def create_interface():
                             pending_next_btn = gr.Button("Next ▶", variant="secondary")
                             pending_clear_btn = gr.Button("Clear Pending", variant="stop")
 
-                def search_wrapper(keywords):
-                    articles, message = handle_pubmed_search(keywords)
+                async def search_wrapper(keywords):
+                    articles, message = await handle_pubmed_search(keywords)
                     results_text = f"{message}\n\n{format_articles_markdown(articles)}" if articles else message
                     if articles:
                         input_update = gr.update(interactive=True, value="")
@@ -1430,26 +1831,27 @@ def create_interface():
                     outputs=[search_results, articles_state, selection_input, select_articles_btn, selection_status]
                 )
 
-                selection_event = select_articles_btn.click(
-                    fn=lambda choice, articles, model_id: asyncio.run(
-                        handle_article_selection_from_input(choice, articles, model_id)
-                    ),
+                # Each handler returns its status and the refreshed pending panel
+                # together: one queue round trip instead of a chained .then()
+                async def selection_wrapper(selection, articles, model_id):
+                    status = await handle_article_selection_from_input(selection, articles, model_id)
+                    return (status, *await run_db(refresh_pending_default))
+
+                select_articles_btn.click(
+                    fn=selection_wrapper,
                     inputs=[selection_input, articles_state, llm_model_state],
-                    outputs=[selection_status]
-                )
-                selection_event.then(
-                    fn=refresh_pending_default,
-                    outputs=[pending_display, pending_page_state, pending_info]
+                    outputs=[selection_status, pending_display, pending_page_state, pending_info]
                 )
 
-                upload_event = pdf_upload.change(
-                    fn=lambda file, model_id: handle_pdf_upload(file, model_id),
+                def upload_wrapper(file, model_id):
+                    return (handle_pdf_upload(file, model_id), *refresh_pending_default())
+
+                pdf_upload.change(
+                    fn=upload_wrapper,
                     inputs=[pdf_upload, llm_model_state],
-                    outputs=upload_status
-                )
-                upload_event.then(
-                    fn=refresh_pending_default,
-                    outputs=[pending_display, pending_page_state, pending_info]
+                    outputs=[upload_status, pending_display, pending_page_state, pending_info],
+                    concurrency_id="pdf",
+                    concurrency_limit=PDF_CONCURRENCY,
                 )
 
                 pending_prev_btn.click(
@@ -1514,7 +1916,7 @@ def create_interface():
                         
                         gr.Markdown("---")
                         gr.Markdown("### Image (Auto-generated on Accept)")
-                        show_image_btn = gr.Button("Show Image (first click generates, second click loads, third click displays 😞)", variant="secondary")
+                        show_image_btn = gr.Button("Show Image", variant="secondary")
                         delete_image_btn = gr.Button("Delete Image", variant="secondary")
                         image_display = gr.Image(label="Generated Image", visible=False, type="pil")
                         image_status = gr.Textbox(label="Image Status", interactive=False, visible=True)
@@ -1524,85 +1926,90 @@ def create_interface():
                     outputs=[pending_article_dropdown, builder_article_status]
                 )
 
-                generate_event = generate_mcq_btn.click(
-                    fn=generate_mcq_for_pending_article,
+                # Builder handlers return the saved-prompt flag and button state
+                # with their own outputs: one queue round trip per click instead
+                # of a chain of .then() calls
+                draft_outputs = [
+                    mcq_display, visual_prompt_display, triplet_display,
+                    visual_prompt_saved_state, accept_visual_prompt_btn,
+                ]
+
+                def generate_wrapper(choice, model_id):
+                    # Generator: Gradio streams each preview to the browser
+                    for displays in generate_mcq_for_pending_article(choice, model_id):
+                        yield (*displays, False, _visual_prompt_button_state(False))
+
+                def feedback_wrapper(choice, feedback, model_id):
+                    displays = apply_mcq_feedback(choice, feedback, model_id)
+                    return (*displays, False, _visual_prompt_button_state(False))
+
+                generate_mcq_btn.click(
+                    fn=generate_wrapper,
                     inputs=[pending_article_dropdown, llm_model_state],
-                    outputs=[mcq_display, visual_prompt_display, triplet_display]
+                    outputs=draft_outputs,
+                    concurrency_id="llm",
+                    concurrency_limit=GRADIO_LLM_CONCURRENCY,
                 )
-                generate_event = generate_event.then(
-                    fn=lambda: False,
-                    outputs=visual_prompt_saved_state
-                )
-                generate_event.then(
-                    fn=_visual_prompt_button_state,
-                    inputs=visual_prompt_saved_state,
-                    outputs=accept_visual_prompt_btn
-                )
-
-                feedback_event = apply_feedback_btn.click(
-                    fn=apply_mcq_feedback,
+                apply_feedback_btn.click(
+                    fn=feedback_wrapper,
                     inputs=[pending_article_dropdown, mcq_feedback_input, llm_model_state],
-                    outputs=[mcq_display, visual_prompt_display, triplet_display]
-                )
-                feedback_event = feedback_event.then(
-                    fn=lambda: False,
-                    outputs=visual_prompt_saved_state
-                )
-                feedback_event.then(
-                    fn=_visual_prompt_button_state,
-                    inputs=visual_prompt_saved_state,
-                    outputs=accept_visual_prompt_btn
+                    outputs=draft_outputs,
+                    concurrency_id="llm",
+                    concurrency_limit=GRADIO_LLM_CONCURRENCY,
                 )
 
-                accept_mcq_event = accept_mcq_btn.click(
-                    fn=lambda choice, prompt: handle_accept_mcq(choice, prompt),
+                def accept_mcq_wrapper(choice, prompt):
+                    status, mcq_id = handle_accept_mcq(choice, prompt)
+                    pending_html, pending_cursor, pending_page_info = refresh_pending_default()
+                    dropdown_update, _ = load_pending_articles_dropdown()
+                    mcq_html, triplet_md, stored_prompt, saved = load_stored_mcq_view(mcq_id)
+                    return (
+                        status, mcq_id,
+                        pending_html, pending_cursor, pending_page_info,
+                        dropdown_update,
+                        mcq_html, triplet_md, stored_prompt, saved,
+                        _visual_prompt_button_state(saved),
+                    )
+
+                accept_mcq_btn.click(
+                    fn=accept_mcq_wrapper,
                     inputs=[pending_article_dropdown, visual_prompt_display],
-                    outputs=[builder_article_status, mcq_id_state]
-                )
-                accept_mcq_event = accept_mcq_event.then(
-                    fn=refresh_pending_default,
-                    outputs=[pending_display, pending_page_state, pending_info]
-                )
-                accept_mcq_event = accept_mcq_event.then(
-                    fn=load_pending_articles_dropdown,
-                    outputs=[pending_article_dropdown, builder_article_status]
-                )
-                accept_mcq_event = accept_mcq_event.then(
-                    fn=load_stored_mcq_view,
-                    inputs=mcq_id_state,
-                    outputs=[mcq_display, triplet_display, visual_prompt_display, visual_prompt_saved_state]
-                )
-                accept_mcq_event.then(
-                    fn=_visual_prompt_button_state,
-                    inputs=visual_prompt_saved_state,
-                    outputs=accept_visual_prompt_btn
+                    outputs=[
+                        builder_article_status, mcq_id_state,
+                        pending_display, pending_page_state, pending_info,
+                        pending_article_dropdown,
+                        mcq_display, triplet_display, visual_prompt_display, visual_prompt_saved_state,
+                        accept_visual_prompt_btn,
+                    ]
                 )
 
-                visual_prompt_display.change(
-                    fn=lambda _: False,
+                # User edits only (.input, unlike .change, ignores programmatic
+                # updates); keystrokes typed while a call is in flight collapse
+                # into one trailing call
+                visual_prompt_display.input(
+                    fn=lambda _: (False, _visual_prompt_button_state(False)),
                     inputs=visual_prompt_display,
-                    outputs=visual_prompt_saved_state
-                ).then(
-                    fn=_visual_prompt_button_state,
-                    inputs=visual_prompt_saved_state,
-                    outputs=accept_visual_prompt_btn
+                    outputs=[visual_prompt_saved_state, accept_visual_prompt_btn],
+                    trigger_mode="always_last",
+                    show_progress="hidden",
                 )
 
-                accept_visual_prompt_event = accept_visual_prompt_btn.click(
-                    fn=lambda mcq_id, prompt: handle_accept_visual_prompt(mcq_id, prompt),
-                    inputs=[mcq_id_state, visual_prompt_display],
-                    outputs=[builder_article_status, visual_prompt_display, visual_prompt_saved_state]
-                )
-                accept_visual_prompt_event.then(
-                    fn=_visual_prompt_button_state,
-                    inputs=visual_prompt_saved_state,
-                    outputs=accept_visual_prompt_btn
+                def accept_visual_prompt_wrapper(mcq_id, prompt, model_id):
+                    status, stored_prompt, saved = handle_accept_visual_prompt(mcq_id, prompt, model_id)
+                    return status, stored_prompt, saved, _visual_prompt_button_state(saved)
+
+                accept_visual_prompt_btn.click(
+                    fn=accept_visual_prompt_wrapper,
+                    inputs=[mcq_id_state, visual_prompt_display, llm_model_state],
+                    outputs=[builder_article_status, visual_prompt_display, visual_prompt_saved_state, accept_visual_prompt_btn]
                 )
 
                 show_image_btn.click(
                     fn=lambda mcq_id, model_id: handle_show_image(mcq_id, model_id),
                     inputs=[mcq_id_state, llm_model_state],
-                    outputs=[image_display, image_status]
+                    outputs=[image_display, image_status],
+                    concurrency_id="image",
+                    concurrency_limit=IMAGE_CONCURRENCY,
                 )
                 
                 delete_image_btn.click(
@@ -1613,7 +2020,7 @@ def create_interface():
 
             # Tab 3: Knowledge Base
             with gr.Tab("Knowledge Base"):
-                initial_kb_html, initial_kb_page, initial_kb_info = render_kb_list(1, None)
+                initial_kb_rows, initial_kb_page, initial_kb_info = render_kb_list(1, None)
                 kb_page_state = gr.State(initial_kb_page)
                 
                 with gr.Row():
@@ -1628,8 +2035,15 @@ def create_interface():
                         kb_refresh_btn = gr.Button("🔄 Refresh List", variant="secondary")
                         
                         gr.Markdown("---")
-                        gr.Markdown("### MCQ List")
-                        kb_list_display = gr.Markdown(value=initial_kb_html)
+                        gr.Markdown("### MCQ List (click a row to view details)")
+                        kb_list_display = gr.Dataframe(
+                            value=initial_kb_rows,
+                            headers=KB_LIST_HEADERS,
+                            datatype=["number", "str", "str"],
+                            type="array",
+                            interactive=False,
+                            wrap=True,
+                        )
                         kb_info = gr.Textbox(value=initial_kb_info, label="Pagination", interactive=False)
                         with gr.Row():
                             kb_prev_btn = gr.Button("◀ Prev", variant="secondary")
@@ -1648,7 +2062,7 @@ def create_interface():
                     
                     with gr.Column(scale=3):
                         gr.Markdown("### MCQ Details")
-                        kb_detail_display = gr.Markdown(value="*Enter an MCQ ID and click 'View Details' to see full information.*")
+                        kb_detail_display = gr.Markdown(value="*Click a row in the list, or enter an MCQ ID and click 'View Details', to see full information.*")
                         kb_triplet_display = gr.Markdown(value="")
                         kb_image_display = gr.Image(label="MCQ Image", visible=False)
                         kb_image_status = gr.Textbox(label="Image Status", interactive=False, visible=False)
@@ -1664,17 +2078,17 @@ def create_interface():
                 
                 # Event handlers
                 def search_wrapper(query):
-                    html, page, info = search_stored_mcqs(query)
-                    return html, page, info
+                    rows, page, info = search_stored_mcqs(query)
+                    return rows, page, info
                 
                 def clear_search_wrapper():
-                    html, page, info = render_kb_list(1, None)
-                    return html, page, info, ""
+                    rows, page, info = render_kb_list(1, None)
+                    return rows, page, info, ""
                 
                 def navigate_kb(direction, current_page, current_query):
                     new_page = max(1, current_page + direction)
-                    html, page, info = render_kb_list(new_page, current_query if current_query else None)
-                    return html, page, info
+                    rows, page, info = render_kb_list(new_page, current_query if current_query else None)
+                    return rows, page, info
                 
                 def view_detail_wrapper(mcq_id):
                     if not mcq_id:
@@ -1688,6 +2102,14 @@ def create_interface():
                     mcq_html, triplet_md, image_display, image_status = get_mcq_detail(int(mcq_id))
                     return mcq_html, triplet_md, image_display, image_status, int(mcq_id)
                 
+                def select_kb_row(rows, evt: gr.SelectData):
+                    # The MCQ id is the first column of the clicked row
+                    try:
+                        mcq_id = int(rows[evt.index[0]][0])
+                    except (IndexError, TypeError, ValueError):
+                        return (gr.update(),) + view_detail_wrapper(None)
+                    return (mcq_id,) + view_detail_wrapper(mcq_id)
+                
                 def export_all_wrapper(mcq_id):
                     if mcq_id is None:
                         return gr.update(value=None, visible=False)
@@ -1703,9 +2125,11 @@ def create_interface():
                 
                 def open_builder_wrapper(mcq_id):
                     if not mcq_id:
-                        return "", "", "Please enter an MCQ ID first."
-                    choice, status, _ = open_mcq_in_builder(mcq_id)
-                    return choice, status
+                        return gr.update(), "Please enter an MCQ ID first."
+                    source_id, status, error = open_mcq_in_builder(mcq_id)
+                    if source_id is None:
+                        return gr.update(), error
+                    return gr.update(choices=_pending_article_choices(), value=source_id, interactive=True), status
                 
                 kb_search_btn.click(
                     fn=search_wrapper,
@@ -1741,6 +2165,13 @@ def create_interface():
                     outputs=[kb_detail_display, kb_triplet_display, kb_image_display, kb_image_status, kb_mcq_id_state]
                 )
                 
+                # Clicking a row loads its details and fills the ID box (for "Open in Builder")
+                kb_list_display.select(
+                    fn=select_kb_row,
+                    inputs=kb_list_display,
+                    outputs=[kb_mcq_id_input, kb_detail_display, kb_triplet_display, kb_image_display, kb_image_status, kb_mcq_id_state]
+                )
+                
                 kb_export_all_btn.click(
                     fn=export_all_wrapper,
                     inputs=kb_mcq_id_state,
@@ -1757,4 +2188,11 @@ def create_interface():
             with gr.Tab("Analytics (Coming Soon)"):
                 gr.Markdown("*Analytics dashboard placeholder.*")
 
+    # The default concurrency limit is 1, which would serialize every user
+    # behind one handler; api_open=False keeps the queue UI-only
+    demo.queue(
+        default_concurrency_limit=GRADIO_CONCURRENCY,
+        max_size=GRADIO_QUEUE_SIZE,
+        api_open=False,
+    )
     return demo
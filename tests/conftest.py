@@ -0,0 +1,26 @@
+"""Shared fixtures; app modules read their database URLs at import time."""
+import os
+import tempfile
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Keep module-level engines (and the init_db run on UI import) off real databases
+_TEST_DIR = tempfile.mkdtemp(prefix="mcq-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_TEST_DIR}/app.db"
+os.environ["SESSION_DB_URL"] = f"sqlite+aiosqlite:///{_TEST_DIR}/sessions.db"
+
+from app.db.database import Base  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
@@ -0,0 +1,45 @@
+"""Tests for the init_db migrations."""
+from sqlalchemy import inspect, select, text
+
+from app.db.database import _dedupe_triplets
+from app.db.models import MCQRecord, Source, Triplet
+
+
+def _triplet(source, object):
+    return Triplet(
+        subject="Metformin",
+        action="treats",
+        object=object,
+        relation="TREATS",
+        source_id=source.id,
+        context_sentences=[],
+    )
+
+
+def test_duplicate_triplets_are_merged_before_the_identity_index(db):
+    # Legacy database: created before ux_triplet_identity, so duplicates got in
+    db.execute(text("DROP INDEX ux_triplet_identity"))
+    source = Source(source_id="PMID:1", source_type="pubmed", content="")
+    db.add(source)
+    db.flush()
+    kept, duplicate, other = (
+        _triplet(source, "Diabetes"), _triplet(source, "Diabetes"), _triplet(source, "PCOS")
+    )
+    db.add_all([kept, duplicate, other])
+    db.flush()
+    db.add(MCQRecord(
+        stem="", question="", options=[], correct_option=0,
+        source_id=source.id, triplet_id=duplicate.id,
+    ))
+    db.commit()
+
+    connection = db.connection()
+    assert _dedupe_triplets(connection) == 1
+    identity = next(index for index in Triplet.__table__.indexes if index.name == "ux_triplet_identity")
+    identity.create(bind=connection)
+
+    assert db.scalars(select(Triplet.id).order_by(Triplet.id)).all() == [kept.id, other.id]
+    assert db.scalars(select(MCQRecord.triplet_id)).all() == [kept.id]
+    assert "ux_triplet_identity" in {index["name"] for index in inspect(connection).get_indexes("triplets")}
+    # Already migrated: nothing left to merge
+    assert _dedupe_triplets(connection) == 0
@@ -0,0 +1,51 @@
+"""Tests for the critique-and-refine regeneration loop."""
+import pytest
+
+from app.services import gemini_mcq_service
+from app.services.gemini_mcq_service import regenerate_mcq_with_loop_refinement
+
+
+def _payload(stem):
+    return {
+        "mcq": {
+            "stem": stem,
+            "question": "Which drug is indicated?",
+            "options": ["A", "B", "C", "D", "E"],
+            "correct_option": 0,
+        },
+        "triplets": [],
+    }
+
+
+def _refine(monkeypatch, reviews):
+    responses = iter(reviews)
+
+    def fake_review(article_context, mcq, feedback, model_id):
+        review = next(responses)
+        if isinstance(review, Exception):
+            raise review
+        return review
+
+    monkeypatch.setattr(gemini_mcq_service, "_review_and_refine_mcq", fake_review)
+    article = {"title": "Trial", "content": "Results."}
+    return regenerate_mcq_with_loop_refinement(
+        article, _payload("original"), "Clarify the stem.", max_iterations=2
+    )
+
+
+@pytest.mark.parametrize(
+    "reviews, message, stem",
+    [
+        ([{"status": "APPROVED"}], "MCQ unchanged (approved on first review)", "original"),
+        ([{"status": "REVISED", "mcq": {}}], "MCQ unchanged (malformed revision discarded)", "original"),
+        ([_payload("first"), {"status": "APPROVED"}], "MCQ updated (1 revision, approved)", "first"),
+        ([_payload("first"), RuntimeError("quota")], "MCQ updated (1 revision, fallback)", "first"),
+        ([_payload("first"), _payload("second")], "MCQ updated (2 revisions)", "second"),
+    ],
+)
+def test_status_counts_kept_revisions(monkeypatch, reviews, message, stem):
+    result = _refine(monkeypatch, reviews)
+
+    assert result.success
+    assert result.message == message
+    assert result.payload["mcq"]["stem"] == stem
@@ -0,0 +1,162 @@
+"""Tests for the Gradio UI helpers that don't need a running interface."""
+import pytest
+
+from app.db.database import Base, session_scope
+from app.db.models import MCQRecord, PendingSource, Source, Triplet
+from app.ui.gradio_app import (
+    _DraftCache,
+    _list_pending_sources,
+    _process_article_selection,
+    handle_accept_mcq,
+    pending_mcq_cache,
+)
+
+
+PAGE_SIZE = 6
+
+
+@pytest.fixture
+def pending_queue(db):
+    # One commit, so every row gets the same second in created_at
+    sources = [
+        Source(source_id=f"PMID:{index}", source_type="pubmed", title=f"Article {index}", content="")
+        for index in range(1, 21)
+    ]
+    db.add_all(sources)
+    db.flush()
+    db.add_all(PendingSource(source_id=source.id) for source in sources)
+    db.commit()
+    return db
+
+
+def _ids(rows):
+    return [row.pending_id for row in rows]
+
+
+def test_seek_pages_match_offset_pages(pending_queue):
+    db = pending_queue
+    total = db.query(PendingSource).count()
+    offset_pages = [_ids(_list_pending_sources(db, page, PAGE_SIZE, total)[0]) for page in range(1, 5)]
+    assert offset_pages[0] == [20, 19, 18, 17, 16, 15]
+    assert offset_pages[1] == [14, 13, 12, 11, 10, 9]
+
+    # Next from each page, then Prev back from the last one
+    for page in range(1, 4):
+        rows, _ = _list_pending_sources(db, page + 1, PAGE_SIZE, total, after=offset_pages[page - 1][-1])
+        assert _ids(rows) == offset_pages[page]
+    for page in range(4, 1, -1):
+        rows, _ = _list_pending_sources(db, page - 1, PAGE_SIZE, total, before=offset_pages[page - 1][0])
+        assert _ids(rows) == offset_pages[page - 2]
+
+
+def test_seek_past_the_end_falls_back_to_the_last_page(pending_queue):
+    db = pending_queue
+    rows, total_pages = _list_pending_sources(db, 5, PAGE_SIZE, 20, after=1)
+    assert total_pages == 4
+    assert _ids(rows) == [2, 1]
+
+
+@pytest.fixture
+def app_db():
+    """The app's own (temporary) database, emptied after the test."""
+    yield
+    with session_scope() as db:
+        for table in reversed(Base.metadata.sorted_tables):
+            db.execute(table.delete())
+
+
+def _article(pubmed_id, **overrides):
+    article = {"pubmed_id": pubmed_id, "title": f"Article {pubmed_id}", "year": "2020", "abstract": "Text."}
+    article.update(overrides)
+    return article
+
+
+def test_bad_article_fails_alone(app_db):
+    messages = _process_article_selection([
+        _article("1"),
+        _article("2", abstract=None),  # content is NOT NULL
+        _article("3"),
+    ])
+
+    assert messages[0] == "Article queued for MCQ review: Article 1"
+    assert messages[1].startswith("Error selecting article:")
+    assert messages[2] == "Article queued for MCQ review: Article 3"
+    with session_scope() as db:
+        queued = db.query(Source.source_id).join(PendingSource, PendingSource.source_id == Source.id)
+        assert sorted(source_id for (source_id,) in queued) == ["PMID:1", "PMID:3"]
+
+
+def test_draft_cache_evicts_the_least_recently_read_draft():
+    cache = _DraftCache(max_entries=2, ttl=60)
+    cache[1] = {"mcq": 1}
+    cache[2] = {"mcq": 2}
+    assert cache.get(1) == {"mcq": 1}  # renews draft 1
+    cache[3] = {"mcq": 3}
+
+    assert cache.get(2) is None
+    assert cache.get(1) == {"mcq": 1}
+    assert cache.pop(3) == {"mcq": 3}
+    assert cache.pop(3, "gone") == "gone"
+
+
+def test_draft_cache_drops_expired_drafts():
+    cache = _DraftCache(max_entries=2, ttl=0)
+    cache[1] = {"mcq": 1}
+    assert cache.get(1, "expired") == "expired"
+
+
+def _draft(options=("A", "B", "C", "D", "E")):
+    return {
+        "mcq": {"stem": "Stem", "question": "Which?", "options": list(options), "correct_option": 1},
+        "triplets": [
+            {"subject": "Metformin", "action": "treats", "object": "T2D", "context_sentences": ["A."]},
+            {"subject": "Metformin", "action": "causes", "object": "Lactic acidosis"},
+        ],
+    }
+
+
+@pytest.fixture
+def pending_source(app_db):
+    with session_scope() as db:
+        source = Source(source_id="PMID:7", source_type="pubmed", title="Article 7", content="Text.")
+        db.add(source)
+        db.flush()
+        db.add(PendingSource(source_id=source.id))
+        source_id = source.id
+    yield source_id
+    pending_mcq_cache.pop(source_id)
+
+
+def test_accept_mcq_stores_triplets_and_mcq_once(pending_source):
+    pending_mcq_cache[pending_source] = _draft()
+
+    message, mcq_id = handle_accept_mcq(f"{pending_source} | Article 7", " Prompt ")
+
+    assert message == f"MCQ accepted and stored with ID {mcq_id}."
+    with session_scope() as db:
+        mcq = db.get(MCQRecord, mcq_id)
+        triplets = db.query(Triplet).order_by(Triplet.id).all()
+        assert (mcq.status, mcq.visual_prompt, mcq.correct_option) == ("approved", "Prompt", 1)
+        assert mcq.triplet_id == triplets[0].id
+        assert [(t.object, t.status, t.relation) for t in triplets] == [
+            ("T2D", "accepted", "INDICATES"),
+            ("Lactic acidosis", "accepted", "INDICATES"),
+        ]
+        assert db.query(PendingSource).count() == 0
+    assert pending_mcq_cache.get(pending_source) is None
+
+    # A second accept (double-click, or another reviewer with the same draft)
+    pending_mcq_cache[pending_source] = _draft()
+    assert handle_accept_mcq(pending_source, "") == ("Article is no longer pending (already reviewed?).", None)
+    with session_scope() as db:
+        assert db.query(MCQRecord).count() == 1
+
+
+def test_accept_mcq_needs_five_options(pending_source):
+    assert handle_accept_mcq(pending_source, "") == ("Generate an MCQ before accepting.", None)
+    pending_mcq_cache[pending_source] = _draft(options=("A", "B", "C", "D"))
+    assert handle_accept_mcq(pending_source, "") == (
+        "MCQ draft must contain exactly 5 options before acceptance.", None
+    )
+    with session_scope() as db:
+        assert db.query(PendingSource).count() == 1
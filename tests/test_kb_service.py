@@ -0,0 +1,162 @@
+"""Tests for the KB queries, bulk upserts and the KB result cache."""
+import pytest
+from sqlalchemy import text
+
+from app.db.models import Source, Triplet
+from app.services import kb_service
+from app.services.kb_service import (
+    cached_kb_result,
+    invalidate_kb_cache,
+    query_distractor_candidates,
+    upsert_triplet,
+    upsert_triplets_bulk,
+)
+
+
+def _add_triplet(db, source_id, subject, action, object, status="accepted"):
+    db.add(Triplet(
+        subject=subject,
+        action=action,
+        object=object,
+        relation="TREATS",
+        source_id=source_id,
+        context_sentences=[],
+        status=status,
+    ))
+
+
+def test_distractor_groups_are_limited_separately(db):
+    source = Source(source_id="PMID:1", source_type="pubmed", content="")
+    db.add(source)
+    db.flush()
+    # The correct triplet, then more same-subject rows than the limit
+    _add_triplet(db, source.id, "Metformin", "treats", "Type 2 Diabetes")
+    for index in range(8):
+        _add_triplet(db, source.id, "Metformin", "causes", f"Effect {index}")
+    _add_triplet(db, source.id, "Insulin", "treats", "Type 2 Diabetes")
+    _add_triplet(db, source.id, "Sulfonylurea", "treats", "Type 2 Diabetes")
+    _add_triplet(db, source.id, "Placebo", "treats", "Type 2 Diabetes", status="pending")
+    db.commit()
+
+    groups = query_distractor_candidates(db, "Metformin", "treats", "Type 2 Diabetes", limit=3)
+
+    assert [t.object for t in groups["same_subject"]] == ["Effect 0", "Effect 1", "Effect 2"]
+    assert [t.subject for t in groups["same_action_object"]] == ["Insulin", "Sulfonylurea"]
+
+
+def test_distractor_query_without_criteria_returns_empty_groups(db):
+    assert query_distractor_candidates(db) == {"same_subject": [], "same_action_object": []}
+
+
+@pytest.fixture
+def source(db):
+    source = Source(source_id="PMID:1", source_type="pubmed", content="")
+    db.add(source)
+    db.commit()
+    return source
+
+
+@pytest.fixture(params=["on_conflict", "per_row"])
+def upsert_db(request, db):
+    if request.param == "per_row":
+        # Legacy database: no unique index to conflict on, so the bulk upsert falls back
+        db.execute(text("DROP INDEX ux_triplet_identity"))
+        db.commit()
+    return db
+
+
+def _row(source, object, context_sentences, status="pending"):
+    return {
+        "subject": "Metformin",
+        "action": "treats",
+        "object": object,
+        "relation": "TREATS",
+        "source_id": source.id,
+        "context_sentences": context_sentences,
+        "schema_valid": True,
+        "status": status,
+    }
+
+
+def test_bulk_upsert_inserts_then_updates(upsert_db, source):
+    db = upsert_db
+    first = upsert_triplets_bulk(db, [_row(source, "T2D", ["Old sentence."]), _row(source, "PCOS", [])])
+    second = upsert_triplets_bulk(db, [_row(source, "T2D", ["New sentence."], status="accepted")])
+
+    assert second[0].id == first[0].id
+    assert second[0].context_sentences == ["New sentence."]
+    assert second[0].status == "accepted"
+    assert db.query(Triplet).count() == 2
+
+
+def test_bulk_upsert_keeps_sentences_when_new_list_is_empty(upsert_db, source):
+    db = upsert_db
+    upsert_triplets_bulk(db, [_row(source, "T2D", ["Kept sentence."])])
+    (triplet,) = upsert_triplets_bulk(db, [_row(source, "T2D", [], status="accepted")])
+
+    db.expire_all()
+    triplet = db.get(Triplet, triplet.id)
+    assert triplet.context_sentences == ["Kept sentence."]
+    assert triplet.status == "accepted"
+
+
+def test_bulk_upsert_returns_one_instance_per_duplicate_key(upsert_db, source):
+    triplets = upsert_triplets_bulk(upsert_db, [_row(source, "T2D", ["A."]), _row(source, "T2D", ["B."])])
+    assert triplets[0] is triplets[1]
+    assert triplets[0].context_sentences == ["B."]
+
+
+@pytest.mark.parametrize("write", [
+    lambda db, source: upsert_triplets_bulk(db, [_row(source, "T2D", ["A."])], commit=False),
+    lambda db, source: upsert_triplet(db, **_row(source, "T2D", ["A."])),
+], ids=["bulk", "single"])
+def test_kb_cache_is_invalidated_when_the_write_commits(db, source, write):
+    invalidate_kb_cache()
+    loads = []
+
+    def load():
+        loads.append(len(loads))
+        return len(loads)
+
+    key = ("test-count",)
+    assert cached_kb_result(key, load) == 1
+    write(db, source)
+    # Still cached until the write commits
+    assert cached_kb_result(key, load) == 1
+    db.commit()
+    assert cached_kb_result(key, load) == 2
+    assert cached_kb_result(key, load) == 2
+
+
+def test_kb_cache_reloads_expired_entries(monkeypatch):
+    invalidate_kb_cache()
+    monkeypatch.setattr(kb_service, "_KB_CACHE_TTL", 0)
+    loads = []
+
+    def load():
+        loads.append(None)
+        return len(loads)
+
+    assert cached_kb_result(("test-ttl",), load) == 1
+    assert cached_kb_result(("test-ttl",), load) == 2
+
+
+def test_kb_cache_evicts_the_least_recently_used_key(monkeypatch):
+    invalidate_kb_cache()
+    monkeypatch.setattr(kb_service, "_KB_CACHE_MAX_ENTRIES", 2)
+    loads = []
+
+    def loader(value):
+        def load():
+            loads.append(value)
+            return value
+        return load
+
+    cached_kb_result(("a",), loader("a"))
+    cached_kb_result(("b",), loader("b"))
+    cached_kb_result(("a",), loader("a"))  # hit; "b" is now the oldest
+    cached_kb_result(("c",), loader("c"))
+    cached_kb_result(("a",), loader("a"))
+    cached_kb_result(("b",), loader("b"))
+
+    assert loads == ["a", "b", "c", "b"]
@@ -0,0 +1,61 @@
+"""Tests for the OpenAI response cache."""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types
+
+from app.core import openai_llm
+from app.core.openai_llm import OpenAILlm
+
+
+class _FakeCompletions:
+    def __init__(self):
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        message = SimpleNamespace(content=f"answer {len(self.calls)}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+@pytest.fixture
+def completions(monkeypatch):
+    fake = _FakeCompletions()
+    client = SimpleNamespace(chat=SimpleNamespace(completions=fake))
+    monkeypatch.setattr(openai_llm, "_get_client", lambda api_key: client)
+    monkeypatch.setattr(openai_llm, "_response_cache", openai_llm.OrderedDict())
+    return fake
+
+
+def _generate(text, temperature=0.0):
+    request = LlmRequest(
+        contents=[types.Content(role="user", parts=[types.Part.from_text(text=text)])],
+        config=types.GenerateContentConfig(temperature=temperature, system_instruction="Extract facts."),
+    )
+
+    async def collect():
+        llm = OpenAILlm(model="gpt-4o-mini", api_key="test-key")
+        return [response async for response in llm.generate_content_async(request)]
+
+    return asyncio.run(collect())[-1].content.parts[0].text
+
+
+def test_repeated_deterministic_prompt_is_served_from_cache(completions):
+    assert _generate("Metformin treats T2D.") == "answer 1"
+    assert _generate("Metformin treats T2D.") == "answer 1"
+    assert len(completions.calls) == 1
+    assert completions.calls[0]["temperature"] == 0.0
+
+
+def test_prompts_differing_only_in_case_are_not_shared(completions):
+    assert _generate("Serum NO levels") == "answer 1"
+    assert _generate("Serum no levels") == "answer 2"
+    assert len(completions.calls) == 2
+
+
+def test_sampled_responses_are_never_cached(completions):
+    assert _generate("Metformin treats T2D.", temperature=None) == "answer 1"
+    assert _generate("Metformin treats T2D.", temperature=None) == "answer 2"
+    assert completions.calls[0]["temperature"] == 0.7
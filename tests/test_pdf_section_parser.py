@@ -0,0 +1,106 @@
+"""Tests for PDF page extraction and section chunking."""
+import pytest
+
+from app.services import pdf_section_parser
+from app.services.pdf_section_parser import (
+    chunk_pdf_by_sections,
+    detect_section_header,
+    iter_pdf_page_texts,
+)
+
+
+def _make_pdf(page_lines):
+    """Build a minimal PDF with one Helvetica text line per entry of page_lines."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for lines in page_lines:
+        ops = b"".join(
+            b"BT /F1 12 Tf 72 %d Td (%s) Tj ET\n" % (720 - 16 * row, line.encode())
+            for row, line in enumerate(lines)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(ops), ops))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects)
+        )
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+@pytest.fixture
+def parallel_extraction(monkeypatch):
+    monkeypatch.setattr(pdf_section_parser, "PARALLEL_MIN_PAGES", 4)
+    monkeypatch.setattr(pdf_section_parser, "PAGES_PER_TASK", 2)
+    monkeypatch.setattr(pdf_section_parser, "PDF_WORKERS", 2)
+
+
+def test_parallel_extraction_keeps_page_order(parallel_extraction, tmp_path):
+    pdf = _make_pdf([[f"Page {index}"] for index in range(9)])
+    path = tmp_path / "paper.pdf"
+    path.write_bytes(pdf)
+
+    expected = [f"Page {index}" for index in range(9)]
+    assert [text.strip() for text in iter_pdf_page_texts(path)] == expected
+    assert [text.strip() for text in iter_pdf_page_texts(pdf)] == expected
+
+
+def test_early_stop_leaves_the_shared_pool_usable(parallel_extraction):
+    pdf = _make_pdf([[f"Page {index}"] for index in range(9)])
+    pages = iter_pdf_page_texts(pdf)
+    assert next(pages).strip() == "Page 0"
+    pages.close()
+    assert len(list(iter_pdf_page_texts(pdf))) == 9
+
+
+@pytest.mark.parametrize("line, section", [
+    ("ABSTRACT", "Abstract"),
+    ("  Materials and Methods ", "Methods"),
+    ("results", "Results"),
+    ("Bibliography", "References"),
+])
+def test_detect_section_header(line, section):
+    assert detect_section_header(line) == (True, section)
+
+
+@pytest.mark.parametrize("line", ["", "Results were significant.", "Methodist hospital"])
+def test_detect_section_header_rejects_body_text(line):
+    assert detect_section_header(line) == (False, None)
+
+
+def test_chunking_keeps_wanted_sections_and_stops_at_references(monkeypatch):
+    pages_read = []
+    real_iter = pdf_section_parser.iter_pdf_page_texts
+
+    def counting_iter(pdf):
+        for text in real_iter(pdf):
+            pages_read.append(text)
+            yield text
+
+    monkeypatch.setattr(pdf_section_parser, "iter_pdf_page_texts", counting_iter)
+    pdf = _make_pdf([
+        ["Abstract", "Metformin lowers glucose."],
+        ["Introduction", "Diabetes is common."],
+        ["Results", "HbA1c fell by 1%."],
+        ["References"],
+        ["1. Smith J. Diabetes care."],
+    ])
+
+    chunks = chunk_pdf_by_sections(pdf, "paper.pdf")
+
+    assert [(c["section_title"], c["content"]) for c in chunks] == [
+        ("Abstract", "Metformin lowers glucose."),
+        ("Results", "HbA1c fell by 1%."),
+    ]
+    assert len(pages_read) == 4  # the page after the References header is never read
@@ -0,0 +1,65 @@
+"""Tests for the batched, cached PubMed search."""
+import asyncio
+
+import pytest
+
+from app.services import pubmed_service
+from app.services.pubmed_service import PubmedBatcher
+
+
+@pytest.fixture
+def searches(monkeypatch):
+    batches = []
+
+    def fake_outcomes(queries, max_results):
+        batches.append(list(queries))
+        return [
+            ValueError("PubMed search failed: boom") if keywords == "fail" else [{"title": keywords}]
+            for keywords in queries
+        ]
+
+    monkeypatch.setattr(pubmed_service, "_search_pubmed_outcomes", fake_outcomes)
+    return batches
+
+
+def test_concurrent_searches_share_one_batch(searches):
+    batcher = PubmedBatcher(max_queue_time=0.05)
+
+    async def search_all():
+        return await asyncio.gather(
+            batcher.process("metformin"),
+            batcher.process("insulin"),
+            batcher.process("fail"),
+            return_exceptions=True,
+        )
+
+    metformin, insulin, failed = asyncio.run(search_all())
+
+    assert searches == [["metformin", "insulin", "fail"]]
+    assert metformin == [{"title": "metformin"}]
+    assert insulin == [{"title": "insulin"}]
+    assert isinstance(failed, ValueError)
+
+
+def test_repeated_searches_are_served_from_the_cache(searches):
+    batcher = PubmedBatcher(max_queue_time=0)
+
+    async def search(keywords):
+        return await batcher.process(keywords)
+
+    assert asyncio.run(search("metformin  AND insulin")) == [{"title": "metformin AND insulin"}]
+    assert asyncio.run(search(" metformin AND\tinsulin ")) == [{"title": "metformin AND insulin"}]
+    # Boolean operators are case-sensitive, so a different case is a different search
+    asyncio.run(search("metformin and insulin"))
+
+    assert searches == [["metformin AND insulin"], ["metformin and insulin"]]
+
+
+def test_failed_searches_are_not_cached(searches):
+    batcher = PubmedBatcher(max_queue_time=0)
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            asyncio.run(batcher.process("fail"))
+
+    assert searches == [["fail"], ["fail"]]